@@ -0,0 +1,36 @@
+"""
+One-off: add the full-text search_vector column and GIN index to
+daily_logs, weekly_plans and weekly_reports (see app.services.search).
+The first run rewrites each table under an exclusive lock — run it in a
+quiet window. /asal/search answers 503 until it has been run.
+Run:  cd backend && python add_search_columns.py
+Safe to re-run — existing columns and indexes are kept.
+"""
+import asyncio
+from app.core.database import engine, Base
+from app.services.search import SEARCHABLE, ensure_search_columns
+
+# Import ALL models so Base.metadata knows every table
+import app.models.user          # noqa: F401
+import app.models.asal          # noqa: F401
+import app.models.inventory     # noqa: F401
+import app.models.sales         # noqa: F401
+import app.models.marketing     # noqa: F401
+import app.models.disciplinary  # noqa: F401
+import app.models.kpi           # noqa: F401
+import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
+
+
+async def add_search_columns():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await ensure_search_columns(conn)
+    await engine.dispose()
+    for searchable in SEARCHABLE.values():
+        print(f"✅ {searchable.table}: search_vector column and index in place")
+
+
+if __name__ == "__main__":
+    asyncio.run(add_search_columns())
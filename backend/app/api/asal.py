@@ -2,34 +2,109 @@
 ASAL Core Engine API routes — Daily Logs, Weekly Plans, Weekly Reports.
 Heart of the operational compliance system.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime, timezone, date, timedelta
-from typing import List, Optional
+from sqlalchemy import select, and_, tuple_
+from datetime import datetime, timezone, date
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.core import policy
+from app.models.user import User, UserRole
 from app.models.asal import DailyLog, WeeklyPlan, WeeklyReport, LogStatus, PlanStatus, ReportStatus
+from app.services import idempotency, search
+from app.services import audit, business_calendar, compliance, compliance_state
 from app.schemas.asal import (
     DailyLogCreate, DailyLogOut,
     WeeklyPlanCreate, WeeklyPlanOut,
     WeeklyReportCreate, WeeklyReportOut,
+    DailyLogBatch, WeeklyPlanBatch, WeeklyReportBatch, BatchItemResult, BatchResult,
+    ComplianceStateOut, SearchHit,
 )
 
 router = APIRouter(prefix="/asal", tags=["ASAL Core Engine"])
 
 
+# ─── Record Builders ─────────────────────────────────────────────────
+
+def _daily_log(body: DailyLogCreate, user: User, now: datetime) -> DailyLog:
+    return DailyLog(
+        user_id=user.id,
+        log_date=body.log_date,
+        role_at_time=user.role.value,
+        activities=body.activities,
+        key_achievements=body.key_achievements,
+        challenges=body.challenges,
+        tomorrow_plan=body.tomorrow_plan,
+        hours_worked=body.hours_worked,
+        status=LogStatus.SUBMITTED,
+        submitted_at=now,
+        device_id=body.device_id,
+    )
+
+
+def _weekly_plan(
+    body: WeeklyPlanCreate, user: User, calendar: business_calendar.BusinessCalendar, now: datetime,
+) -> WeeklyPlan:
+    # Deadline: 19:00 on the eve of the week's first working day (Sunday)
+    deadline = calendar.weekly_plan_deadline(body.week_start_date, user.department)
+    return WeeklyPlan(
+        user_id=user.id,
+        week_start_date=body.week_start_date,
+        week_number=body.week_start_date.isocalendar()[1],
+        year=body.week_start_date.year,
+        objectives=[obj.model_dump() for obj in body.objectives],
+        kpi_targets=body.kpi_targets,
+        resource_requests=body.resource_requests,
+        time_bound_actions=body.time_bound_actions,
+        status=PlanStatus.LATE if now > deadline else PlanStatus.SUBMITTED,
+        submitted_at=now,
+        deadline=deadline,
+        device_id=body.device_id,
+    )
+
+
+def _weekly_report(
+    body: WeeklyReportCreate, user: User, calendar: business_calendar.BusinessCalendar, now: datetime,
+) -> WeeklyReport:
+    # Deadline: Friday of the same week at 19:00, later if Friday is a holiday
+    deadline = calendar.weekly_report_deadline(body.week_start_date, user.department)
+    return WeeklyReport(
+        user_id=user.id,
+        weekly_plan_id=body.weekly_plan_id,
+        week_start_date=body.week_start_date,
+        week_number=body.week_start_date.isocalendar()[1],
+        year=body.week_start_date.year,
+        objectives_achieved=[obj.model_dump() for obj in body.objectives_achieved],
+        kpi_evidence=body.kpi_evidence,
+        financial_impact=body.financial_impact,
+        inventory_impact=body.inventory_impact,
+        deviation_explanation=body.deviation_explanation,
+        lessons_learned=body.lessons_learned,
+        next_week_adjustments=body.next_week_adjustments,
+        status=ReportStatus.LATE if now > deadline else ReportStatus.SUBMITTED,
+        submitted_at=now,
+        deadline=deadline,
+        device_id=body.device_id,
+    )
+
+
 # ─── Daily Activity Log ──────────────────────────────────────────────
 
 @router.post("/daily-logs", response_model=DailyLogOut, status_code=201)
 async def submit_daily_log(
     body: DailyLogCreate,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    replayed = await idempotency.replay(db, user.id, "submit_daily_log", idempotency_key, body)
+    if replayed:
+        return replayed
+
     # Check for duplicate
     existing = await db.execute(
         select(DailyLog).where(
@@ -39,45 +114,36 @@ async def submit_daily_log(
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=409, detail="Daily log already submitted for this date")
 
-    log = DailyLog(
-        user_id=user.id,
-        log_date=body.log_date,
-        role_at_time=user.role.value,
-        activities=body.activities,
-        key_achievements=body.key_achievements,
-        challenges=body.challenges,
-        tomorrow_plan=body.tomorrow_plan,
-        hours_worked=body.hours_worked,
-        status=LogStatus.SUBMITTED,
-        submitted_at=datetime.now(timezone.utc),
-        device_id=body.device_id,
-    )
+    log = _daily_log(body, user, datetime.now(timezone.utc))
     db.add(log)
     await db.flush()
+    await compliance_state.record_daily_log(db, user.id, body.log_date)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="SUBMIT_DAILY_LOG", resource_type="daily_log",
         resource_id=str(log.id), details={"date": str(body.log_date)},
-    ))
+    )
 
-    return DailyLogOut.model_validate(log)
+    response = DailyLogOut.model_validate(log)
+    await idempotency.remember(db, user.id, "submit_daily_log", idempotency_key, body, response, status_code=201)
+    return response
 
 
 @router.get("/daily-logs", response_model=List[DailyLogOut])
 async def list_daily_logs(
+    response: Response,
     user_id: Optional[UUID] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     page: int = 1, page_size: int = 30,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(DailyLog)
-
     # Non-admin users can only see their own logs
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(DailyLog.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(DailyLog), DailyLog, current_user)
+    if user_id and policy.visibility(DailyLog, current_user.role) is policy.Visibility.ALL:
         query = query.where(DailyLog.user_id == user_id)
 
     if start_date:
@@ -85,64 +151,32 @@ async def list_daily_logs(
     if end_date:
         query = query.where(DailyLog.log_date <= end_date)
 
-    result = await db.execute(
-        query.order_by(DailyLog.log_date.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (DailyLog.log_date, DailyLog.id),
+        response, cursor, page, page_size,
     )
-    return [DailyLogOut.model_validate(log) for log in result.scalars().all()]
+    return [DailyLogOut.model_validate(log) for log in rows]
 
 
 @router.get("/daily-logs/missed", response_model=List[dict])
 async def get_missed_daily_logs(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     """
     Detect users with 2+ consecutive missed daily logs.
     Returns list of users and their consecutive miss counts.
     """
-    from sqlalchemy import text
-
-    # Get all active users
-    users_result = await db.execute(select(User).where(User.is_active == True))
-    users = users_result.scalars().all()
-
-    missed_list = []
-    today = date.today()
-
-    for u in users:
-        # Check last 7 days of logs
-        logs_result = await db.execute(
-            select(DailyLog.log_date).where(
-                and_(
-                    DailyLog.user_id == u.id,
-                    DailyLog.log_date >= today - timedelta(days=7),
-                    DailyLog.log_date <= today,
-                )
-            ).order_by(DailyLog.log_date.desc())
-        )
-        logged_dates = {row[0] for row in logs_result.all()}
-
-        # Count consecutive missed days (excluding weekends)
-        consecutive = 0
-        for i in range(7):
-            check_date = today - timedelta(days=i)
-            if check_date.weekday() >= 5:  # Skip weekends
-                continue
-            if check_date not in logged_dates:
-                consecutive += 1
-            else:
-                break
-
-        if consecutive >= 2:
-            missed_list.append({
-                "user_id": str(u.id),
-                "full_name": u.full_name,
-                "role": u.role.value,
-                "consecutive_missed": consecutive,
-                "requires_query": True,
-            })
-
-    return missed_list
+    return [
+        {
+            "user_id": str(streak.user_id),
+            "full_name": streak.full_name,
+            "role": streak.role.value,
+            "consecutive_missed": streak.consecutive_missed,
+            "requires_query": True,
+        }
+        for streak in await compliance.missed_daily_log_streaks(db)
+    ]
 
 
 # ─── Weekly Plan (Sunday 7PM deadline) ───────────────────────────────
@@ -153,17 +187,6 @@ async def submit_weekly_plan(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    # Calculate week number and deadline
-    week_num = body.week_start_date.isocalendar()[1]
-    year = body.week_start_date.year
-
-    # Deadline: Sunday before week_start_date at 19:00
-    deadline_date = body.week_start_date - timedelta(days=1)  # Sunday
-    deadline = datetime(deadline_date.year, deadline_date.month, deadline_date.day, 19, 0, 0, tzinfo=timezone.utc)
-
-    now = datetime.now(timezone.utc)
-    plan_status = PlanStatus.LATE if now > deadline else PlanStatus.SUBMITTED
-
     # Check for duplicate
     existing = await db.execute(
         select(WeeklyPlan).where(
@@ -173,49 +196,40 @@ async def submit_weekly_plan(
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=409, detail="Weekly plan already submitted for this week")
 
-    plan = WeeklyPlan(
-        user_id=user.id,
-        week_start_date=body.week_start_date,
-        week_number=week_num,
-        year=year,
-        objectives=[obj.model_dump() for obj in body.objectives],
-        kpi_targets=body.kpi_targets,
-        resource_requests=body.resource_requests,
-        time_bound_actions=body.time_bound_actions,
-        status=plan_status,
-        submitted_at=now,
-        deadline=deadline,
-        device_id=body.device_id,
-    )
+    calendar = await business_calendar.get_calendar(db)
+    plan = _weekly_plan(body, user, calendar, datetime.now(timezone.utc))
     db.add(plan)
     await db.flush()
+    await compliance_state.record_weekly_plan(db, user.id, body.week_start_date, plan.status)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="SUBMIT_WEEKLY_PLAN", resource_type="weekly_plan",
         resource_id=str(plan.id),
-        details={"week": week_num, "year": year, "status": plan_status.value},
-    ))
+        details={"week": plan.week_number, "year": plan.year, "status": plan.status.value},
+    )
 
     return WeeklyPlanOut.model_validate(plan)
 
 
 @router.get("/weekly-plans", response_model=List[WeeklyPlanOut])
 async def list_weekly_plans(
+    response: Response,
     user_id: Optional[UUID] = None,
     page: int = 1, page_size: int = 20,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(WeeklyPlan)
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(WeeklyPlan.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(WeeklyPlan), WeeklyPlan, current_user)
+    if user_id and policy.visibility(WeeklyPlan, current_user.role) is policy.Visibility.ALL:
         query = query.where(WeeklyPlan.user_id == user_id)
 
-    result = await db.execute(
-        query.order_by(WeeklyPlan.week_start_date.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (WeeklyPlan.week_start_date, WeeklyPlan.id),
+        response, cursor, page, page_size,
     )
-    return [WeeklyPlanOut.model_validate(p) for p in result.scalars().all()]
+    return [WeeklyPlanOut.model_validate(p) for p in rows]
 
 
 # ─── Weekly Report (Friday 7PM deadline) ─────────────────────────────
@@ -226,17 +240,6 @@ async def submit_weekly_report(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    week_num = body.week_start_date.isocalendar()[1]
-    year = body.week_start_date.year
-
-    # Deadline: Friday of the same week at 19:00
-    days_until_friday = (4 - body.week_start_date.weekday()) % 7
-    deadline_date = body.week_start_date + timedelta(days=days_until_friday)
-    deadline = datetime(deadline_date.year, deadline_date.month, deadline_date.day, 19, 0, 0, tzinfo=timezone.utc)
-
-    now = datetime.now(timezone.utc)
-    report_status = ReportStatus.LATE if now > deadline else ReportStatus.SUBMITTED
-
     # Check for duplicate
     existing = await db.execute(
         select(WeeklyReport).where(
@@ -246,50 +249,221 @@ async def submit_weekly_report(
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=409, detail="Weekly report already submitted for this week")
 
-    report = WeeklyReport(
-        user_id=user.id,
-        weekly_plan_id=body.weekly_plan_id,
-        week_start_date=body.week_start_date,
-        week_number=week_num,
-        year=year,
-        objectives_achieved=[obj.model_dump() for obj in body.objectives_achieved],
-        kpi_evidence=body.kpi_evidence,
-        financial_impact=body.financial_impact,
-        inventory_impact=body.inventory_impact,
-        deviation_explanation=body.deviation_explanation,
-        lessons_learned=body.lessons_learned,
-        next_week_adjustments=body.next_week_adjustments,
-        status=report_status,
-        submitted_at=now,
-        deadline=deadline,
-        device_id=body.device_id,
-    )
+    calendar = await business_calendar.get_calendar(db)
+    report = _weekly_report(body, user, calendar, datetime.now(timezone.utc))
     db.add(report)
     await db.flush()
+    await compliance_state.record_weekly_report(db, user.id, body.week_start_date, report.status)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="SUBMIT_WEEKLY_REPORT", resource_type="weekly_report",
         resource_id=str(report.id),
-        details={"week": week_num, "year": year, "status": report_status.value},
-    ))
+        details={"week": report.week_number, "year": report.year, "status": report.status.value},
+    )
 
     return WeeklyReportOut.model_validate(report)
 
 
 @router.get("/weekly-reports", response_model=List[WeeklyReportOut])
 async def list_weekly_reports(
+    response: Response,
     user_id: Optional[UUID] = None,
     page: int = 1, page_size: int = 20,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(WeeklyReport)
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(WeeklyReport.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(WeeklyReport), WeeklyReport, current_user)
+    if user_id and policy.visibility(WeeklyReport, current_user.role) is policy.Visibility.ALL:
         query = query.where(WeeklyReport.user_id == user_id)
 
-    result = await db.execute(
-        query.order_by(WeeklyReport.week_start_date.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (WeeklyReport.week_start_date, WeeklyReport.id),
+        response, cursor, page, page_size,
+    )
+    return [WeeklyReportOut.model_validate(r) for r in rows]
+
+
+# ─── Batch Backfill (offline catch-up) ───────────────────────────────
+
+async def _submit_batch(
+    db: AsyncSession,
+    user: User,
+    model,
+    day_column,
+    entries: List[Any],
+    build: Callable[[Any], Any],
+) -> Tuple[List[Any], BatchResult]:
+    """
+    Insert every entry whose day the user has not submitted yet, with one
+    duplicate-check query for the whole batch and one flush. An entry
+    repeating a day already in the batch is a duplicate too.
+    """
+    days = {getattr(entry, day_column.key) for entry in entries}
+    taken = set((await db.execute(
+        select(day_column).where(tuple_(model.user_id, day_column).in_([(user.id, day) for day in days]))
+    )).scalars())
+
+    created: List[Tuple[int, Any]] = []
+    results: Dict[int, BatchItemResult] = {}
+    for index, entry in enumerate(entries):
+        day = getattr(entry, day_column.key)
+        if day in taken:
+            results[index] = BatchItemResult(index=index, day=day, status="duplicate")
+            continue
+        taken.add(day)
+        created.append((index, build(entry)))
+
+    db.add_all([record for _, record in created])
+    await db.flush()
+    for index, record in created:
+        results[index] = BatchItemResult(
+            index=index, day=getattr(record, day_column.key), status="created",
+            id=record.id, record_status=record.status.value,
+        )
+    return [record for _, record in created], BatchResult(
+        created=len(created),
+        duplicates=len(entries) - len(created),
+        results=[results[index] for index in sorted(results)],
+    )
+
+
+@router.post("/daily-logs/batch", response_model=BatchResult)
+async def submit_daily_logs_batch(
+    body: DailyLogBatch,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Backfill daily logs kept offline; dates already logged come back as duplicates."""
+    replayed = await idempotency.replay(db, user.id, "submit_daily_log_batch", idempotency_key, body)
+    if replayed:
+        return replayed
+
+    now = datetime.now(timezone.utc)
+    logs, result = await _submit_batch(
+        db, user, DailyLog, DailyLog.log_date, body.entries, lambda entry: _daily_log(entry, user, now),
+    )
+    if logs:
+        await compliance_state.recompute(db, [user.id])
+
+    audit.record(
+        db,
+        user_id=user.id, action="SUBMIT_DAILY_LOG_BATCH", resource_type="daily_log",
+        details={
+            "created": result.created, "duplicates": result.duplicates,
+            "dates": [str(log.log_date) for log in logs],
+        },
+    )
+
+    await idempotency.remember(db, user.id, "submit_daily_log_batch", idempotency_key, body, result)
+    return result
+
+
+@router.post("/weekly-plans/batch", response_model=BatchResult)
+async def submit_weekly_plans_batch(
+    body: WeeklyPlanBatch,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Backfill weekly plans kept offline; weeks already planned come back as duplicates."""
+    replayed = await idempotency.replay(db, user.id, "submit_weekly_plan_batch", idempotency_key, body)
+    if replayed:
+        return replayed
+
+    calendar = await business_calendar.get_calendar(db)
+    now = datetime.now(timezone.utc)
+    plans, result = await _submit_batch(
+        db, user, WeeklyPlan, WeeklyPlan.week_start_date, body.entries,
+        lambda entry: _weekly_plan(entry, user, calendar, now),
+    )
+    if plans:
+        await compliance_state.recompute(db, [user.id])
+
+    audit.record(
+        db,
+        user_id=user.id, action="SUBMIT_WEEKLY_PLAN_BATCH", resource_type="weekly_plan",
+        details={
+            "created": result.created, "duplicates": result.duplicates,
+            "weeks": [{"week": p.week_number, "year": p.year, "status": p.status.value} for p in plans],
+        },
+    )
+
+    await idempotency.remember(db, user.id, "submit_weekly_plan_batch", idempotency_key, body, result)
+    return result
+
+
+@router.post("/weekly-reports/batch", response_model=BatchResult)
+async def submit_weekly_reports_batch(
+    body: WeeklyReportBatch,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Backfill weekly reports kept offline; weeks already reported come back as duplicates."""
+    replayed = await idempotency.replay(db, user.id, "submit_weekly_report_batch", idempotency_key, body)
+    if replayed:
+        return replayed
+
+    calendar = await business_calendar.get_calendar(db)
+    now = datetime.now(timezone.utc)
+    reports, result = await _submit_batch(
+        db, user, WeeklyReport, WeeklyReport.week_start_date, body.entries,
+        lambda entry: _weekly_report(entry, user, calendar, now),
+    )
+    if reports:
+        await compliance_state.recompute(db, [user.id])
+
+    audit.record(
+        db,
+        user_id=user.id, action="SUBMIT_WEEKLY_REPORT_BATCH", resource_type="weekly_report",
+        details={
+            "created": result.created, "duplicates": result.duplicates,
+            "weeks": [{"week": r.week_number, "year": r.year, "status": r.status.value} for r in reports],
+        },
+    )
+
+    await idempotency.remember(db, user.id, "submit_weekly_report_batch", idempotency_key, body, result)
+    return result
+
+
+# ─── Compliance Dashboard ─────────────────────────────────────────────
+
+@router.get("/compliance", response_model=List[ComplianceStateOut])
+async def get_compliance_overview(
+    db: AsyncSession = Depends(get_db),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+):
+    """Per-user miss streak, late plans/reports (90 days) and queries this month."""
+    return [ComplianceStateOut(**row) for row in await compliance.compliance_overview(db)]
+
+
+# ─── Search ───────────────────────────────────────────────────────────
+
+@router.get("/search", response_model=List[SearchHit])
+async def search_activity(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    kind: Optional[List[search.SearchKind]] = Query(None),
+    user_id: Optional[UUID] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over daily logs, weekly plans and weekly reports,
+    best match first. Supervisors search everyone's records (optionally
+    one ``user_id``); other staff search their own.
+    """
+    hits, next_cursor = await search.search(
+        db, current_user, q, kinds=kind, user_id=user_id,
+        start_date=start_date, end_date=end_date, cursor=cursor, page_size=page_size,
     )
-    return [WeeklyReportOut.model_validate(r) for r in result.scalars().all()]
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return [SearchHit(**hit) for hit in hits]
@@ -3,7 +3,7 @@ Authentication & User Management API routes.
 Includes login, token refresh, CRUD, password reset, admin password reset,
 activate/deactivate, consent, and audit logs.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from datetime import datetime, timezone
@@ -12,10 +12,11 @@ from uuid import UUID
 
 from app.core.database import get_db
 from app.core.security import (
-    hash_password, verify_password,
+    hash_password_async, verify_password_async, password_pool,
     create_access_token, create_refresh_token, decode_token,
 )
-from app.core.deps import get_current_user, get_current_active_admin, require_roles
+from app.core.deps import get_current_user, get_current_active_admin, require_roles, Caller
+from app.core import claims, pagination
 from app.models.user import User, UserRole, AuditLog, PasswordResetToken
 from app.schemas.user import (
     LoginRequest, TokenResponse, RefreshRequest,
@@ -24,6 +25,7 @@ from app.schemas.user import (
     ForgotPasswordRequest, ResetPasswordRequest,
     AdminPasswordReset, ToggleUserActiveRequest,
 )
+from app.services import audit, dashboard, partitions
 
 router = APIRouter(prefix="/auth", tags=["Authentication & Users"])
 
@@ -34,8 +36,11 @@ router = APIRouter(prefix="/auth", tags=["Authentication & Users"])
 async def login(body: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == body.email))
     user = result.scalar_one_or_none()
+    # Hand the connection back while bcrypt runs — queued logins must not
+    # hold pool connections the rest of the API needs
+    await db.commit()
 
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not user or not await verify_password_async(body.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     if not user.is_active:
@@ -44,18 +49,19 @@ async def login(body: LoginRequest, request: Request, db: AsyncSession = Depends
     user.device_id = body.device_id
     user.last_login = datetime.now(timezone.utc)
 
-    token_data = {"sub": str(user.id), "role": user.role.value, "device_id": body.device_id}
+    token_data = await claims.token_claims(db, user, body.device_id)
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id,
         action="LOGIN",
         resource_type="auth",
         details={"device_id": body.device_id},
         ip_address=request.client.host if request.client else None,
         device_id=body.device_id,
-    ))
+    )
     await db.commit()
 
     return TokenResponse(
@@ -77,7 +83,7 @@ async def refresh_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
-    token_data = {"sub": str(user.id), "role": user.role.value, "device_id": user.device_id}
+    token_data = await claims.token_claims(db, user, user.device_id)
     return TokenResponse(
         access_token=create_access_token(token_data),
         refresh_token=create_refresh_token(token_data),
@@ -104,17 +110,18 @@ async def create_user(
         email=body.email,
         full_name=body.full_name,
         phone=body.phone,
-        hashed_password=hash_password(body.password),
+        hashed_password=await hash_password_async(body.password),
         role=body.role,
         department=body.department,
     )
     db.add(user)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="CREATE_USER", resource_type="user",
         resource_id=str(user.id), details={"role": body.role.value, "email": body.email},
-    ))
+    )
     await db.commit()
 
     return UserOut.model_validate(user)
@@ -122,13 +129,15 @@ async def create_user(
 
 @router.get("/users", response_model=UserListOut)
 async def list_users(
+    response: Response,
     page: int = 1,
     page_size: int = 50,
+    cursor: Optional[str] = None,
     role: Optional[UserRole] = None,
     search: Optional[str] = Query(None, description="Search by name or email"),
     active_only: Optional[bool] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    current_user: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     query = select(User)
     count_query = select(func.count()).select_from(User)
@@ -149,14 +158,15 @@ async def list_users(
     total_result = await db.execute(count_query)
     total = total_result.scalar()
 
-    result = await db.execute(
-        query.order_by(User.full_name).offset((page - 1) * page_size).limit(page_size)
+    users = await pagination.paginate(
+        db, query, (User.full_name, User.id),
+        response, cursor, page, page_size, descending=False,
     )
-    users = result.scalars().all()
 
     return UserListOut(
         users=[UserOut.model_validate(u) for u in users],
         total=total, page=page, page_size=page_size,
+        next_cursor=response.headers.get(pagination.NEXT_CURSOR_HEADER),
     )
 
 
@@ -169,7 +179,7 @@ async def get_current_user_profile(current_user: User = Depends(get_current_user
 async def get_user(
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -193,10 +203,11 @@ async def update_user(
     for field, value in body.model_dump(exclude_unset=True).items():
         setattr(user, field, value)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="UPDATE_USER", resource_type="user",
         resource_id=str(user_id), details=body.model_dump(exclude_unset=True),
-    ))
+    )
     await db.commit()
 
     return UserOut.model_validate(user)
@@ -222,10 +233,11 @@ async def toggle_user_active(
     user.is_active = body.is_active
 
     action = "ACTIVATE_USER" if body.is_active else "DEACTIVATE_USER"
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action=action, resource_type="user",
         resource_id=str(user_id), details={"is_active": body.is_active},
-    ))
+    )
     await db.commit()
 
     return UserOut.model_validate(user)
@@ -245,12 +257,13 @@ async def admin_reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = hash_password(body.new_password)
+    user.hashed_password = await hash_password_async(body.new_password)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="ADMIN_RESET_PASSWORD", resource_type="user",
         resource_id=str(user_id), details={"reset_by": admin.full_name},
-    ))
+    )
     await db.commit()
 
     return {"message": f"Password reset for {user.full_name}", "user_id": str(user_id)}
@@ -284,10 +297,11 @@ async def forgot_password(body: ForgotPasswordRequest, db: AsyncSession = Depend
     reset_token = PasswordResetToken(user_id=user.id)
     db.add(reset_token)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="PASSWORD_RESET_REQUEST", resource_type="auth",
         details={"email": body.email},
-    ))
+    )
     await db.commit()
 
     return {
@@ -321,13 +335,14 @@ async def reset_password(body: ResetPasswordRequest, db: AsyncSession = Depends(
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
 
-    user.hashed_password = hash_password(body.new_password)
+    user.hashed_password = await hash_password_async(body.new_password)
     token_record.used = True
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="PASSWORD_RESET_COMPLETE", resource_type="auth",
         details={},
-    ))
+    )
     await db.commit()
 
     return {"message": "Password has been reset successfully. You can now log in."}
@@ -341,15 +356,16 @@ async def change_password(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await verify_password_async(body.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Current password incorrect")
 
-    current_user.hashed_password = hash_password(body.new_password)
+    current_user.hashed_password = await hash_password_async(body.new_password)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=current_user.id, action="CHANGE_PASSWORD", resource_type="auth",
         resource_id=str(current_user.id), details={},
-    ))
+    )
     await db.commit()
 
     return {"message": "Password changed successfully"}
@@ -367,11 +383,12 @@ async def submit_consent(
     current_user.compliance_consent = body.compliance_consent
     current_user.payroll_deduction_consent = body.payroll_deduction_consent
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=current_user.id, action="SUBMIT_CONSENT", resource_type="legal",
         resource_id=str(current_user.id),
         details={"signature": body.digital_signature, "consent": body.model_dump()},
-    ))
+    )
     await db.commit()
 
     return {"message": "Consent recorded", "timestamp": datetime.now(timezone.utc).isoformat()}
@@ -388,32 +405,8 @@ async def dashboard_stats(
     stats: dict = {"role": current_user.role.value}
 
     if current_user.role in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        total = (await db.execute(select(func.count()).select_from(User))).scalar()
-        active = (await db.execute(
-            select(func.count()).select_from(User).where(User.is_active == True)
-        )).scalar()
-        role_counts = {}
-        for r in UserRole:
-            cnt = (await db.execute(
-                select(func.count()).select_from(User).where(User.role == r)
-            )).scalar()
-            role_counts[r.value] = cnt
-        stats.update({
-            "total_users": total,
-            "active_users": active,
-            "inactive_users": total - active,
-            "users_by_role": role_counts,
-        })
-
-    from datetime import timedelta
-    week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-    recent_logins = (await db.execute(
-        select(func.count()).select_from(AuditLog).where(
-            AuditLog.action == "LOGIN",
-            AuditLog.timestamp >= week_ago,
-        )
-    )).scalar()
-    stats["recent_logins_7d"] = recent_logins
+        stats.update(await dashboard.user_breakdown(db))
+    stats["recent_logins_7d"] = await dashboard.recent_logins(db)
 
     return stats
 
@@ -422,21 +415,47 @@ async def dashboard_stats(
 
 @router.get("/audit-logs", response_model=List[AuditLogOut])
 async def get_audit_logs(
+    response: Response,
     page: int = 1,
     page_size: int = 100,
+    cursor: Optional[str] = None,
     action: Optional[str] = None,
     user_id: Optional[UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
+    """Newest first. ``start``/``end`` bound the scan to the matching monthly partitions."""
     query = select(AuditLog)
     if action:
         query = query.where(AuditLog.action == action)
     if user_id:
         query = query.where(AuditLog.user_id == user_id)
-
-    result = await db.execute(
-        query.order_by(AuditLog.timestamp.desc()).offset((page - 1) * page_size).limit(page_size)
+    if start:
+        query = query.where(AuditLog.timestamp >= start)
+    if end:
+        query = query.where(AuditLog.timestamp < end)
+
+    logs = await pagination.paginate(
+        db, query, (AuditLog.timestamp, AuditLog.id),
+        response, cursor, page, page_size,
     )
-    logs = result.scalars().all()
     return [AuditLogOut.model_validate(log) for log in logs]
+
+
+@router.post("/audit-logs/maintain")
+async def maintain_log_partitions(
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_active_admin),
+):
+    """Create upcoming audit/sync-event partitions and archive expired ones now."""
+    # End this request's transaction so it does not hold the locks a drop needs
+    await db.commit()
+    return await partitions.maintain_partitions()
+
+
+@router.get("/password-pool")
+async def get_password_pool_stats(admin: User = Depends(get_current_active_admin)):
+    """Password-hashing pool load and queue-wait times."""
+    return password_pool.stats()
@@ -0,0 +1,175 @@
+"""
+Business Calendar API routes — public holidays and per-department
+working-day exceptions used by every ASAL deadline and compliance check.
+Every change rebuilds the stored compliance state (compliance_states).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+from datetime import date, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from app.core.database import get_db
+from app.core.deps import get_current_user, require_roles, Caller
+from app.models.user import User, UserRole
+from app.models.calendar import CalendarDay, CalendarException
+from app.schemas.calendar import (
+    CalendarDayOut, HolidaySet, CalendarExceptionSet, CalendarExceptionOut,
+)
+from app.services import audit, business_calendar, compliance_state
+
+router = APIRouter(prefix="/calendar", tags=["Business Calendar"])
+
+MAX_RANGE_DAYS = 366
+
+
+# ─── Working Days ────────────────────────────────────────────────────
+
+@router.get("/days", response_model=List[CalendarDayOut])
+async def list_calendar_days(
+    start: date,
+    end: date,
+    department: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Every day in [start, end] with its working-day flag for ``department``."""
+    if end < start or (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be 1–{MAX_RANGE_DAYS} days")
+    calendar = await business_calendar.get_calendar(db)
+    days = []
+    day = start
+    while day <= end:
+        days.append(CalendarDayOut(
+            day=day,
+            is_working_day=calendar.is_working_day(day, department),
+            holiday_name=calendar.holidays.get(day),
+        ))
+        day += timedelta(days=1)
+    return days
+
+
+# ─── Public Holidays ─────────────────────────────────────────────────
+
+@router.put("/holidays/{day}", response_model=CalendarDayOut)
+async def set_holiday(
+    day: date,
+    body: HolidaySet,
+    db: AsyncSession = Depends(get_db),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+):
+    row = await db.get(CalendarDay, day)
+    if row is None:
+        row = CalendarDay(day=day)
+        db.add(row)
+    row.is_working_day = False
+    row.holiday_name = body.name
+    await db.flush()
+
+    audit.record(
+        db,
+        user_id=admin.id, action="SET_HOLIDAY", resource_type="calendar",
+        resource_id=str(day), details={"name": body.name},
+    )
+    await compliance_state.rebuild(db)
+    await db.commit()
+    business_calendar.invalidate()
+    return CalendarDayOut(day=day, is_working_day=False, holiday_name=body.name)
+
+
+@router.delete("/holidays/{day}", response_model=CalendarDayOut)
+async def clear_holiday(
+    day: date,
+    db: AsyncSession = Depends(get_db),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+):
+    row = await db.get(CalendarDay, day)
+    if row is None or row.holiday_name is None:
+        raise HTTPException(status_code=404, detail="No holiday on this day")
+    row.is_working_day = day.weekday() < 5
+    row.holiday_name = None
+    await db.flush()
+
+    audit.record(
+        db,
+        user_id=admin.id, action="CLEAR_HOLIDAY", resource_type="calendar",
+        resource_id=str(day),
+    )
+    await compliance_state.rebuild(db)
+    await db.commit()
+    business_calendar.invalidate()
+    return CalendarDayOut(day=day, is_working_day=row.is_working_day)
+
+
+# ─── Department Exceptions ───────────────────────────────────────────
+
+@router.get("/exceptions", response_model=List[CalendarExceptionOut])
+async def list_calendar_exceptions(
+    department: Optional[str] = None,
+    start: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = select(CalendarException)
+    if department:
+        query = query.where(CalendarException.department == department)
+    if start:
+        query = query.where(CalendarException.day >= start)
+    result = await db.execute(query.order_by(CalendarException.day, CalendarException.department))
+    return [CalendarExceptionOut.model_validate(e) for e in result.scalars().all()]
+
+
+@router.put("/exceptions", response_model=CalendarExceptionOut)
+async def set_calendar_exception(
+    body: CalendarExceptionSet,
+    db: AsyncSession = Depends(get_db),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+):
+    result = await db.execute(
+        select(CalendarException).where(
+            and_(CalendarException.department == body.department, CalendarException.day == body.day)
+        )
+    )
+    exception = result.scalar_one_or_none()
+    if exception is None:
+        exception = CalendarException(department=body.department, day=body.day, created_by=admin.id)
+        db.add(exception)
+    exception.is_working_day = body.is_working_day
+    exception.description = body.description
+    await db.flush()
+
+    audit.record(
+        db,
+        user_id=admin.id, action="SET_CALENDAR_EXCEPTION", resource_type="calendar",
+        resource_id=str(exception.id),
+        details={"department": body.department, "day": str(body.day), "is_working_day": body.is_working_day},
+    )
+    await compliance_state.rebuild(db)
+    await db.commit()
+    business_calendar.invalidate()
+    return CalendarExceptionOut.model_validate(exception)
+
+
+@router.delete("/exceptions/{exception_id}", status_code=204)
+async def delete_calendar_exception(
+    exception_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+):
+    exception = await db.get(CalendarException, exception_id)
+    if exception is None:
+        raise HTTPException(status_code=404, detail="Calendar exception not found")
+    await db.delete(exception)
+    await db.flush()
+
+    audit.record(
+        db,
+        user_id=admin.id, action="DELETE_CALENDAR_EXCEPTION", resource_type="calendar",
+        resource_id=str(exception_id),
+        details={"department": exception.department, "day": str(exception.day)},
+    )
+    await compliance_state.rebuild(db)
+    await db.commit()
+    business_calendar.invalidate()
+    return Response(status_code=204)
@@ -1,17 +1,19 @@
 """
 Disciplinary Automation & Payroll API routes.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
-from datetime import datetime, timezone, date, timedelta
+from sqlalchemy import select, and_
+from datetime import datetime, timezone, date
 from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
-from app.models.asal import DailyLog, WeeklyPlan, WeeklyReport, PlanStatus, ReportStatus
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.core import policy
+from app.models.user import User, UserRole
+from app.models.compliance import ComplianceState
 from app.models.disciplinary import (
     DisciplinaryRecord, PayrollRecord,
     QueryType, DisciplinaryStatus, PayrollStatus,
@@ -20,6 +22,7 @@ from app.schemas.disciplinary import (
     DisciplinaryRecordOut, DisciplinaryAppeal, DisciplinaryAcknowledge,
     ManagementConfirmation, PayrollCalculateRequest, PayrollOut,
 )
+from app.services import audit, compliance, compliance_state
 
 router = APIRouter(prefix="/disciplinary", tags=["Disciplinary & Payroll"])
 
@@ -29,69 +32,35 @@ router = APIRouter(prefix="/disciplinary", tags=["Disciplinary & Payroll"])
 @router.post("/auto-check-daily-logs")
 async def run_daily_log_compliance_check(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     """
     Scans all active users for 2+ consecutive missed daily logs.
     Auto-generates query records.
     """
-    users_result = await db.execute(select(User).where(User.is_active == True))
-    users = users_result.scalars().all()
     today = date.today()
     generated = []
 
-    for u in users:
-        logs_result = await db.execute(
-            select(DailyLog.log_date).where(
-                and_(
-                    DailyLog.user_id == u.id,
-                    DailyLog.log_date >= today - timedelta(days=7),
-                )
-            )
+    for streak in await compliance.missed_daily_log_streaks(db, today):
+        consecutive = streak.consecutive_missed
+        record_id = f"QRY-{uuid4().hex[:8].upper()}"
+        record = DisciplinaryRecord(
+            record_id=record_id,
+            user_id=streak.user_id,
+            query_type=QueryType.MISSED_DAILY_LOG,
+            description=f"{consecutive} consecutive missed daily logs detected.",
+            auto_generated=True,
+            trigger_data={"consecutive_missed": consecutive, "check_date": str(today)},
+            consecutive_count=consecutive,
         )
-        logged_dates = {row[0] for row in logs_result.all()}
-
-        consecutive = 0
-        for i in range(7):
-            check_date = today - timedelta(days=i)
-            if check_date.weekday() >= 5:
-                continue
-            if check_date not in logged_dates:
-                consecutive += 1
-            else:
-                break
+        db.add(record)
+        generated.append({"user": streak.full_name, "record_id": record_id, "missed": consecutive})
 
-        if consecutive >= 2:
-            record_id = f"QRY-{uuid4().hex[:8].upper()}"
-            record = DisciplinaryRecord(
-                record_id=record_id,
-                user_id=u.id,
-                query_type=QueryType.MISSED_DAILY_LOG,
-                description=f"{consecutive} consecutive missed daily logs detected.",
-                auto_generated=True,
-                trigger_data={"consecutive_missed": consecutive, "check_date": str(today)},
-                consecutive_count=consecutive,
-            )
-            db.add(record)
-            generated.append({"user": u.full_name, "record_id": record_id, "missed": consecutive})
-
-            # Check monthly query count for privilege lock
-            month_start = today.replace(day=1)
-            monthly_count_result = await db.execute(
-                select(func.count()).select_from(DisciplinaryRecord).where(
-                    and_(
-                        DisciplinaryRecord.user_id == u.id,
-                        DisciplinaryRecord.created_at >= datetime(month_start.year, month_start.month, month_start.day,
-                                                                   tzinfo=timezone.utc),
-                    )
-                )
-            )
-            monthly_count = monthly_count_result.scalar() or 0
-
-            if monthly_count >= 3:
-                record.privileges_locked = True
-                record.locked_privileges = ["sensitive_data_access", "financial_operations"]
-                record.requires_management_confirmation = True
+        # Privilege lock from the 3rd query this month, counting this one
+        if streak.queries_this_month + 1 >= 3:
+            record.privileges_locked = True
+            record.locked_privileges = ["sensitive_data_access", "financial_operations"]
+            record.requires_management_confirmation = True
 
     return {"generated_queries": len(generated), "details": generated}
 
@@ -101,7 +70,7 @@ async def run_daily_log_compliance_check(
 @router.post("/auto-check-weekly-compliance")
 async def run_weekly_compliance_check(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     """
     Check for missed/late weekly plans and reports.
@@ -110,35 +79,18 @@ async def run_weekly_compliance_check(
       2nd occurrence → 20%
       3rd consecutive → flag for termination review
     """
-    users_result = await db.execute(select(User).where(User.is_active == True))
-    users = users_result.scalars().all()
+    # Bring the rolling 90-day counts up to today, then read them per user
+    await compliance_state.roll_forward(db)
+    rows = (await db.execute(
+        select(User, ComplianceState)
+        .join(ComplianceState, ComplianceState.user_id == User.id)
+        .where(User.is_active == True)
+    )).all()
     results = []
 
-    for u in users:
-        # Count missed weekly plans in last 3 months
-        three_months_ago = date.today() - timedelta(days=90)
-        missed_plans = await db.execute(
-            select(func.count()).select_from(WeeklyPlan).where(
-                and_(
-                    WeeklyPlan.user_id == u.id,
-                    WeeklyPlan.status.in_([PlanStatus.LATE, PlanStatus.MISSED]),
-                    WeeklyPlan.week_start_date >= three_months_ago,
-                )
-            )
-        )
-        missed_count = missed_plans.scalar() or 0
-
-        missed_reports = await db.execute(
-            select(func.count()).select_from(WeeklyReport).where(
-                and_(
-                    WeeklyReport.user_id == u.id,
-                    WeeklyReport.status.in_([ReportStatus.LATE, ReportStatus.MISSED]),
-                    WeeklyReport.week_start_date >= three_months_ago,
-                )
-            )
-        )
-        missed_report_count = missed_reports.scalar() or 0
-
+    for u, state in rows:
+        missed_count = state.late_plans_90d
+        missed_report_count = state.late_reports_90d
         total_violations = missed_count + missed_report_count
 
         if total_violations > 0:
@@ -178,29 +130,29 @@ async def run_weekly_compliance_check(
                 "termination_flag": total_violations >= 3,
             })
 
-    return {"checked_users": len(users), "violations_found": len(results), "details": results}
+    return {"checked_users": len(rows), "violations_found": len(results), "details": results}
 
 
 # ─── Disciplinary Records CRUD ────────────────────────────────────────
 
 @router.get("/records", response_model=List[DisciplinaryRecordOut])
 async def list_disciplinary_records(
+    response: Response,
     user_id: Optional[UUID] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(DisciplinaryRecord)
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(DisciplinaryRecord.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(DisciplinaryRecord), DisciplinaryRecord, current_user)
+    if user_id and policy.visibility(DisciplinaryRecord, current_user.role) is policy.Visibility.ALL:
         query = query.where(DisciplinaryRecord.user_id == user_id)
 
-    result = await db.execute(
-        query.order_by(DisciplinaryRecord.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (DisciplinaryRecord.created_at, DisciplinaryRecord.id),
+        response, cursor, page, page_size,
     )
-    return [DisciplinaryRecordOut.model_validate(r) for r in result.scalars().all()]
+    return [DisciplinaryRecordOut.model_validate(r) for r in rows]
 
 
 @router.post("/records/{record_id}/acknowledge")
@@ -221,10 +173,11 @@ async def acknowledge_disciplinary(
     record.acknowledged_at = datetime.now(timezone.utc)
     record.digital_signature = body.digital_signature
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="ACKNOWLEDGE_DISCIPLINARY", resource_type="disciplinary",
         resource_id=str(record_id), details={"signature": body.digital_signature},
-    ))
+    )
 
     return {"message": "Acknowledged", "record_id": record.record_id}
 
@@ -248,10 +201,11 @@ async def appeal_disciplinary(
     record.appeal_text = body.appeal_text
     record.appeal_date = datetime.now(timezone.utc)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="APPEAL_DISCIPLINARY", resource_type="disciplinary",
         resource_id=str(record_id), details={},
-    ))
+    )
 
     return {"message": "Appeal submitted", "record_id": record.record_id}
 
@@ -261,7 +215,7 @@ async def management_confirm(
     record_id: UUID,
     body: ManagementConfirmation,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     result = await db.execute(select(DisciplinaryRecord).where(DisciplinaryRecord.id == record_id))
     record = result.scalar_one_or_none()
@@ -277,11 +231,12 @@ async def management_confirm(
     else:
         record.status = DisciplinaryStatus.RESOLVED
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="MANAGEMENT_CONFIRM_DISCIPLINARY", resource_type="disciplinary",
         resource_id=str(record_id),
         details={"confirmed": body.confirmed, "notes": body.notes},
-    ))
+    )
 
     return {"message": "Management decision recorded", "confirmed": body.confirmed}
 
@@ -292,7 +247,7 @@ async def management_confirm(
 async def calculate_payroll(
     body: PayrollCalculateRequest,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     # Fetch compliance deductions from disciplinary records
     month_start = date(body.year, body.month, 1)
@@ -357,29 +312,29 @@ async def calculate_payroll(
     for r in disc_records:
         r.deduction_applied = True
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="CALCULATE_PAYROLL", resource_type="payroll",
         resource_id=str(payroll.id),
         details={"payroll_id": payroll_id, "net_pay": net_pay, "deduction_pct": max_deduction_pct},
-    ))
+    )
 
     return PayrollOut.model_validate(payroll)
 
 
 @router.get("/payroll", response_model=List[PayrollOut])
 async def list_payroll(
+    response: Response,
     user_id: Optional[UUID] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(PayrollRecord)
-
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(PayrollRecord.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(PayrollRecord), PayrollRecord, current_user)
+    if user_id and policy.visibility(PayrollRecord, current_user.role) is policy.Visibility.ALL:
         query = query.where(PayrollRecord.user_id == user_id)
 
     if month:
@@ -387,17 +342,18 @@ async def list_payroll(
     if year:
         query = query.where(PayrollRecord.year == year)
 
-    result = await db.execute(
-        query.order_by(PayrollRecord.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (PayrollRecord.created_at, PayrollRecord.id),
+        response, cursor, page, page_size,
     )
-    return [PayrollOut.model_validate(p) for p in result.scalars().all()]
+    return [PayrollOut.model_validate(p) for p in rows]
 
 
 @router.post("/payroll/{payroll_id}/approve")
 async def approve_payroll(
     payroll_id: UUID,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN])),
 ):
     result = await db.execute(select(PayrollRecord).where(PayrollRecord.id == payroll_id))
     payroll = result.scalar_one_or_none()
@@ -408,9 +364,10 @@ async def approve_payroll(
     payroll.approved_by = admin.id
     payroll.approved_at = datetime.now(timezone.utc)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="APPROVE_PAYROLL", resource_type="payroll",
         resource_id=str(payroll_id), details={"net_pay": payroll.net_pay},
-    ))
+    )
 
     return {"message": "Payroll approved", "payroll_id": payroll.payroll_id}
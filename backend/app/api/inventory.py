@@ -2,7 +2,7 @@
 Inventory & Production Management API routes.
 Handles: Raw Materials, Production Logs, Finished Goods, Dual-Auth Transfers.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
@@ -10,12 +10,15 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.models.user import User, UserRole
 from app.models.inventory import (
     RawMaterial, ProductionLog, ProductionRawMaterial,
     FinishedGood, InventoryTransfer, TransferStatus, SyncStatus,
 )
+from app.services import idempotency
+from app.services import audit
 from app.schemas.inventory import (
     RawMaterialCreate, RawMaterialUpdate, RawMaterialOut,
     ProductionLogCreate, ProductionLogOut,
@@ -32,33 +35,36 @@ router = APIRouter(prefix="/inventory", tags=["Inventory & Production"])
 async def create_raw_material(
     body: RawMaterialCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
 ):
     material = RawMaterial(**body.model_dump())
     db.add(material)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_RAW_MATERIAL", resource_type="raw_material",
         resource_id=str(material.id), details={"item_id": body.item_id, "qty": body.quantity},
-    ))
+    )
 
     return RawMaterialOut.model_validate(material)
 
 
 @router.get("/raw-materials", response_model=List[RawMaterialOut])
 async def list_raw_materials(
+    response: Response,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
-    result = await db.execute(
-        select(RawMaterial).order_by(RawMaterial.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(RawMaterial), (RawMaterial.created_at, RawMaterial.id),
+        response, cursor, page, page_size,
     )
-    return [RawMaterialOut.model_validate(m) for m in result.scalars().all()]
+    return [RawMaterialOut.model_validate(m) for m in rows]
 
 
 @router.get("/raw-materials/{material_id}", response_model=RawMaterialOut)
@@ -79,7 +85,7 @@ async def update_raw_material(
     material_id: UUID,
     body: RawMaterialUpdate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
 ):
     result = await db.execute(select(RawMaterial).where(RawMaterial.id == material_id))
     material = result.scalar_one_or_none()
@@ -90,10 +96,11 @@ async def update_raw_material(
         setattr(material, field, value)
     material.version += 1
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="UPDATE_RAW_MATERIAL", resource_type="raw_material",
         resource_id=str(material_id), details=body.model_dump(exclude_unset=True),
-    ))
+    )
 
     return RawMaterialOut.model_validate(material)
 
@@ -104,7 +111,7 @@ async def update_raw_material(
 async def create_production_log(
     body: ProductionLogCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
 ):
     # Calculate wastage percentage
     total_input = sum(rm.quantity_used for rm in body.raw_materials_used)
@@ -150,28 +157,31 @@ async def create_production_log(
         )
         db.add(junction)
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_PRODUCTION_LOG", resource_type="production_log",
         resource_id=str(production.id),
         details={"production_id": body.production_id, "output": body.output_quantity},
-    ))
+    )
 
     return ProductionLogOut.model_validate(production)
 
 
 @router.get("/production-logs", response_model=List[ProductionLogOut])
 async def list_production_logs(
+    response: Response,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
-    result = await db.execute(
-        select(ProductionLog).order_by(ProductionLog.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(ProductionLog), (ProductionLog.created_at, ProductionLog.id),
+        response, cursor, page, page_size,
     )
-    return [ProductionLogOut.model_validate(p) for p in result.scalars().all()]
+    return [ProductionLogOut.model_validate(p) for p in rows]
 
 
 # ─── Finished Goods ──────────────────────────────────────────────────
@@ -180,7 +190,7 @@ async def list_production_logs(
 async def create_finished_good(
     body: FinishedGoodCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
 ):
     fg = FinishedGood(
         **body.model_dump(),
@@ -189,25 +199,28 @@ async def create_finished_good(
     db.add(fg)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_FINISHED_GOOD", resource_type="finished_good",
         resource_id=str(fg.id), details={"product_id": body.product_id, "qty": body.quantity},
-    ))
+    )
 
     return FinishedGoodOut.model_validate(fg)
 
 
 @router.get("/finished-goods", response_model=List[FinishedGoodOut])
 async def list_finished_goods(
+    response: Response,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(FinishedGood).order_by(FinishedGood.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(FinishedGood), (FinishedGood.created_at, FinishedGood.id),
+        response, cursor, page, page_size,
     )
-    return [FinishedGoodOut.model_validate(fg) for fg in result.scalars().all()]
+    return [FinishedGoodOut.model_validate(fg) for fg in rows]
 
 
 # ─── Dual-Auth Inventory Transfer ────────────────────────────────────
@@ -215,10 +228,15 @@ async def list_finished_goods(
 @router.post("/transfers", response_model=TransferOut, status_code=201)
 async def initiate_transfer(
     body: TransferInitiate,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
 ):
     """Sales Manager initiates digital requisition for stock transfer."""
+    replayed = await idempotency.replay(db, user.id, "initiate_transfer", idempotency_key, body)
+    if replayed:
+        return replayed
+
     # Verify finished good exists and has sufficient stock
     result = await db.execute(select(FinishedGood).where(FinishedGood.id == body.finished_good_id))
     fg = result.scalar_one_or_none()
@@ -243,13 +261,16 @@ async def initiate_transfer(
     db.add(transfer)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="INITIATE_TRANSFER", resource_type="inventory_transfer",
         resource_id=str(transfer.id),
         details={"transfer_id": transfer_id, "qty": body.quantity, "product": str(body.finished_good_id)},
-    ))
+    )
 
-    return TransferOut.model_validate(transfer)
+    response = TransferOut.model_validate(transfer)
+    await idempotency.remember(db, user.id, "initiate_transfer", idempotency_key, body, response, status_code=201)
+    return response
 
 
 @router.put("/transfers/{transfer_id}/approve", response_model=TransferOut)
@@ -257,7 +278,7 @@ async def approve_transfer(
     transfer_id: UUID,
     body: TransferApproval,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN])),
 ):
     """Factory Supervisor approves or rejects the transfer. Dual authentication enforced."""
     result = await db.execute(select(InventoryTransfer).where(InventoryTransfer.id == transfer_id))
@@ -292,31 +313,34 @@ async def approve_transfer(
 
     transfer.version += 1
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id,
         action="APPROVE_TRANSFER" if body.approved else "REJECT_TRANSFER",
         resource_type="inventory_transfer",
         resource_id=str(transfer.id),
         details={"approved": body.approved, "qty": transfer.quantity},
-    ))
+    )
 
     return TransferOut.model_validate(transfer)
 
 
 @router.get("/transfers", response_model=List[TransferOut])
 async def list_transfers(
+    response: Response,
     status_filter: Optional[TransferStatus] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.FACTORY_SUPERVISOR, UserRole.SALES_MANAGER, UserRole.ADMIN
     ])),
 ):
     query = select(InventoryTransfer)
     if status_filter:
         query = query.where(InventoryTransfer.status == status_filter)
-    result = await db.execute(
-        query.order_by(InventoryTransfer.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (InventoryTransfer.created_at, InventoryTransfer.id),
+        response, cursor, page, page_size,
     )
-    return [TransferOut.model_validate(t) for t in result.scalars().all()]
+    return [TransferOut.model_validate(t) for t in rows]
@@ -1,7 +1,7 @@
 """
 KPI & Management Dashboard API routes.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from datetime import datetime, timezone, date
@@ -9,8 +9,10 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.core import policy
+from app.models.user import User, UserRole
 from app.models.kpi import KPIRecord, DepartmentTarget
 from app.models.sales import Order
 from app.models.inventory import FinishedGood, RawMaterial
@@ -20,6 +22,7 @@ from app.schemas.kpi import (
     DepartmentTargetCreate, DepartmentTargetOut,
     MonthlyDashboard,
 )
+from app.services import audit
 
 router = APIRouter(prefix="/kpi", tags=["KPI & Dashboard"])
 
@@ -30,7 +33,7 @@ router = APIRouter(prefix="/kpi", tags=["KPI & Dashboard"])
 async def create_kpi_record(
     body: KPIRecordCreate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     # Fetch user for role
     user_result = await db.execute(select(User).where(User.id == body.user_id))
@@ -70,38 +73,40 @@ async def create_kpi_record(
     db.add(kpi)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=admin.id, action="CREATE_KPI_RECORD", resource_type="kpi",
         resource_id=str(kpi.id),
         details={"user_id": str(body.user_id), "score": performance_score},
-    ))
+    )
 
     return KPIRecordOut.model_validate(kpi)
 
 
 @router.get("/records", response_model=List[KPIRecordOut])
 async def list_kpi_records(
+    response: Response,
     user_id: Optional[UUID] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = select(KPIRecord)
-    if current_user.role not in (UserRole.ADMIN, UserRole.HR_MANAGEMENT):
-        query = query.where(KPIRecord.user_id == current_user.id)
-    elif user_id:
+    query = policy.scoped(select(KPIRecord), KPIRecord, current_user)
+    if user_id and policy.visibility(KPIRecord, current_user.role) is policy.Visibility.ALL:
         query = query.where(KPIRecord.user_id == user_id)
     if month:
         query = query.where(KPIRecord.month == month)
     if year:
         query = query.where(KPIRecord.year == year)
 
-    result = await db.execute(
-        query.order_by(KPIRecord.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (KPIRecord.created_at, KPIRecord.id),
+        response, cursor, page, page_size,
     )
-    return [KPIRecordOut.model_validate(k) for k in result.scalars().all()]
+    return [KPIRecordOut.model_validate(k) for k in rows]
 
 
 # ─── Department Targets ──────────────────────────────────────────────
@@ -110,7 +115,7 @@ async def list_kpi_records(
 async def create_department_target(
     body: DepartmentTargetCreate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     target = DepartmentTarget(**body.model_dump())
     db.add(target)
@@ -122,7 +127,7 @@ async def create_department_target(
 async def list_department_targets(
     month: Optional[int] = None, year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    user: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     query = select(DepartmentTarget)
     if month:
@@ -139,7 +144,7 @@ async def list_department_targets(
 async def get_monthly_dashboard(
     month: int, year: int,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
+    admin: Caller = Depends(require_roles([UserRole.ADMIN, UserRole.HR_MANAGEMENT])),
 ):
     """
     Auto-generates monthly management dashboard (First Thursday):
@@ -1,7 +1,7 @@
 """
 Marketing & Customer Care API routes.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
@@ -9,13 +9,15 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.models.user import User, UserRole
 from app.models.marketing import MarketingCampaign, CustomerFeedback, ComplaintStatus
 from app.schemas.marketing import (
     CampaignCreate, CampaignUpdate, CampaignOut,
     FeedbackCreate, FeedbackUpdate, FeedbackOut,
 )
+from app.services import audit
 
 router = APIRouter(prefix="/marketing", tags=["Marketing & Customer Care"])
 
@@ -26,7 +28,7 @@ router = APIRouter(prefix="/marketing", tags=["Marketing & Customer Care"])
 async def create_campaign(
     body: CampaignCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.MARKETER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.MARKETER, UserRole.ADMIN])),
 ):
     campaign = MarketingCampaign(
         **body.model_dump(),
@@ -35,27 +37,30 @@ async def create_campaign(
     db.add(campaign)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_CAMPAIGN", resource_type="campaign",
         resource_id=str(campaign.id), details={"campaign_id": body.campaign_id},
-    ))
+    )
 
     return CampaignOut.model_validate(campaign)
 
 
 @router.get("/campaigns", response_model=List[CampaignOut])
 async def list_campaigns(
+    response: Response,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.MARKETER, UserRole.ADMIN, UserRole.HR_MANAGEMENT, UserRole.SALES_MANAGER
     ])),
 ):
-    result = await db.execute(
-        select(MarketingCampaign).order_by(MarketingCampaign.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(MarketingCampaign), (MarketingCampaign.created_at, MarketingCampaign.id),
+        response, cursor, page, page_size,
     )
-    return [CampaignOut.model_validate(c) for c in result.scalars().all()]
+    return [CampaignOut.model_validate(c) for c in rows]
 
 
 @router.put("/campaigns/{campaign_id}", response_model=CampaignOut)
@@ -63,7 +68,7 @@ async def update_campaign(
     campaign_id: UUID,
     body: CampaignUpdate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.MARKETER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.MARKETER, UserRole.ADMIN])),
 ):
     result = await db.execute(select(MarketingCampaign).where(MarketingCampaign.id == campaign_id))
     campaign = result.scalar_one_or_none()
@@ -87,7 +92,7 @@ async def update_campaign(
 async def create_feedback(
     body: FeedbackCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
 ):
     ticket_id = f"TKT-{uuid4().hex[:8].upper()}"
     feedback = CustomerFeedback(
@@ -102,31 +107,34 @@ async def create_feedback(
     db.add(feedback)
     await db.flush()
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_FEEDBACK", resource_type="feedback",
         resource_id=str(feedback.id), details={"ticket_id": ticket_id},
-    ))
+    )
 
     return FeedbackOut.model_validate(feedback)
 
 
 @router.get("/feedback", response_model=List[FeedbackOut])
 async def list_feedback(
+    response: Response,
     status_filter: Optional[ComplaintStatus] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.CUSTOMER_CARE, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
     query = select(CustomerFeedback)
     if status_filter:
         query = query.where(CustomerFeedback.status == status_filter)
-    result = await db.execute(
-        query.order_by(CustomerFeedback.created_at.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (CustomerFeedback.created_at, CustomerFeedback.id),
+        response, cursor, page, page_size,
     )
-    return [FeedbackOut.model_validate(f) for f in result.scalars().all()]
+    return [FeedbackOut.model_validate(f) for f in rows]
 
 
 @router.put("/feedback/{feedback_id}", response_model=FeedbackOut)
@@ -134,7 +142,7 @@ async def update_feedback(
     feedback_id: UUID,
     body: FeedbackUpdate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
 ):
     result = await db.execute(select(CustomerFeedback).where(CustomerFeedback.id == feedback_id))
     feedback = result.scalar_one_or_none()
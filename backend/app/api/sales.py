@@ -2,7 +2,7 @@
 Sales Management API routes.
 Handles: Customers, Orders, Sales Daily Logs.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
@@ -10,13 +10,16 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from app.core.database import get_db
-from app.core.deps import get_current_user, require_roles
-from app.models.user import User, UserRole, AuditLog
+from app.core.deps import get_current_user, require_roles, Caller
+from app.core import pagination
+from app.models.user import User, UserRole
 from app.models.sales import (
     CustomerCategory, Customer, Order, OrderItem, SalesDailyLog,
     OrderStatus, PaymentStatus,
 )
 from app.models.inventory import FinishedGood
+from app.services import idempotency
+from app.services import audit
 from app.schemas.sales import (
     CustomerCategoryCreate, CustomerCategoryOut,
     CustomerCreate, CustomerOut,
@@ -33,7 +36,7 @@ router = APIRouter(prefix="/sales", tags=["Sales Management"])
 async def create_customer_category(
     body: CustomerCategoryCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
 ):
     category = CustomerCategory(**body.model_dump())
     db.add(category)
@@ -56,7 +59,7 @@ async def list_customer_categories(
 async def create_customer(
     body: CustomerCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.CUSTOMER_CARE, UserRole.ADMIN])),
 ):
     customer = Customer(**body.model_dump())
     db.add(customer)
@@ -66,17 +69,19 @@ async def create_customer(
 
 @router.get("/customers", response_model=List[CustomerOut])
 async def list_customers(
+    response: Response,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.SALES_MANAGER, UserRole.CUSTOMER_CARE, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
-    result = await db.execute(
-        select(Customer).where(Customer.is_active == True)
-        .order_by(Customer.name).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(Customer).where(Customer.is_active == True), (Customer.name, Customer.id),
+        response, cursor, page, page_size, descending=False,
     )
-    return [CustomerOut.model_validate(c) for c in result.scalars().all()]
+    return [CustomerOut.model_validate(c) for c in rows]
 
 
 # ─── Orders ───────────────────────────────────────────────────────────
@@ -84,9 +89,15 @@ async def list_customers(
 @router.post("/orders", response_model=OrderOut, status_code=201)
 async def create_order(
     body: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
 ):
+    # A retried order must not decrement stock twice
+    replayed = await idempotency.replay(db, user.id, "create_order", idempotency_key, body)
+    if replayed:
+        return replayed
+
     tracking_id = f"ORD-{uuid4().hex[:8].upper()}"
 
     # Validate customer
@@ -145,31 +156,37 @@ async def create_order(
     customer.total_revenue += subtotal
     customer.credit_exposure += subtotal
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="CREATE_ORDER", resource_type="order",
         resource_id=str(order.id),
         details={"tracking_id": tracking_id, "total": subtotal, "items": len(body.items)},
-    ))
+    )
 
-    return OrderOut.model_validate(order)
+    response = OrderOut.model_validate(order)
+    await idempotency.remember(db, user.id, "create_order", idempotency_key, body, response, status_code=201)
+    return response
 
 
 @router.get("/orders", response_model=List[OrderOut])
 async def list_orders(
+    response: Response,
     status_filter: Optional[OrderStatus] = None,
     page: int = 1, page_size: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.SALES_MANAGER, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
     query = select(Order)
     if status_filter:
         query = query.where(Order.status == status_filter)
-    result = await db.execute(
-        query.order_by(Order.created_at.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, query, (Order.created_at, Order.id),
+        response, cursor, page, page_size,
     )
-    return [OrderOut.model_validate(o) for o in result.scalars().all()]
+    return [OrderOut.model_validate(o) for o in rows]
 
 
 @router.put("/orders/{order_id}", response_model=OrderOut)
@@ -177,7 +194,7 @@ async def update_order_status(
     order_id: UUID,
     body: OrderStatusUpdate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
 ):
     result = await db.execute(select(Order).where(Order.id == order_id))
     order = result.scalar_one_or_none()
@@ -195,10 +212,11 @@ async def update_order_status(
             order.payment_status = PaymentStatus.PAID
     order.version += 1
 
-    db.add(AuditLog(
+    audit.record(
+        db,
         user_id=user.id, action="UPDATE_ORDER", resource_type="order",
         resource_id=str(order_id), details=body.model_dump(exclude_unset=True),
-    ))
+    )
 
     return OrderOut.model_validate(order)
 
@@ -209,7 +227,7 @@ async def update_order_status(
 async def create_sales_daily_log(
     body: SalesDailyLogCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
+    user: Caller = Depends(require_roles([UserRole.SALES_MANAGER, UserRole.ADMIN])),
 ):
     log = SalesDailyLog(
         sales_manager_id=user.id,
@@ -222,14 +240,16 @@ async def create_sales_daily_log(
 
 @router.get("/daily-logs", response_model=List[SalesDailyLogOut])
 async def list_sales_daily_logs(
+    response: Response,
     page: int = 1, page_size: int = 30,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(require_roles([
+    user: Caller = Depends(require_roles([
         UserRole.SALES_MANAGER, UserRole.ADMIN, UserRole.HR_MANAGEMENT
     ])),
 ):
-    result = await db.execute(
-        select(SalesDailyLog).order_by(SalesDailyLog.log_date.desc())
-        .offset((page - 1) * page_size).limit(page_size)
+    rows = await pagination.paginate(
+        db, select(SalesDailyLog), (SalesDailyLog.log_date, SalesDailyLog.id),
+        response, cursor, page, page_size,
     )
-    return [SalesDailyLogOut.model_validate(log) for log in result.scalars().all()]
+    return [SalesDailyLogOut.model_validate(log) for log in rows]
@@ -1,38 +1,59 @@
 """
 Sync Engine API routes — Push/Pull/Conflict resolution.
 """
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Header
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.database import get_db, AsyncSessionLocal, IS_SERVERLESS, POOL_CAPACITY
+from app.core.deps import get_current_user, get_current_active_admin
 from app.models.user import User
 from app.models.sync import SyncEvent, SyncConflict, DeviceRegistration, ConflictResolution
 from app.schemas.kpi import SyncStatusPayload
+from app.schemas.sync import SyncSessionRequest, ReconcileRequest
+from app.services.sync_changes import SYNC_MODELS, change_window, fetch_changes, requires_reset, stream_changes
+from app.services.sync_push import apply_push
+from app.services.sync_reconcile import range_summary, validate_prefix
+from app.services.sync_compaction import compact_change_log
+from app.services.sync_snapshots import build_snapshots, read_snapshot_meta, snapshot_path
+from app.services import idempotency
+from app.services.device_activity import device_activity
+from app.services.change_feed import change_feed
 
 router = APIRouter(prefix="/sync", tags=["Sync Engine"])
 
 # Table name → Model mapping for dynamic sync
-SYNCABLE_TABLES = [
-    "daily_logs", "weekly_plans", "weekly_reports",
-    "inventory", "transfers", "orders",
-    "payroll", "disciplinary_actions",
-]
+SYNCABLE_TABLES = SYNC_MODELS
+
+# 409 detail for a cursor older than the newest purged tombstone
+CURSOR_EXPIRED_DETAIL = "Cursor predates purged deletions; re-bootstrap and pull from cursor 0"
+
+# Extra pooled connections /sync/session pulls may hold at once, across
+# all requests — a quarter of the pool, so concurrent sessions never starve
+# other requests. Below two there is nothing to gain over pulling on the
+# request's own connection.
+SESSION_PULL_CONNECTIONS = POOL_CAPACITY // 4
+_session_pulls = asyncio.Semaphore(SESSION_PULL_CONNECTIONS) if SESSION_PULL_CONNECTIONS > 1 else None
 
 
 @router.post("/push")
 async def push_records(
     payload: SyncStatusPayload,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """
     PUSH: Device → Cloud.
-    Receives pending records from the device, validates, and resolves conflicts.
+    Applies the whole batch with set-based upserts and returns a per-record
+    outcome (applied / stale / conflict / error). Only the rows and columns
+    the user's role may push are written (app.core.policy.push_rule).
     Conflict resolution:
       - Last write wins (non-financial)
       - Manual review required (financial & inventory data)
@@ -40,6 +61,10 @@ async def push_records(
     if payload.table_name not in SYNCABLE_TABLES:
         raise HTTPException(status_code=400, detail=f"Unknown table: {payload.table_name}")
 
+    replayed = await idempotency.replay(db, user.id, "sync_push", idempotency_key, payload)
+    if replayed:
+        return replayed
+
     # Create sync event
     sync_event = SyncEvent(
         device_id=payload.device_id,
@@ -52,40 +77,10 @@ async def push_records(
     db.add(sync_event)
     await db.flush()
 
-    synced = 0
-    conflicts = 0
-    errors = []
-
-    for record_data in payload.records:
-        try:
-            record_id = record_data.get("id")
-            client_version = record_data.get("version", 1)
-
-            # Check for version conflict (simplified — real implementation queries the specific table)
-            # For financial/inventory data, flag for manual review
-            is_financial = payload.table_name in ("orders", "transfers", "payroll", "inventory")
-
-            if is_financial and client_version > 1:
-                # Create conflict record for manual review
-                conflict = SyncConflict(
-                    sync_event_id=sync_event.id,
-                    table_name=payload.table_name,
-                    record_id=str(record_id),
-                    client_version=client_version,
-                    server_version=client_version,  # Would be fetched from DB
-                    client_data=record_data,
-                    server_data={},  # Would be fetched from DB
-                    is_financial=True,
-                    resolution=ConflictResolution.MANUAL_REVIEW,
-                )
-                db.add(conflict)
-                conflicts += 1
-            else:
-                # Last write wins for non-financial data
-                synced += 1
-
-        except Exception as e:
-            errors.append({"record_id": record_data.get("id"), "error": str(e)})
+    result = await apply_push(db, payload.table_name, payload.records, sync_event.id, user)
+    synced = result["records_synced"]
+    conflicts = result["conflicts"]
+    errors = result["errors"]
 
     sync_event.records_synced = synced
     sync_event.conflicts_detected = conflicts
@@ -93,37 +88,39 @@ async def push_records(
     sync_event.completed_at = datetime.now(timezone.utc)
     sync_event.success = len(errors) == 0
 
-    # Update device last sync
-    device = await db.execute(
-        select(DeviceRegistration).where(DeviceRegistration.device_id == payload.device_id)
-    )
-    device_reg = device.scalar_one_or_none()
-    if device_reg:
-        device_reg.last_sync_at = datetime.now(timezone.utc)
+    await device_activity.touch(db, payload.device_id)
 
-    return {
+    response = {
         "sync_event_id": str(sync_event.id),
         "records_synced": synced,
         "conflicts": conflicts,
         "errors": errors,
+        "results": result["outcomes"],
     }
+    await idempotency.remember(db, user.id, "sync_push", idempotency_key, payload, response)
+    return response
 
 
 @router.get("/pull")
 async def pull_records(
     table_name: str,
-    last_sync: Optional[datetime] = None,
+    cursor: int = Query(0, ge=0, description="next_cursor from the previous pull (0 = from scratch)"),
+    limit: int = Query(500, ge=1, le=5000),
     device_id: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """
     PULL: Cloud → Device.
-    Returns records modified since last sync.
-    Includes: new policies, query notices, target updates, auth approvals.
+    Returns only the records changed since the device's cursor that the
+    caller's role may see (app.core.policy), oldest first.
+    Store ``next_cursor`` and pass it back on the next pull; keep pulling
+    while ``has_more`` is true. Drop every id listed in ``deleted``.
     """
     if table_name not in SYNCABLE_TABLES:
         raise HTTPException(status_code=400, detail=f"Unknown table: {table_name}")
+    if await requires_reset(db, table_name, cursor):
+        raise HTTPException(status_code=409, detail=CURSOR_EXPIRED_DETAIL)
 
     # Create sync event
     sync_event = SyncEvent(
@@ -135,21 +132,255 @@ async def pull_records(
     db.add(sync_event)
     await db.flush()
 
-    # In a real implementation, this would query the specific table
-    # for records modified since last_sync timestamp
-    # and return them filtered by user's role permissions
+    records, deleted, next_cursor, has_more = await fetch_changes(db, table_name, cursor, limit, user)
 
+    sync_event.records_synced = len(records) + len(deleted)
     sync_event.completed_at = datetime.now(timezone.utc)
     sync_event.success = True
 
     return {
         "sync_event_id": str(sync_event.id),
         "table_name": table_name,
-        "records": [],  # Would contain actual records
+        "records": records,
+        "deleted": [str(record_id) for record_id in deleted],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
         "server_timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
 
+@router.get("/pull/stream")
+async def stream_pull_records(
+    request: Request,
+    table_name: str,
+    cursor: int = Query(0, ge=0),
+    device_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Streaming PULL for large first syncs.
+    Same delta as /pull but with no page limit, sent as NDJSON (gzipped when
+    the client accepts it) so neither side has to hold the full result.
+    """
+    if table_name not in SYNCABLE_TABLES:
+        raise HTTPException(status_code=400, detail=f"Unknown table: {table_name}")
+    if await requires_reset(db, table_name, cursor):
+        raise HTTPException(status_code=409, detail=CURSOR_EXPIRED_DETAIL)
+
+    sync_event = SyncEvent(
+        device_id=device_id or "unknown",
+        user_id=user.id,
+        direction="pull",
+        table_name=table_name,
+    )
+    db.add(sync_event)
+    await db.flush()
+    upper, _ = await change_window(db, table_name, cursor)
+    # Commit now — the stream runs on its own session and updates this event.
+    await db.commit()
+
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"Content-Encoding": "gzip"} if compress else {}
+    return StreamingResponse(
+        stream_changes(
+            table_name, cursor, upper, sync_event.id, sync_event.started_at, compress=compress, user=user,
+        ),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+@router.post("/session")
+async def sync_session(
+    payload: SyncSessionRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    One round-trip sync for any number of tables.
+    Pushes every pending batch (in order, in this request's transaction),
+    commits, then pulls each table's delta from its cursor — concurrently
+    on separate connections where the pool can spare them (pulls are
+    read-only), else one by one on this request's. Returns per-table
+    push outcomes, records and next cursors.
+    """
+    unknown = [name for name in payload.tables if name not in SYNCABLE_TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown table(s): {', '.join(unknown)}")
+
+    sync_event = SyncEvent(
+        device_id=payload.device_id,
+        user_id=user.id,
+        direction="session",
+        table_name="*",
+    )
+    db.add(sync_event)
+    await db.flush()
+
+    tables: Dict[str, Dict[str, Any]] = {}
+    synced = 0
+    conflicts = 0
+    errors = []
+    for table_name, table_req in payload.tables.items():
+        tables[table_name] = {}
+        if not table_req.records:
+            continue
+        result = await apply_push(db, table_name, table_req.records, sync_event.id, user)
+        tables[table_name]["push"] = {
+            "records_synced": result["records_synced"],
+            "conflicts": result["conflicts"],
+            "results": result["outcomes"],
+        }
+        synced += result["records_synced"]
+        conflicts += result["conflicts"]
+        errors.extend({"table_name": table_name, **e} for e in result["errors"])
+
+    await device_activity.touch(db, payload.device_id)
+    await db.commit()
+
+    async def pull(table_name: str, session: AsyncSession):
+        table_req = payload.tables[table_name]
+        if await requires_reset(session, table_name, table_req.cursor):
+            tables[table_name].update(records=[], deleted=[], reset_required=True,
+                                      next_cursor=0, has_more=True)
+            return 0
+        records, deleted, next_cursor, has_more = await fetch_changes(
+            session, table_name, table_req.cursor, table_req.limit, user
+        )
+        tables[table_name].update(
+            records=records,
+            deleted=[str(record_id) for record_id in deleted],
+            next_cursor=next_cursor,
+            has_more=has_more,
+        )
+        return len(records) + len(deleted)
+
+    if _session_pulls is None:
+        # Serverless, or a pool too small to spare connections
+        pulled = [await pull(name, db) for name in payload.tables]
+    else:
+        async def pull_isolated(table_name: str):
+            async with _session_pulls, AsyncSessionLocal() as session:
+                return await pull(table_name, session)
+
+        pulled = await asyncio.gather(*(pull_isolated(name) for name in payload.tables))
+
+    sync_event.records_synced = synced + sum(pulled)
+    sync_event.conflicts_detected = conflicts
+    sync_event.errors = errors
+    sync_event.completed_at = datetime.now(timezone.utc)
+    sync_event.success = len(errors) == 0
+
+    return {
+        "sync_event_id": str(sync_event.id),
+        "tables": tables,
+        "server_timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@router.post("/reconcile")
+async def reconcile(
+    payload: ReconcileRequest,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Integrity check: range checksums over (id, version) for a table.
+    Start with prefixes [""], compare each returned range hash with the
+    device's own, and send back only the prefixes that differ. Small
+    ranges come back as full rows — replace the local range with them.
+    """
+    if payload.table_name not in SYNCABLE_TABLES:
+        raise HTTPException(status_code=400, detail=f"Unknown table: {payload.table_name}")
+    try:
+        prefixes = [validate_prefix(prefix) for prefix in payload.prefixes]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "table_name": payload.table_name,
+        "ranges": [await range_summary(db, payload.table_name, prefix, user) for prefix in prefixes],
+        "server_timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@router.get("/bootstrap")
+async def download_bootstrap_snapshot(
+    user: User = Depends(get_current_user),
+):
+    """
+    First sync for a newly enrolled device: the pre-built gzipped NDJSON
+    snapshot for the caller's role. Load it, then /sync/pull each table it
+    lists from the snapshot's ``cursor`` (also sent as X-Snapshot-Cursor)
+    and every other table from 0.
+    """
+    meta = read_snapshot_meta(user.role)
+    path = snapshot_path(user.role)
+    if meta is None or not path.exists():
+        raise HTTPException(status_code=404, detail="No snapshot built yet; use /sync/pull/stream")
+    return FileResponse(
+        path,
+        media_type="application/gzip",
+        filename=path.name,
+        headers={
+            "X-Snapshot-Cursor": str(meta["cursor"]),
+            "X-Snapshot-Created-At": meta["created_at"],
+        },
+    )
+
+
+@router.post("/bootstrap/build")
+async def rebuild_bootstrap_snapshots(
+    admin: User = Depends(get_current_active_admin),
+):
+    """Rebuild every role's bootstrap snapshot now (admin only)."""
+    built = await build_snapshots()
+    return {
+        "snapshots": [
+            {key: meta[key] for key in ("role", "cursor", "created_at", "records", "size_bytes")}
+            for meta in built
+        ],
+    }
+
+
+@router.post("/compact")
+async def compact_sync_log(
+    admin: User = Depends(get_current_active_admin),
+):
+    """Run change-log compaction and tombstone retention now (admin only)."""
+    return {"tables": await compact_change_log()}
+
+
+@router.get("/events")
+async def change_events(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events: "table X changed, new cursor N" hints.
+    Keep this open instead of polling and pull a table only when told to.
+    """
+    if IS_SERVERLESS:
+        raise HTTPException(
+            status_code=503,
+            detail="Change notifications are not available in serverless mode; poll /sync/pull",
+        )
+    # Hand the auth lookup's pooled connection back for the life of the stream
+    await db.commit()
+    try:
+        subscription = await change_feed.subscribe()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Change notifications temporarily unavailable")
+
+    return StreamingResponse(
+        change_feed.event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Conflict Resolution ─────────────────────────────────────────────
 
 @router.get("/conflicts", response_model=List[Dict[str, Any]])
@@ -219,26 +450,39 @@ async def register_device(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    # Check if device already registered
-    existing = await db.execute(
-        select(DeviceRegistration).where(DeviceRegistration.device_id == device_id)
+    # Insert unless already registered — one statement either way
+    inserted = await db.execute(
+        pg_insert(DeviceRegistration)
+        .values(
+            device_id=device_id,
+            user_id=user.id,
+            device_name=device_name,
+            device_type=device_type,
+            os_info=os_info,
+            browser_info=browser_info,
+        )
+        .on_conflict_do_nothing(index_elements=[DeviceRegistration.device_id])
+        .returning(DeviceRegistration.id)
     )
-    device = existing.scalar_one_or_none()
-
-    if device:
-        device.last_sync_at = datetime.now(timezone.utc)
+    if inserted.scalar_one_or_none() is None:
+        await device_activity.touch(db, device_id)
         return {"message": "Device already registered", "device_id": device_id}
 
-    registration = DeviceRegistration(
-        device_id=device_id,
-        user_id=user.id,
-        device_name=device_name,
-        device_type=device_type,
-        os_info=os_info,
-        browser_info=browser_info,
-    )
-    db.add(registration)
-    return {"message": "Device registered", "device_id": device_id}
+    snapshot = read_snapshot_meta(user.role)
+    return {
+        "message": "Device registered",
+        "device_id": device_id,
+        # Fresh devices should load /sync/bootstrap before their first pull
+        "snapshot_cursor": snapshot["cursor"] if snapshot else None,
+    }
+
+
+def _last_sync(device: DeviceRegistration) -> Optional[datetime]:
+    # Include a sync not yet flushed by the device activity coalescer
+    pending = device_activity.pending(device.device_id)
+    if pending is None or (device.last_sync_at and device.last_sync_at >= pending):
+        return device.last_sync_at
+    return pending
 
 
 @router.get("/devices")
@@ -251,14 +495,14 @@ async def list_devices(
             and_(DeviceRegistration.user_id == user.id, DeviceRegistration.is_active == True)
         )
     )
-    devices = result.scalars().all()
-    return [
-        {
+    devices = []
+    for d in result.scalars().all():
+        last_sync = _last_sync(d)
+        devices.append({
             "device_id": d.device_id,
             "device_name": d.device_name,
             "device_type": d.device_type,
-            "last_sync_at": d.last_sync_at.isoformat() if d.last_sync_at else None,
+            "last_sync_at": last_sync.isoformat() if last_sync else None,
             "registered_at": d.registered_at.isoformat(),
-        }
-        for d in devices
-    ]
+        })
+    return devices
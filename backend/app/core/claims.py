@@ -0,0 +1,158 @@
+"""
+Stateless authorization from access-token claims (opt-in: STATELESS_AUTH).
+
+Access tokens carry the caller's role, ``tv`` — the users.token_version
+they were issued under — and ``perm``, a digest of the role, permission
+overrides and disciplinary locks. With STATELESS_AUTH on, require_roles
+authorizes from the claims alone, without a database round-trip, when
+  - ``perm`` is the digest of the bare role, i.e. no overrides or locks
+    that the claims cannot express, and
+  - the revocation set does not hold a newer token_version for the user.
+Anything else (older tokens without these claims included) goes through
+get_current_user as before.
+
+token_version is bumped by any flush that changes a user's role,
+permission overrides, active flag or password, or a disciplinary
+privilege lock on them. The revocation set — recently updated users with
+a bumped version or deactivated — is re-read at most every
+REVOCATION_REFRESH_SECONDS, which bounds how long a revoked token keeps
+working on the fast path.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import principals
+from app.core.config import get_settings
+from app.core.database import engine
+from app.models.user import User, UserRole
+
+settings = get_settings()
+
+# Changing any of these invalidates the user's outstanding tokens
+_REVOKING_COLUMNS = ("role", "permissions", "is_active", "hashed_password")
+
+
+def permission_digest(role: UserRole, permissions: Optional[Dict] = None, locked_privileges: Iterable[str] = ()) -> str:
+    raw = json.dumps([role.value, permissions or {}, sorted(locked_privileges)], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+async def token_claims(db: AsyncSession, user: User, device_id: Optional[str]) -> Dict[str, Any]:
+    """Claims for a new access/refresh token pair."""
+    locks = await principals.locked_privileges(db, user.id)
+    return {
+        "sub": str(user.id),
+        "role": user.role.value,
+        "device_id": device_id,
+        "tv": user.token_version,
+        "perm": permission_digest(user.role, user.permissions, locks),
+    }
+
+
+# ─── Revocation set ──────────────────────────────────────────────────
+
+class RevocationSet:
+    def __init__(self):
+        # user id -> current token_version; None when deactivated
+        self._versions: Dict[str, Optional[int]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < settings.REVOCATION_REFRESH_SECONDS
+
+    async def refresh(self) -> None:
+        # Tokens outlive neither their lifetime nor the update that revoked
+        # them by more than that, so older changes need not be kept
+        since = datetime.now(timezone.utc) - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        async with engine.connect() as conn:
+            rows = (await conn.execute(
+                select(User.id, User.token_version, User.is_active).where(
+                    User.updated_at >= since,
+                    or_(User.token_version > 1, User.is_active == False),
+                )
+            )).all()
+        self._versions = {str(user_id): (version if active else None) for user_id, version, active in rows}
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self) -> None:
+        if self._fresh():
+            return
+        async with self._lock:
+            if not self._fresh():
+                await self.refresh()
+
+    def is_revoked(self, user_id: str, token_version: int) -> bool:
+        if user_id not in self._versions:
+            return False
+        current = self._versions[user_id]
+        return current is None or token_version < current
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+
+revocations = RevocationSet()
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    The caller as the claims describe them — enough to authorize and to
+    attribute writes, nothing more. Handlers that need other User columns
+    depend on get_current_user instead.
+    """
+    id: uuid.UUID
+    role: UserRole
+    token_version: int
+    is_active: bool = True
+
+
+async def principal_from_claims(payload: Dict[str, Any]) -> Optional[TokenPrincipal]:
+    """The caller from the token alone, or None when the claims cannot authorize it."""
+    if payload.get("type") != "access" or "tv" not in payload or "perm" not in payload:
+        return None
+    try:
+        user_id = uuid.UUID(payload["sub"])
+        role = UserRole(payload["role"])
+        token_version = int(payload["tv"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if payload["perm"] != permission_digest(role):
+        return None
+    await revocations.ensure_fresh()
+    if revocations.is_revoked(str(user_id), token_version):
+        return None
+    return TokenPrincipal(id=user_id, role=role, token_version=token_version)
+
+
+# ─── token_version bumps ─────────────────────────────────────────────
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_user_change(session: Session, flush_context, instances) -> None:
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if any(attrs[key].history.has_changes() for key in _REVOKING_COLUMNS):
+                obj.token_version = (obj.token_version or 1) + 1
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_lock_change(session: Session, flush_context) -> None:
+    user_ids = principals.privilege_lock_changes(session)
+    if user_ids:
+        session.connection().execute(
+            update(User)
+            .where(User.id.in_([uuid.UUID(user_id) for user_id in user_ids]))
+            .values(token_version=User.token_version + 1)
+        )
@@ -44,6 +44,61 @@ class Settings(BaseSettings):
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
 
+    # Idempotency-Key replay window
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # Bootstrap snapshots for new devices (0 disables the background builder)
+    SNAPSHOT_DIR: str = str(_backend_dir / "snapshots")
+    SNAPSHOT_INTERVAL_MINUTES: int = 60
+
+    # Sync change-log compaction (0 disables the background job)
+    TOMBSTONE_RETENTION_DAYS: int = 90
+    SYNC_COMPACTION_INTERVAL_HOURS: int = 24
+
+    # Device last_sync_at write coalescing (0 writes through on every sync)
+    DEVICE_ACTIVITY_FLUSH_SECONDS: int = 5
+    DEVICE_ACTIVITY_MAX_PENDING: int = 10000
+
+    # Audit log writer: queue bound, rows per INSERT, max wait before a partial batch
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_MS: int = 200
+
+    # Monthly partitions of audit_logs / sync_events; retention 0 keeps forever.
+    # Expired partitions are exported to ARCHIVE_DIR, then dropped.
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_MAINTENANCE_INTERVAL_HOURS: int = 24
+    AUDIT_RETENTION_MONTHS: int = 24
+    SYNC_EVENT_RETENTION_MONTHS: int = 6
+    ARCHIVE_DIR: str = str(_backend_dir / "archive")
+    PARTITION_LOCK_TIMEOUT_MS: int = 5000
+
+    # Authenticated-principal cache (0 disables; entries are also evicted on change)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # bcrypt thread pool (0 workers = half the CPUs); callers past
+    # PASSWORD_HASH_MAX_WAITING queued get a 503
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_WAITING: int = 200
+
+    # require_roles authorizes from token claims alone (app.core.claims);
+    # revocations take up to REVOCATION_REFRESH_SECONDS to apply there
+    STATELESS_AUTH: bool = False
+    REVOCATION_REFRESH_SECONDS: int = 5
+
+    # /auth/dashboard-stats result cache (0 disables)
+    DASHBOARD_STATS_TTL_SECONDS: int = 30
+
+    # Business calendar: calendar_days precomputed through this many years
+    # ahead; in-process lookups refreshed at least this often
+    CALENDAR_YEARS_AHEAD: int = 1
+    CALENDAR_CACHE_SECONDS: int = 300
+
+    # Compliance state (app.services.compliance_state) is rolled forward to
+    # the current day this often; the roll-forward is idempotent
+    COMPLIANCE_ROLL_FORWARD_INTERVAL_MINUTES: int = 60
+
     # Redis (optional — set to empty string to disable)
     REDIS_URL: str = ""
 
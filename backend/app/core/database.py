@@ -25,6 +25,9 @@ _connect_args: dict = {}
 _is_cloud = any(host in _db_url for host in ["neon.tech", "supabase.com", ":6543/"])
 _is_serverless = os.environ.get("VERCEL", "").strip() == "1" or os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
 
+# Serverless: one short-lived connection per invocation, no background work
+IS_SERVERLESS = bool(_is_serverless)
+
 if _is_cloud:
     ssl_ctx = ssl.create_default_context()
     ssl_ctx.check_hostname = False
@@ -35,6 +38,12 @@ if _is_cloud:
     # Connection timeout — prevent serverless from hanging
     _connect_args["timeout"] = 10
 
+_pool_size = 5 if _is_cloud else 20
+_max_overflow = 2 if _is_cloud else 10
+
+# Most connections the pool hands out at once; 0 when unpooled (serverless)
+POOL_CAPACITY = 0 if _is_serverless else _pool_size + _max_overflow
+
 if _is_serverless:
     # Serverless: Use NullPool to avoid connection pool issues
     engine = create_async_engine(
@@ -47,8 +56,8 @@ else:
     engine = create_async_engine(
         _db_url,
         echo=False,
-        pool_size=5 if _is_cloud else 20,
-        max_overflow=2 if _is_cloud else 10,
+        pool_size=_pool_size,
+        max_overflow=_max_overflow,
         pool_pre_ping=True,
         connect_args=_connect_args,
     )
@@ -4,15 +4,21 @@ Dependency injection for FastAPI routes.
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from typing import List, Union
 
+from app.core import claims, principals
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.security import decode_token
 from app.models.user import User, UserRole
 
+settings = get_settings()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# What require_roles hands a route: only ``id`` and ``role`` are guaranteed
+Caller = Union[User, claims.TokenPrincipal]
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -25,8 +31,7 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload",
         )
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await principals.current_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,8 +46,22 @@ async def get_current_user(
 
 
 def require_roles(allowed_roles: List[UserRole]):
-    """Dependency factory to enforce role-based access."""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Dependency factory to enforce role-based access. With STATELESS_AUTH the
+    caller comes from the token's claims when they suffice (app.core.claims),
+    as a TokenPrincipal, so routes may rely on ``id`` and ``role`` only.
+    Routes that need the rest of the User depend on get_current_user and
+    check the role themselves.
+    """
+    async def role_checker(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_db),
+    ) -> Caller:
+        current_user = None
+        if settings.STATELESS_AUTH:
+            current_user = await claims.principal_from_claims(decode_token(token))
+        if current_user is None:
+            current_user = await get_current_user(token, db)
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
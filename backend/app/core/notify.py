@@ -0,0 +1,86 @@
+"""
+Postgres LISTEN/NOTIFY fan-out.
+One dedicated connection per worker LISTENs on every registered channel
+and hands payloads to in-process callbacks, so NOTIFYs sent by any worker
+reach all of them.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+from app.core.database import engine
+
+logger = logging.getLogger("uvicorn.error")
+
+# Seconds between liveness checks of the LISTEN connection
+WATCHDOG_INTERVAL = 5
+
+
+class NotificationHub:
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callable[[str], None]]] = {}
+        self._conn = None        # SQLAlchemy AsyncConnection held open for LISTEN
+        self._driver = None      # Underlying asyncpg connection
+        self._lock = asyncio.Lock()
+        self._watchdog: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._driver is not None and not self._driver.is_closed()
+
+    def on(self, channel: str, callback: Callable[[str], None]) -> None:
+        """Register a callback for a channel. Takes effect on the next (re)connect."""
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def _dispatch(self, connection, pid, channel, payload) -> None:
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception(f"NOTIFY handler for '{channel}' failed")
+
+    async def start(self) -> None:
+        """Open the LISTEN connection if it is not already up."""
+        async with self._lock:
+            if self.running:
+                return
+            await self._close()
+            self._conn = await engine.connect()
+            raw = await self._conn.get_raw_connection()
+            self._driver = raw.driver_connection
+            for channel in self._callbacks:
+                await self._driver.add_listener(channel, self._dispatch)
+            if self._watchdog is None:
+                self._watchdog = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            if not self.running:
+                try:
+                    await self.start()
+                except Exception as e:
+                    logger.warning(f"LISTEN reconnect failed: {e}")
+
+    async def _close(self) -> None:
+        if self.running:
+            # The connection goes back to the pool — don't leave it listening
+            for channel in self._callbacks:
+                await self._driver.remove_listener(channel, self._dispatch)
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._driver = None
+
+    async def stop(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        async with self._lock:
+            await self._close()
+
+
+notification_hub = NotificationHub()
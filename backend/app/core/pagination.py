@@ -0,0 +1,80 @@
+"""
+Keyset pagination for list endpoints.
+
+A page is ordered by a sort column plus ``id`` as tie-breaker; the cursor
+is the (sort value, id) of the last row served, so the next page is
+``WHERE (sort, id) < (:sort, :id)`` — one index range scan on the matching
+composite index however deep the page, and stable while rows are inserted.
+The cursor for the next page comes back in the X-Next-Cursor header
+(absent on the last page). ``page`` without ``cursor`` still works as an
+OFFSET fallback for older clients.
+"""
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[ColumnElement]) -> List[Any]:
+    """Cursor values coerced to the key columns' types; 400 if it does not fit."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError("wrong length")
+        values = []
+        for key, value in zip(keys, raw):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                values.append(date.fromisoformat(value))
+            elif python_type is uuid.UUID:
+                values.append(uuid.UUID(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError, NotImplementedError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    keys: Sequence[ColumnElement],
+    response: Response,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 50,
+    descending: bool = True,
+) -> List[Any]:
+    """
+    One page of ``query`` ordered by ``keys`` (sort column(s), then id).
+    Sets X-Next-Cursor when more rows follow.
+    """
+    page_size = max(1, page_size)
+    if cursor:
+        position = tuple_(*decode_cursor(cursor, keys))
+        query = query.where(tuple_(*keys) < position if descending else tuple_(*keys) > position)
+    elif page > 1:
+        query = query.offset((page - 1) * page_size)
+    query = query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+
+    rows = list((await db.execute(query.limit(page_size + 1))).scalars().all())
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, key.key) for key in keys])
+    return rows
@@ -0,0 +1,171 @@
+"""
+Row visibility policy — who may read which rows (and push which, from a
+device).
+
+One predicate per (role, model), built once at import time. Predicates that
+depend on the caller reference the ``current_user_id`` bind parameter, so
+the same statement shape (and SQLAlchemy's compiled-SQL cache entry) is
+shared by every user of a role; ``scoped()`` supplies the value.
+Used by the list endpoints and by every sync read path.
+
+``push_rule()`` is the write side for devices: which roles may push a
+synced table, which columns a pushed row may set, and whose rows they
+may touch.
+"""
+import enum
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import bindparam, false, true
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.models.asal import DailyLog, WeeklyPlan, WeeklyReport
+from app.models.disciplinary import DisciplinaryRecord, PayrollRecord
+from app.models.inventory import FinishedGood, InventoryTransfer
+from app.models.kpi import KPIRecord
+from app.models.sales import Order
+from app.models.user import User, UserRole
+
+CURRENT_USER_ID = "current_user_id"
+_current_user = bindparam(CURRENT_USER_ID, type_=UUID(as_uuid=True))
+
+
+class Visibility(str, enum.Enum):
+    ALL = "all"     # Every row
+    OWN = "own"     # Rows belonging to the caller
+    NONE = "none"   # No rows
+
+
+# Roles that see every staff member's records
+_SUPERVISORY = {UserRole.ADMIN, UserRole.HR_MANAGEMENT}
+
+# Per-staff records: supervisors see all, everyone else their own
+_OWNED = {
+    DailyLog: DailyLog.user_id,
+    WeeklyPlan: WeeklyPlan.user_id,
+    WeeklyReport: WeeklyReport.user_id,
+    DisciplinaryRecord: DisciplinaryRecord.user_id,
+    PayrollRecord: PayrollRecord.user_id,
+    KPIRecord: KPIRecord.user_id,
+}
+
+# Shared operational data: all rows for the listed roles, none for the rest
+_SHARED = {
+    FinishedGood: set(UserRole),
+    InventoryTransfer: {UserRole.FACTORY_SUPERVISOR, UserRole.SALES_MANAGER, UserRole.ADMIN},
+    Order: {UserRole.SALES_MANAGER, UserRole.ADMIN, UserRole.HR_MANAGEMENT},
+}
+
+
+def _compile() -> Dict[Tuple[UserRole, type], Tuple[Visibility, ColumnElement]]:
+    rules = {}
+    for role in UserRole:
+        for model, owner_column in _OWNED.items():
+            if role in _SUPERVISORY:
+                rules[(role, model)] = (Visibility.ALL, true())
+            else:
+                rules[(role, model)] = (Visibility.OWN, owner_column == _current_user)
+        for model, roles in _SHARED.items():
+            if role in roles:
+                rules[(role, model)] = (Visibility.ALL, true())
+            else:
+                rules[(role, model)] = (Visibility.NONE, false())
+    return rules
+
+
+_RULES = _compile()
+
+
+def visibility(model, role: UserRole) -> Visibility:
+    return _RULES[(role, model)][0]
+
+
+def row_filter(model, role: UserRole) -> ColumnElement:
+    """The role's predicate for ``model``; bind ``current_user_id`` when executing."""
+    return _RULES[(role, model)][1]
+
+
+def owner_column(model):
+    """The column naming whose record a per-staff row is; None for shared data."""
+    return _OWNED.get(model)
+
+
+def scoped(stmt: Select, model, user: User) -> Select:
+    """Restrict a SELECT over ``model`` to the rows ``user`` may see."""
+    rule, predicate = _RULES[(user.role, model)]
+    if rule is Visibility.ALL:
+        return stmt
+    return stmt.where(predicate).params({CURRENT_USER_ID: user.id})
+
+
+# ─── Device writes (sync push) ───────────────────────────────────────
+
+@dataclass(frozen=True)
+class PushRule:
+    columns: FrozenSet[str]                         # writable; other pushed keys are ignored
+    owner: Optional[str] = None                     # must name the pusher on stored and pushed rows
+    owner_exempt: FrozenSet[UserRole] = frozenset()  # roles that may push other people's rows
+    derived: Tuple[Tuple[str, str], ...] = ()       # (column, source): copied on insert, then kept
+    deletable: bool = False                         # whether ``_deleted`` pushes may remove rows
+
+
+# Every pushed row may carry these
+_BOOKKEEPING = {"id", "version", "device_id"}
+
+
+def _rule(*columns: str, **options) -> PushRule:
+    return PushRule(columns=frozenset(_BOOKKEEPING | set(columns)), **options)
+
+
+# Status, review, approval and payment columns are only ever set by the
+# server's own endpoints. Disciplinary records are read-only on devices —
+# acknowledgements and appeals go through /disciplinary/records/{id}/….
+# Only staff records may be deleted from a device, and only by their owner.
+_PUSHABLE = {
+    DailyLog: (set(UserRole), _rule(
+        "user_id", "log_date", "role_at_time", "activities", "key_achievements",
+        "challenges", "tomorrow_plan", "hours_worked",
+        owner="user_id", deletable=True,
+    )),
+    WeeklyPlan: (set(UserRole), _rule(
+        "user_id", "week_start_date", "week_number", "year", "deadline",
+        "objectives", "kpi_targets", "resource_requests", "time_bound_actions",
+        owner="user_id", deletable=True,
+    )),
+    WeeklyReport: (set(UserRole), _rule(
+        "user_id", "weekly_plan_id", "week_start_date", "week_number", "year", "deadline",
+        "objectives_achieved", "kpi_evidence", "financial_impact", "inventory_impact",
+        "deviation_explanation", "lessons_learned", "next_week_adjustments",
+        owner="user_id", deletable=True,
+    )),
+    FinishedGood: ({UserRole.FACTORY_SUPERVISOR, UserRole.ADMIN}, _rule(
+        "product_id", "name", "batch_number", "quantity", "unit", "production_log_id",
+        "warehouse_location", "unit_cost", "unit_price", "minimum_stock_level",
+        # Stock only moves through orders and approved transfers
+        derived=(("available_balance", "quantity"),),
+    )),
+    InventoryTransfer: ({UserRole.SALES_MANAGER, UserRole.ADMIN}, _rule(
+        "transfer_id", "finished_good_id", "quantity", "initiated_by", "initiated_at",
+        "initiator_signature", "notes",
+        owner="initiated_by", owner_exempt=frozenset({UserRole.ADMIN}),
+    )),
+    Order: ({UserRole.SALES_MANAGER, UserRole.ADMIN}, _rule(
+        "tracking_id", "customer_id", "sales_manager_id", "order_date", "status",
+        "subtotal", "tax", "discount", "total_amount", "delivery_address", "delivery_date", "notes",
+        owner="sales_manager_id", owner_exempt=frozenset({UserRole.ADMIN}),
+    )),
+    PayrollRecord: ({UserRole.ADMIN, UserRole.HR_MANAGEMENT}, _rule(
+        "payroll_id", "user_id", "month", "year", "salary_base", "kpi_bonus",
+        "call_allowance", "transport_allowance", "other_allowances",
+        "compliance_deduction", "compliance_deduction_pct", "tax_deduction",
+        "insurance_deduction", "other_deductions", "deduction_triggers",
+        "gross_pay", "total_deductions", "net_pay", "notes",
+    )),
+}
+
+
+def push_rule(model, role: UserRole) -> Optional[PushRule]:
+    """How ``role`` may push ``model`` rows from a device; None if it may not."""
+    roles, rule = _PUSHABLE.get(model, ((), None))
+    return rule if role in roles else None
@@ -0,0 +1,137 @@
+"""
+Authenticated-principal cache for get_current_user.
+
+The users row of a recently seen caller (plus the privileges locked by
+open disciplinary records) is kept in a TTL-bounded LRU keyed by user id,
+so an authenticated request no longer needs its own SELECT on users.
+
+Entries are dropped as soon as they go stale:
+  - any flush that changes a User row, or a DisciplinaryRecord's privilege
+    lock, sends ``pg_notify(principal_invalidate, <user id>)`` inside the
+    same transaction; every worker's LISTEN connection (app.core.notify)
+    evicts that id when it commits, the writing worker included;
+  - if the LISTEN connection is down, the cache is bypassed entirely, and
+    PRINCIPAL_CACHE_TTL_SECONDS bounds staleness for anything missed.
+Serverless deployments have no LISTEN connection and always read through.
+"""
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.database import IS_SERVERLESS
+from app.core.notify import notification_hub
+from app.models.disciplinary import DisciplinaryRecord, DisciplinaryStatus
+from app.models.user import User
+
+settings = get_settings()
+
+PRINCIPAL_CHANNEL = "principal_invalidate"
+
+
+@dataclass(frozen=True)
+class Principal:
+    values: Dict[str, Any]              # users row, column -> value
+    locked_privileges: FrozenSet[str]
+
+
+_cache: TTLCache[Principal] = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+# Bumped on every invalidation — a load that raced one is not cached
+_epoch = 0
+
+
+def enabled() -> bool:
+    return not IS_SERVERLESS and settings.PRINCIPAL_CACHE_TTL_SECONDS > 0 and notification_hub.running
+
+
+def invalidate(user_id) -> None:
+    global _epoch
+    _epoch += 1
+    _cache.pop(str(user_id))
+
+
+def _on_notify(payload: str) -> None:
+    invalidate(payload)
+
+
+notification_hub.on(PRINCIPAL_CHANNEL, _on_notify)
+
+
+async def start() -> None:
+    if not IS_SERVERLESS and settings.PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        await notification_hub.start()
+
+
+async def locked_privileges(db: AsyncSession, user_id) -> FrozenSet[str]:
+    """Privileges locked by the user's unresolved disciplinary records."""
+    locks = (await db.execute(
+        select(DisciplinaryRecord.locked_privileges).where(
+            DisciplinaryRecord.user_id == user_id,
+            DisciplinaryRecord.privileges_locked == True,
+            DisciplinaryRecord.status != DisciplinaryStatus.RESOLVED,
+        )
+    )).scalars().all()
+    return frozenset(p for privileges in locks for p in privileges or [])
+
+
+async def _load(db: AsyncSession, user_id: str) -> Optional[Principal]:
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if user is None:
+        return None
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    return Principal(values, await locked_privileges(db, user.id))
+
+
+async def current_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """The caller's User, attached to ``db`` without a query when cached."""
+    try:
+        key = str(uuid.UUID(str(user_id)))
+    except ValueError:
+        return None
+    principal = _cache.get(key) if enabled() else None
+    if principal is None:
+        epoch = _epoch
+        principal = await _load(db, key)
+        if principal is None:
+            return None
+        if enabled() and epoch == _epoch:
+            _cache.set(key, principal)
+    user = User(**principal.values)
+    make_transient_to_detached(user)
+    # Attach as if loaded — handlers can still modify and flush it
+    user = await db.merge(user, load=False)
+    user.locked_privileges = principal.locked_privileges
+    return user
+
+
+def privilege_lock_changes(session: Session) -> Set[str]:
+    """Ids of users whose disciplinary privilege locks the pending flush changes."""
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, DisciplinaryRecord):
+            attrs = inspect(obj).attrs
+            lock_changed = attrs.privileges_locked.history.has_changes()
+            lock_lifted = obj.privileges_locked and (
+                obj in session.deleted or attrs.status.history.has_changes()
+            )
+            if lock_changed or lock_lifted:
+                user_ids.add(str(obj.user_id))
+    return user_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_principal_changes(session: Session, flush_context) -> None:
+    user_ids = privilege_lock_changes(session)
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and (obj in session.deleted or session.is_modified(obj, include_collections=False)):
+            user_ids.add(str(obj.id))
+    if user_ids:
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, u) FROM unnest(CAST(:user_ids AS text[])) AS u"),
+            {"channel": PRINCIPAL_CHANNEL, "user_ids": sorted(user_ids)},
+        )
@@ -1,6 +1,16 @@
 """
 Security utilities: JWT, password hashing, device binding.
+
+bcrypt takes ~200ms of CPU per call, so request handlers use the async
+``hash_password_async`` / ``verify_password_async``, which run it on a
+dedicated thread pool (bcrypt releases the GIL) instead of the event loop.
+The plain functions remain for scripts.
 """
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import jwt
@@ -19,6 +29,87 @@ def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+# ─── Password hashing pool ───────────────────────────────────────────
+
+class PasswordPool:
+    """
+    Runs bcrypt on at most PASSWORD_HASH_WORKERS threads. Callers beyond
+    that wait their turn (the wait is measured); beyond
+    PASSWORD_HASH_MAX_WAITING waiting callers, new ones get a 503 rather
+    than piling up behind a login storm.
+    """
+
+    def __init__(self):
+        self.workers = settings.PASSWORD_HASH_WORKERS or max(1, (os.cpu_count() or 2) // 2)
+        self.max_waiting = settings.PASSWORD_HASH_MAX_WAITING
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_wait_ms = 0.0
+        self._waits: deque = deque(maxlen=1000)     # recent queue waits, ms
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password")
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-ins, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        wait_ms = (time.perf_counter() - queued) * 1000
+        self._waits.append(wait_ms)
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_p50_ms": round(waits[len(waits) // 2], 2) if waits else 0.0,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 2) if waits else 0.0,
+            "wait_max_ms": round(self.max_wait_ms, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+
+password_pool = PasswordPool()
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await password_pool.run(verify_password, plain, hashed)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (
@@ -2,13 +2,25 @@
 BONNESANTE MEDICALS — ASAL Enterprise PWA System
 Main FastAPI Application Entry Point.
 """
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from contextlib import asynccontextmanager
 
 from app.core.config import get_settings
-from app.core.database import engine, Base
-from app.api import auth, inventory, sales, marketing, asal, disciplinary, kpi, sync
+from app.core.database import engine, Base, IS_SERVERLESS
+from app.core import principals
+from app.core.notify import notification_hub
+from app.core.security import password_pool
+from app.services import compliance_state, dashboard
+from app.services.business_calendar import ensure_calendar
+from app.services.audit import audit_sink
+from app.services.device_activity import device_activity
+from app.services.partitions import ensure_partitions, partition_loop
+from app.services.sync_compaction import compaction_loop
+from app.services.sync_snapshots import snapshot_loop
+from app.api import auth, inventory, sales, marketing, asal, disciplinary, kpi, sync, calendar
 
 # Ensure ALL models are registered with Base.metadata
 import app.models.user          # noqa: F401
@@ -19,6 +31,8 @@ import app.models.asal          # noqa: F401
 import app.models.disciplinary  # noqa: F401
 import app.models.kpi           # noqa: F401
 import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
 
 settings = get_settings()
 
@@ -34,7 +48,52 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             import logging
             logging.getLogger("uvicorn.error").warning(f"create_all note: {e}")
+        # create_all does not add columns to existing tables. The models map
+        # these, so they get their own transaction and a failure stops startup.
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "ALTER TABLE IF EXISTS users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 1"
+            ))
+            await conn.execute(text(
+                "ALTER TABLE IF EXISTS sync_tombstones ADD COLUMN IF NOT EXISTS user_id UUID"
+            ))
+            await conn.execute(text(
+                "ALTER TABLE IF EXISTS idempotency_keys ADD COLUMN IF NOT EXISTS request_hash VARCHAR(64)"
+            ))
+        # Independent steps: one failing (e.g. tables not yet partitioned)
+        # must not skip the others.
+        for step in (ensure_partitions, ensure_calendar, compliance_state.roll_forward):
+            try:
+                async with engine.begin() as conn:
+                    await step(conn)
+            except Exception as e:
+                import logging
+                logging.getLogger("uvicorn.error").warning(f"Startup {step.__name__} note: {e}")
+    audit_sink.start()
+    try:
+        await principals.start()
+        await dashboard.start()
+    except Exception as e:
+        import logging
+        logging.getLogger("uvicorn.error").warning(f"Principal and dashboard caches disabled, LISTEN failed: {e}")
+    background = []
+    if not IS_SERVERLESS and settings.SNAPSHOT_INTERVAL_MINUTES > 0:
+        background.append(asyncio.create_task(snapshot_loop()))
+    if not IS_SERVERLESS and settings.SYNC_COMPACTION_INTERVAL_HOURS > 0:
+        background.append(asyncio.create_task(compaction_loop()))
+    if not IS_SERVERLESS and settings.PARTITION_MAINTENANCE_INTERVAL_HOURS > 0:
+        background.append(asyncio.create_task(partition_loop()))
+    if not IS_SERVERLESS and settings.COMPLIANCE_ROLL_FORWARD_INTERVAL_MINUTES > 0:
+        background.append(asyncio.create_task(compliance_state.compliance_loop()))
+    if device_activity.coalescing:
+        background.append(asyncio.create_task(device_activity.run()))
     yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await audit_sink.stop()
+    await notification_hub.stop()
+    password_pool.shutdown()
     await engine.dispose()
 
 
@@ -52,6 +111,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Snapshot-Cursor"],
 )
 
 # Mount API routers
@@ -64,6 +124,7 @@ app.include_router(asal.router, prefix=API_PREFIX)
 app.include_router(disciplinary.router, prefix=API_PREFIX)
 app.include_router(kpi.router, prefix=API_PREFIX)
 app.include_router(sync.router, prefix=API_PREFIX)
+app.include_router(calendar.router, prefix=API_PREFIX)
 
 
 @app.get("/")
@@ -7,7 +7,7 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    Enum, Text, JSON, ForeignKey, UniqueConstraint
+    Enum, Text, JSON, ForeignKey, UniqueConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -70,6 +70,7 @@ class DailyLog(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "log_date", name="uq_daily_log_user_date"),
+        Index("ix_daily_logs_log_date_id", "log_date", "id"),
     )
 
 
@@ -111,6 +112,7 @@ class WeeklyPlan(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "week_start_date", name="uq_weekly_plan_user_week"),
+        Index("ix_weekly_plans_week_start_date_id", "week_start_date", "id"),
     )
 
 
@@ -157,4 +159,5 @@ class WeeklyReport(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "week_start_date", name="uq_weekly_report_user_week"),
+        Index("ix_weekly_reports_week_start_date_id", "week_start_date", "id"),
     )
@@ -0,0 +1,39 @@
+"""
+Business calendar models — working days, public holidays and
+per-department exceptions (see app.services.business_calendar).
+"""
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import (
+    Column, String, Boolean, Date, DateTime, ForeignKey, UniqueConstraint
+)
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class CalendarDay(Base):
+    """
+    One precomputed row per date. Weekends are non-working by default;
+    a public holiday is a non-working day with a ``holiday_name``.
+    """
+    __tablename__ = "calendar_days"
+
+    day = Column(Date, primary_key=True)
+    is_working_day = Column(Boolean, nullable=False)
+    holiday_name = Column(String(255), nullable=True)
+
+
+class CalendarException(Base):
+    """A department working a non-working day (or off on a working one)."""
+    __tablename__ = "calendar_exceptions"
+    __table_args__ = (
+        UniqueConstraint("department", "day", name="uq_calendar_exception_department_day"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    department = Column(String(100), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    is_working_day = Column(Boolean, nullable=False)
+    description = Column(String(255), nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,37 @@
+"""
+Per-user compliance state — the running figures behind every ASAL
+compliance check (see app.services.compliance_state).
+"""
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class ComplianceState(Base):
+    """
+    One row per user, current as of ``as_of``. ``last_logged_date`` is the
+    latest daily log on a working day; ``miss_streak`` counts the working
+    days after it (or after account creation) up to and including
+    ``as_of``. The rolling counts cover weeks starting within 90 days of
+    ``as_of``.
+    """
+    __tablename__ = "compliance_states"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    as_of = Column(Date, nullable=False)
+
+    # Daily logs
+    last_logged_date = Column(Date, nullable=True)
+    miss_streak = Column(Integer, nullable=False, default=0)
+
+    # Weekly plans/reports submitted late or missed
+    late_plans_90d = Column(Integer, nullable=False, default=0)
+    late_reports_90d = Column(Integer, nullable=False, default=0)
+
+    # Disciplinary records created since ``queries_month_start``
+    queries_month_start = Column(Date, nullable=False)
+    queries_month = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
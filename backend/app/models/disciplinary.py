@@ -6,7 +6,7 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    Enum, Text, JSON, ForeignKey, CheckConstraint
+    Enum, Text, JSON, ForeignKey, CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -99,6 +99,10 @@ class DisciplinaryRecord(Base):
 
     user = relationship("User", back_populates="disciplinary_records", foreign_keys=[user_id])
 
+    __table_args__ = (
+        Index("ix_disciplinary_records_created_at_id", "created_at", "id"),
+    )
+
 
 # ─── Payroll Record ──────────────────────────────────────────────────
 
@@ -151,4 +155,5 @@ class PayrollRecord(Base):
     __table_args__ = (
         CheckConstraint("salary_base >= 0", name="payroll_salary_positive"),
         CheckConstraint("net_pay >= 0", name="payroll_net_positive"),
+        Index("ix_payroll_records_created_at_id", "created_at", "id"),
     )
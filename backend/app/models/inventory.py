@@ -7,7 +7,7 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    Enum, Text, JSON, ForeignKey, CheckConstraint
+    Enum, Text, JSON, ForeignKey, CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -61,6 +61,7 @@ class RawMaterial(Base):
     __table_args__ = (
         CheckConstraint("quantity >= 0", name="raw_material_qty_positive"),
         CheckConstraint("cost_per_unit >= 0", name="raw_material_cost_positive"),
+        Index("ix_raw_materials_created_at_id", "created_at", "id"),
     )
 
 
@@ -98,6 +99,7 @@ class ProductionLog(Base):
     __table_args__ = (
         CheckConstraint("output_quantity >= 0", name="production_output_positive"),
         CheckConstraint("wastage_quantity >= 0", name="production_wastage_positive"),
+        Index("ix_production_logs_created_at_id", "created_at", "id"),
     )
 
 
@@ -145,6 +147,7 @@ class FinishedGood(Base):
     __table_args__ = (
         CheckConstraint("quantity >= 0", name="finished_good_qty_positive"),
         CheckConstraint("available_balance >= 0", name="finished_good_balance_positive"),
+        Index("ix_finished_goods_created_at_id", "created_at", "id"),
     )
 
 
@@ -185,4 +188,5 @@ class InventoryTransfer(Base):
 
     __table_args__ = (
         CheckConstraint("quantity > 0", name="transfer_qty_positive"),
+        Index("ix_inventory_transfers_created_at_id", "created_at", "id"),
     )
@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, DateTime, Date,
-    Enum, Text, JSON, ForeignKey, UniqueConstraint
+    Enum, Text, JSON, ForeignKey, UniqueConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -65,6 +65,7 @@ class KPIRecord(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "month", "year", name="uq_kpi_user_month_year"),
+        Index("ix_kpi_records_created_at_id", "created_at", "id"),
     )
 
 
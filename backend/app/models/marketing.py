@@ -7,7 +7,7 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    Enum, Text, JSON, ForeignKey
+    Enum, Text, JSON, ForeignKey, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -60,6 +60,10 @@ class MarketingCampaign(Base):
                            onupdate=lambda: datetime.now(timezone.utc))
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        Index("ix_marketing_campaigns_created_at_id", "created_at", "id"),
+    )
+
 
 # ─── Customer Feedback / Complaint ────────────────────────────────────
 
@@ -86,3 +90,7 @@ class CustomerFeedback(Base):
     last_modified = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
                            onupdate=lambda: datetime.now(timezone.utc))
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_customer_feedback_created_at_id", "created_at", "id"),
+    )
@@ -7,7 +7,7 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    Enum, Text, JSON, ForeignKey, CheckConstraint
+    Enum, Text, JSON, ForeignKey, CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -81,6 +81,10 @@ class Customer(Base):
     category = relationship("CustomerCategory", back_populates="customers")
     orders = relationship("Order", back_populates="customer")
 
+    __table_args__ = (
+        Index("ix_customers_name_id", "name", "id"),
+    )
+
 
 # ─── Order ────────────────────────────────────────────────────────────
 
@@ -117,6 +121,7 @@ class Order(Base):
 
     __table_args__ = (
         CheckConstraint("total_amount >= 0", name="order_total_positive"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
     )
 
 
@@ -161,3 +166,7 @@ class SalesDailyLog(Base):
     last_modified = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
                            onupdate=lambda: datetime.now(timezone.utc))
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_sales_daily_logs_log_date_id", "log_date", "id"),
+    )
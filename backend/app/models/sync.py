@@ -5,8 +5,8 @@ import uuid
 import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, String, Integer, Float, Boolean, DateTime,
-    Enum, Text, JSON, ForeignKey
+    Column, String, Integer, BigInteger, Float, Boolean, DateTime,
+    Enum, Text, JSON, ForeignKey, Index, UniqueConstraint, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
@@ -20,8 +20,12 @@ class ConflictResolution(str, enum.Enum):
 
 
 class SyncEvent(Base):
-    """Tracks every sync push/pull for audit and debugging."""
+    """
+    Tracks every sync push/pull for audit and debugging.
+    Range-partitioned by month on ``started_at`` (see app.services.partitions).
+    """
     __tablename__ = "sync_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (started_at)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     device_id = Column(String(255), nullable=False, index=True)
@@ -32,7 +36,8 @@ class SyncEvent(Base):
     conflicts_detected = Column(Integer, default=0)
     conflicts_resolved = Column(Integer, default=0)
     errors = Column(JSON, default=list)
-    started_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), primary_key=True,
+                        default=lambda: datetime.now(timezone.utc))
     completed_at = Column(DateTime(timezone=True), nullable=True)
     success = Column(Boolean, default=True)
 
@@ -42,7 +47,8 @@ class SyncConflict(Base):
     __tablename__ = "sync_conflicts"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    sync_event_id = Column(UUID(as_uuid=True), ForeignKey("sync_events.id"), nullable=False)
+    # No foreign key — sync_events is partitioned and its key includes started_at
+    sync_event_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     table_name = Column(String(100), nullable=False)
     record_id = Column(String(255), nullable=False)
     client_version = Column(Integer, nullable=False)
@@ -72,3 +78,85 @@ class DeviceRegistration(Base):
     last_sync_at = Column(DateTime(timezone=True), nullable=True)
     registered_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SyncChange(Base):
+    """
+    Append-only change log for syncable tables — one row per written record.
+    Delta pulls page through it by ``txid`` (the writing transaction's id):
+    rows are only served once every older transaction has finished, so a
+    device cursor never skips a change that commits late.
+    """
+    __tablename__ = "sync_changes"
+
+    seq = Column(BigInteger, primary_key=True, autoincrement=True)
+    txid = Column(BigInteger, nullable=False,
+                  server_default=text("(pg_current_xact_id())::text::bigint"))
+    table_name = Column(String(100), nullable=False)
+    record_id = Column(UUID(as_uuid=True), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    changed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_sync_changes_table_txid", "table_name", "txid"),
+        Index("ix_sync_changes_table_record", "table_name", "record_id"),
+    )
+
+
+class SyncTombstone(Base):
+    """
+    Marker for a syncable record that was deleted, served by delta pulls
+    alongside changed rows so devices can drop their copy.
+    Purged after TOMBSTONE_RETENTION_DAYS (see SyncCompaction).
+    """
+    __tablename__ = "sync_tombstones"
+
+    seq = Column(BigInteger, primary_key=True, autoincrement=True)
+    txid = Column(BigInteger, nullable=False,
+                  server_default=text("(pg_current_xact_id())::text::bigint"))
+    table_name = Column(String(100), nullable=False)
+    record_id = Column(UUID(as_uuid=True), nullable=False)
+    reason = Column(String(20), nullable=False, default="deleted")
+    user_id = Column(UUID(as_uuid=True), nullable=True)  # Owner of a per-staff record (row policy)
+    deleted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_table_txid", "table_name", "txid"),
+        Index("ix_sync_tombstones_table_record", "table_name", "record_id"),
+    )
+
+
+class SyncCompaction(Base):
+    """
+    How far each table's tombstones have been purged. A device whose cursor
+    is older than ``purged_through_txid`` may have missed a deletion and
+    must re-bootstrap instead of pulling a delta.
+    """
+    __tablename__ = "sync_compactions"
+
+    table_name = Column(String(100), primary_key=True)
+    purged_through_txid = Column(BigInteger, nullable=False, default=0)
+    compacted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class IdempotencyRecord(Base):
+    """
+    Stored response for a request sent with an Idempotency-Key header.
+    A retry with the same key gets this response back instead of redoing
+    the work. Rows expire after IDEMPOTENCY_TTL_HOURS.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    key = Column(String(255), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    scope = Column(String(100), nullable=False)  # Endpoint the key was used on
+    request_hash = Column(String(64), nullable=True)  # SHA-256 of the request body
+    status_code = Column(Integer, nullable=False, default=200)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_user_scope_key"),
+    )
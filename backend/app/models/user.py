@@ -6,7 +6,7 @@ import enum
 import secrets
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import (
-    Column, String, Boolean, DateTime, Enum, Text, JSON, ForeignKey
+    Column, String, Boolean, Integer, DateTime, Enum, Text, JSON, ForeignKey, Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -24,6 +24,9 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_full_name_id", "full_name", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     employee_id = Column(String(50), unique=True, nullable=False, index=True)
@@ -41,6 +44,9 @@ class User(Base):
     compliance_consent = Column(Boolean, default=False)
     payroll_deduction_consent = Column(Boolean, default=False)
     permissions = Column(JSON, default=dict)  # Granular permission overrides
+    # Bumped when role, permissions, active flag, password or privilege locks
+    # change; tokens issued under an older version are revoked (app.core.claims)
+    token_version = Column(Integer, default=1, server_default="1", nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
                         onupdate=lambda: datetime.now(timezone.utc))
@@ -54,13 +60,27 @@ class User(Base):
     kpi_records = relationship("KPIRecord", back_populates="user", lazy="dynamic", foreign_keys="[KPIRecord.user_id]")
     audit_logs = relationship("AuditLog", back_populates="user", lazy="dynamic")
 
+    # Not a column — privileges locked by open disciplinary records,
+    # filled in by get_current_user (app.core.principals)
+    locked_privileges = frozenset()
+
     def __repr__(self):
         return f"<User {self.full_name} ({self.role.value})>"
 
 
 class AuditLog(Base):
-    """Immutable audit trail for all system actions."""
+    """
+    Immutable audit trail for all system actions.
+    Range-partitioned by month on ``timestamp`` (see app.services.partitions),
+    so the primary key carries the partition key too.
+    """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        # Dashboard login counts (action, time range)
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
@@ -70,7 +90,8 @@ class AuditLog(Base):
     details = Column(JSON, default=dict)
     ip_address = Column(String(45), nullable=True)
     device_id = Column(String(255), nullable=True)
-    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True,
+                       default=lambda: datetime.now(timezone.utc), index=True)
 
     user = relationship("User", back_populates="audit_logs")
 
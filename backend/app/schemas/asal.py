@@ -7,6 +7,7 @@ from datetime import date, datetime
 from uuid import UUID
 from app.models.asal import LogStatus, PlanStatus, ReportStatus
 from app.models.inventory import SyncStatus
+from app.models.user import UserRole
 
 
 # ─── Daily Log ────────────────────────────────────────────────────────
@@ -119,3 +120,60 @@ class WeeklyReportOut(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+# ─── Batch Backfill ───────────────────────────────────────────────────
+
+# Entries accepted per batch request
+MAX_BATCH_ENTRIES = 200
+
+
+class DailyLogBatch(BaseModel):
+    entries: List[DailyLogCreate] = Field(..., min_length=1, max_length=MAX_BATCH_ENTRIES)
+
+
+class WeeklyPlanBatch(BaseModel):
+    entries: List[WeeklyPlanCreate] = Field(..., min_length=1, max_length=MAX_BATCH_ENTRIES)
+
+
+class WeeklyReportBatch(BaseModel):
+    entries: List[WeeklyReportCreate] = Field(..., min_length=1, max_length=MAX_BATCH_ENTRIES)
+
+
+class BatchItemResult(BaseModel):
+    index: int                          # position in ``entries``
+    day: date                           # log_date / week_start_date
+    status: str                         # created | duplicate
+    id: Optional[UUID] = None
+    record_status: Optional[str] = None  # submitted | late, for created entries
+
+
+class BatchResult(BaseModel):
+    created: int
+    duplicates: int
+    results: List[BatchItemResult]
+
+
+# ─── Compliance State ─────────────────────────────────────────────────
+
+class ComplianceStateOut(BaseModel):
+    user_id: UUID
+    full_name: str
+    role: UserRole
+    department: Optional[str]
+    last_logged_date: Optional[date]
+    miss_streak: int
+    late_plans_90d: int
+    late_reports_90d: int
+    queries_this_month: int
+
+
+# ─── Search ───────────────────────────────────────────────────────────
+
+class SearchHit(BaseModel):
+    kind: str           # daily_log | weekly_plan | weekly_report
+    id: UUID
+    user_id: UUID
+    day: date           # log_date / week_start_date
+    rank: float
+    snippet: str        # plain text; matched terms between \x02 and \x03
@@ -0,0 +1,34 @@
+"""
+Pydantic schemas for the business calendar.
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+from uuid import UUID
+
+
+class CalendarDayOut(BaseModel):
+    day: date
+    is_working_day: bool
+    holiday_name: Optional[str] = None
+
+
+class HolidaySet(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+
+
+class CalendarExceptionSet(BaseModel):
+    department: str = Field(..., min_length=1, max_length=100)
+    day: date
+    is_working_day: bool
+    description: Optional[str] = Field(None, max_length=255)
+
+
+class CalendarExceptionOut(BaseModel):
+    id: UUID
+    department: str
+    day: date
+    is_working_day: bool
+    description: Optional[str]
+
+    model_config = {"from_attributes": True}
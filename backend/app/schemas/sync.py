@@ -0,0 +1,22 @@
+"""
+Pydantic schemas for the Sync Engine.
+"""
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any
+
+
+class SyncTableRequest(BaseModel):
+    cursor: int = Field(0, ge=0)  # next_cursor from the previous round
+    limit: int = Field(500, ge=1, le=5000)
+    records: List[Dict[str, Any]] = []  # Pending local changes to push
+
+
+class SyncSessionRequest(BaseModel):
+    device_id: str
+    tables: Dict[str, SyncTableRequest]
+
+
+class ReconcileRequest(BaseModel):
+    table_name: str
+    # Ranges to describe — "" is the whole table; drill down with mismatched child prefixes
+    prefixes: List[str] = Field(default_factory=lambda: [""], min_length=1, max_length=64)
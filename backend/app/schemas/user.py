@@ -70,6 +70,7 @@ class UserListOut(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 # ─── Legal Consent ────────────────────────────────────────────────────
@@ -0,0 +1,168 @@
+"""
+Audit sink — writes audit_logs off the request path.
+
+``record()`` stages an entry on the request's session. When that session
+commits, staged entries go onto a bounded in-process queue; a background
+writer inserts them in batches (one multi-row INSERT per AUDIT_BATCH_SIZE
+entries, at least every AUDIT_FLUSH_MS). A rolled-back request drops its
+entries, so the trail still only shows what actually happened.
+
+Financial actions (STRICT_ACTIONS, or ``strict=True``) are inserted in the
+request's own transaction and commit atomically with the change they
+describe. The same happens whenever the writer is not running — serverless
+deployments and scripts — so nothing is ever left waiting in memory there.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, IS_SERVERLESS
+from app.models.user import AuditLog
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+# Actions that must commit in the same transaction as the change itself
+STRICT_ACTIONS = {
+    "CREATE_ORDER",
+    "UPDATE_ORDER",
+    "INITIATE_TRANSFER",
+    "APPROVE_TRANSFER",
+    "CALCULATE_PAYROLL",
+    "APPROVE_PAYROLL",
+}
+
+# session.info key holding entries staged until commit
+_STAGED = "audit_staged"
+
+
+class AuditSink:
+    def __init__(self, max_queued: int):
+        self._max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def start(self) -> None:
+        if not IS_SERVERLESS and not self.running:
+            self._queue = asyncio.Queue(maxsize=self._max_queued)
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer and flush everything still queued."""
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            await self._write(self._take(settings.AUDIT_BATCH_SIZE))
+
+    def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        for i, entry in enumerate(entries):
+            if not self.running or self._queue.full():
+                # Writer stopped or queue at its bound — write the rest directly rather than drop them
+                self._spawn_write(entries[i:])
+                return
+            self._queue.put_nowait(entry)
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _spawn_write(self, batch: List[Dict[str, Any]]) -> asyncio.Task:
+        # Tracked so stop() can wait for writes already under way
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+        return task
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Audit write failed, {len(batch)} entries lost: {e}")
+
+    async def _run(self) -> None:
+        linger = settings.AUDIT_FLUSH_MS / 1000
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + linger
+            try:
+                while len(batch) < settings.AUDIT_BATCH_SIZE:
+                    batch.extend(self._take(settings.AUDIT_BATCH_SIZE - len(batch)))
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if len(batch) >= settings.AUDIT_BATCH_SIZE or remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                # Also on shutdown mid-batch — what was taken is still written
+                write = self._spawn_write(batch)
+            await asyncio.shield(write)
+
+
+audit_sink = AuditSink(settings.AUDIT_QUEUE_SIZE)
+
+
+def record(
+    db: AsyncSession,
+    *,
+    action: str,
+    resource_type: str,
+    user_id: Optional[uuid.UUID] = None,
+    resource_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    device_id: Optional[str] = None,
+    strict: bool = False,
+) -> None:
+    """Audit an action; written once ``db`` commits (immediately, for strict actions)."""
+    entry = {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "details": details if details is not None else {},
+        "ip_address": ip_address,
+        "device_id": device_id,
+        "timestamp": datetime.now(timezone.utc),
+    }
+    if strict or action in STRICT_ACTIONS or not audit_sink.running:
+        db.add(AuditLog(**entry))
+        return
+    db.sync_session.info.setdefault(_STAGED, []).append(entry)
+
+
+@event.listens_for(Session, "after_commit")
+def _release_staged(session: Session) -> None:
+    staged = session.info.pop(_STAGED, None)
+    if staged:
+        audit_sink.enqueue(staged)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_STAGED, None)
@@ -0,0 +1,169 @@
+"""
+Business-day calendar shared by every deadline and compliance rule.
+
+A day is a working day for a department when
+  1. that department has a calendar_exceptions row for it — its flag wins;
+  2. else calendar_days has a row for it — public holidays are rows with
+     ``is_working_day = false`` and a ``holiday_name``;
+  3. else it is Monday–Friday.
+calendar_days is precomputed for last year through CALENDAR_YEARS_AHEAD
+years ahead; rule 3 only matters outside that range.
+
+SQL callers embed ``is_working_day_sql`` or ``working_day_count_sql``;
+Python callers use a
+``BusinessCalendar`` from ``get_calendar``, cached for
+CALENDAR_CACHE_SECONDS and dropped on every worker (via NOTIFY) when a
+holiday or exception changes. Both apply the same rules.
+"""
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.notify import notification_hub
+from app.models.calendar import CalendarDay, CalendarException
+
+settings = get_settings()
+
+CALENDAR_CHANNEL = "calendar_invalidate"
+
+# ASAL deadlines fall at 19:00 UTC
+DEADLINE_HOUR = 19
+
+
+def is_working_day_sql(day: str, department: str) -> str:
+    """SQL condition: ``day`` is a working day for ``department`` (both SQL expressions)."""
+    return f"""coalesce(
+        (SELECT calendar_exceptions.is_working_day FROM calendar_exceptions
+         WHERE calendar_exceptions.day = {day} AND calendar_exceptions.department = {department}),
+        (SELECT calendar_days.is_working_day FROM calendar_days WHERE calendar_days.day = {day}),
+        extract(isodow FROM {day}) < 6
+    )"""
+
+
+def working_day_count_sql(after: str, through: str, department: str) -> str:
+    """
+    Scalar SQL subquery: working days in (``after``, ``through``] for
+    ``department`` — each argument an SQL expression, typically columns of
+    the enclosing query.
+    """
+    return f"""(
+        SELECT count(*)
+        FROM generate_series(({after}) + 1, {through}, interval '1 day') AS d
+        LEFT JOIN calendar_days ON calendar_days.day = d::date
+        LEFT JOIN calendar_exceptions ON calendar_exceptions.day = d::date
+            AND calendar_exceptions.department = {department}
+        WHERE coalesce(calendar_exceptions.is_working_day, calendar_days.is_working_day, extract(isodow FROM d) < 6)
+    )"""
+
+
+def _is_weekday(day: date) -> bool:
+    return day.weekday() < 5
+
+
+def _deadline(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, DEADLINE_HOUR, 0, 0, tzinfo=timezone.utc)
+
+
+async def ensure_calendar(conn: AsyncConnection, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """Precompute calendar_days rows missing in [start, end]. Returns rows added."""
+    today = date.today()
+    start = start or date(today.year - 1, 1, 1)
+    end = end or date(today.year + settings.CALENDAR_YEARS_AHEAD, 12, 31)
+    result = await conn.execute(text("""
+        INSERT INTO calendar_days (day, is_working_day)
+        SELECT d::date, extract(isodow FROM d) < 6
+        FROM generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 day') AS d
+        ON CONFLICT (day) DO NOTHING
+    """), {"start": start, "end": end})
+    return result.rowcount
+
+
+@dataclass
+class BusinessCalendar:
+    # Only days that differ from the weekday rule, or carry a holiday name
+    days: Dict[date, bool]
+    holidays: Dict[date, str]
+    exceptions: Dict[Tuple[str, date], bool]
+
+    def is_working_day(self, day: date, department: Optional[str] = None) -> bool:
+        if department is not None and (department, day) in self.exceptions:
+            return self.exceptions[(department, day)]
+        return self.days.get(day, _is_weekday(day))
+
+    def working_days(self, start: date, end: date, department: Optional[str] = None) -> List[date]:
+        """Working days in [start, end], oldest first."""
+        days = []
+        day = start
+        while day <= end:
+            if self.is_working_day(day, department):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def next_working_day(self, day: date, department: Optional[str] = None, limit: int = 31) -> date:
+        """``day`` itself if it is a working day, else the next one (within ``limit`` days)."""
+        for offset in range(limit):
+            candidate = day + timedelta(days=offset)
+            if self.is_working_day(candidate, department):
+                return candidate
+        return day
+
+    def weekly_plan_deadline(self, week_start: date, department: Optional[str] = None) -> datetime:
+        """19:00 on the eve of the week's first working day (normally Sunday)."""
+        first = self.next_working_day(week_start, department, limit=7)
+        return _deadline(first - timedelta(days=1))
+
+    def weekly_report_deadline(self, week_start: date, department: Optional[str] = None) -> datetime:
+        """19:00 on the week's Friday, or the next working day when that is off."""
+        friday = week_start + timedelta(days=(4 - week_start.weekday()) % 7)
+        return _deadline(self.next_working_day(friday, department))
+
+
+_calendar: Optional[BusinessCalendar] = None
+_loaded_at = 0.0
+# Bumped on every invalidation — a load that raced one is not cached
+_epoch = 0
+
+
+def invalidate() -> None:
+    global _calendar, _epoch
+    _epoch += 1
+    _calendar = None
+
+
+notification_hub.on(CALENDAR_CHANNEL, lambda payload: invalidate())
+
+
+async def get_calendar(db: AsyncSession) -> BusinessCalendar:
+    global _calendar, _loaded_at
+    if _calendar is not None and time.monotonic() - _loaded_at < settings.CALENDAR_CACHE_SECONDS:
+        return _calendar
+    epoch = _epoch
+    rows = (await db.execute(
+        select(CalendarDay).where(
+            (CalendarDay.holiday_name != None)
+            | (CalendarDay.is_working_day != (func.extract("isodow", CalendarDay.day) < 6))
+        )
+    )).scalars().all()
+    exceptions = (await db.execute(select(CalendarException))).scalars().all()
+    calendar = BusinessCalendar(
+        days={row.day: row.is_working_day for row in rows},
+        holidays={row.day: row.holiday_name for row in rows if row.holiday_name},
+        exceptions={(row.department, row.day): row.is_working_day for row in exceptions},
+    )
+    if epoch == _epoch:
+        _calendar, _loaded_at = calendar, time.monotonic()
+    return calendar
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_calendar_changes(session: Session, flush_context) -> None:
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, (CalendarDay, CalendarException)) for obj in changed):
+        session.connection().execute(text("SELECT pg_notify(:channel, '')"), {"channel": CALENDAR_CHANNEL})
@@ -0,0 +1,77 @@
+"""
+Change feed — pushes "table X changed" hints to connected devices over
+Server-Sent Events so they pull only when there is something to pull.
+
+Writers NOTIFY on ``SYNC_CHANGES_CHANNEL`` (see sync_changes); Postgres
+delivers the notification on commit to every worker's LISTEN connection,
+and each worker fans it out to its own SSE subscribers.
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Set
+
+from fastapi import Request
+
+from app.core.notify import notification_hub
+from app.services.sync_changes import SYNC_CHANGES_CHANNEL
+
+# Idle seconds before a keep-alive comment is sent (keeps proxies from closing the stream)
+KEEPALIVE_SECONDS = 15
+
+
+class _Subscription:
+    """Pending hints for one connected device, coalesced to the newest cursor per table."""
+
+    def __init__(self):
+        self.pending: Dict[str, int] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, table_name: str, cursor: int) -> None:
+        self.pending[table_name] = max(cursor, self.pending.get(table_name, 0))
+        self.ready.set()
+
+    def drain(self) -> Dict[str, int]:
+        hints, self.pending = self.pending, {}
+        self.ready.clear()
+        return hints
+
+
+class ChangeFeed:
+    def __init__(self):
+        self._subscribers: Set[_Subscription] = set()
+        notification_hub.on(SYNC_CHANGES_CHANNEL, self._on_notify)
+
+    def _on_notify(self, payload: str) -> None:
+        hint = json.loads(payload)
+        for subscription in self._subscribers:
+            subscription.push(hint["table_name"], hint["cursor"])
+
+    async def subscribe(self) -> _Subscription:
+        await notification_hub.start()
+        subscription = _Subscription()
+        self._subscribers.add(subscription)
+        return subscription
+
+    async def event_stream(self, request: Request, subscription: _Subscription) -> AsyncIterator[str]:
+        """
+        SSE body. Each event is ``event: change`` with data
+        {"table_name": ..., "cursor": ...}. On receipt a device pulls that
+        table; if its next_cursor is still below the hinted cursor, an older
+        transaction was still in flight and it should pull again shortly.
+        """
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                for table_name, cursor in subscription.drain().items():
+                    data = json.dumps({"table_name": table_name, "cursor": cursor})
+                    yield f"event: change\ndata: {data}\n\n"
+        finally:
+            self._subscribers.discard(subscription)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,110 @@
+"""
+Daily-log compliance: which active users have missed consecutive working
+days, read for all users from compliance_states in one query.
+
+Each user's stored miss streak is brought up to today with the working
+days since the row's ``as_of`` (per the business calendar, so weekends,
+public holidays and department exceptions count correctly), then capped
+at the working days in the last MISSED_LOG_WINDOW_DAYS.
+
+``compliance_overview`` reads the same rows for the compliance dashboard.
+Both first add rows for users who have none, so nobody drops out of the
+joins when the startup roll-forward has not run.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Integer, String, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User, UserRole
+from app.services import business_calendar, compliance_state
+
+# Calendar days looked back over; today counts as missed until logged
+MISSED_LOG_WINDOW_DAYS = 7
+MISSED_LOG_THRESHOLD = 2
+
+
+@dataclass
+class MissedLogStreak:
+    user_id: UUID
+    full_name: str
+    role: UserRole
+    consecutive_missed: int
+    queries_this_month: int     # disciplinary records created since the 1st
+
+
+_QUERIES_THIS_MONTH_SQL = """
+    CASE WHEN compliance_states.queries_month_start = CAST(:month_start AS date)
+         THEN compliance_states.queries_month ELSE 0 END
+"""
+
+_STREAKS_SQL = text("""
+    SELECT * FROM (
+        SELECT users.id AS user_id, users.full_name, users.role,
+               least({streak}, {window}) AS consecutive_missed,
+               {queries_this_month} AS queries_this_month
+        FROM compliance_states JOIN users ON users.id = compliance_states.user_id
+        WHERE users.is_active
+    ) AS streaks
+    WHERE consecutive_missed >= :threshold
+    ORDER BY consecutive_missed DESC, full_name
+""".format(
+    streak=compliance_state.streak_at_sql("CAST(:today AS date)"),
+    queries_this_month=_QUERIES_THIS_MONTH_SQL,
+    window=business_calendar.working_day_count_sql(
+        f"CAST(:today AS date) - {MISSED_LOG_WINDOW_DAYS}", "CAST(:today AS date)", "users.department",
+    ),
+)).columns(
+    user_id=PG_UUID(as_uuid=True),
+    full_name=String,
+    role=User.__table__.c.role.type,
+    consecutive_missed=Integer,
+    queries_this_month=Integer,
+)
+
+
+async def missed_daily_log_streaks(
+    db: AsyncSession,
+    today: Optional[date] = None,
+    threshold: int = MISSED_LOG_THRESHOLD,
+) -> List[MissedLogStreak]:
+    """Active users whose trailing run of missed working days is >= ``threshold``."""
+    today = today or date.today()
+    await compliance_state.add_missing(db, today)
+    result = await db.execute(_STREAKS_SQL, {
+        "today": today,
+        "month_start": today.replace(day=1),
+        "threshold": threshold,
+    })
+    return [MissedLogStreak(**row._mapping) for row in result]
+
+
+_OVERVIEW_SQL = text("""
+    SELECT users.id AS user_id, users.full_name, users.role, users.department,
+           compliance_states.last_logged_date,
+           {streak} AS miss_streak,
+           compliance_states.late_plans_90d,
+           compliance_states.late_reports_90d,
+           {queries_this_month} AS queries_this_month
+    FROM compliance_states JOIN users ON users.id = compliance_states.user_id
+    WHERE users.is_active
+    ORDER BY users.full_name
+""".format(
+    streak=compliance_state.streak_at_sql("CAST(:today AS date)"),
+    queries_this_month=_QUERIES_THIS_MONTH_SQL,
+)).columns(
+    user_id=PG_UUID(as_uuid=True),
+    role=User.__table__.c.role.type,
+)
+
+
+async def compliance_overview(db: AsyncSession, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Every active user's compliance state, with the miss streak brought up to ``today``."""
+    today = today or date.today()
+    await compliance_state.add_missing(db, today)
+    result = await db.execute(_OVERVIEW_SQL, {"today": today, "month_start": today.replace(day=1)})
+    return [dict(row._mapping) for row in result]
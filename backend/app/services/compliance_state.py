@@ -0,0 +1,304 @@
+"""
+Per-user compliance state (compliance_states), kept current so checks and
+dashboards read one row per user instead of scanning log history.
+
+  * submit_daily_log / submit_weekly_plan / submit_weekly_report update the
+    submitter's row in the same transaction (``record_*``);
+  * new users get a row, and new disciplinary records bump the monthly
+    query count, from an after_flush hook;
+  * sync pushes to the tracked tables recompute the owners' rows;
+  * ``roll_forward`` advances every row to today — counting the working
+    days since ``as_of`` into the miss streak and re-counting the 90-day
+    windows — and is idempotent, so ``compliance_loop`` runs it hourly;
+  * calendar edits rebuild the table (``rebuild``), since they can move
+    any user's last working-day log or streak.
+
+``recompute`` rebuilds rows from the raw tables and ``verify`` compares the
+table against them — see backend/rebuild_compliance_state.py.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Union
+from uuid import UUID
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.asal import PlanStatus, ReportStatus
+from app.models.disciplinary import DisciplinaryRecord
+from app.models.user import User
+from app.services.business_calendar import is_working_day_sql, working_day_count_sql
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+Executor = Union[AsyncSession, AsyncConnection]
+
+# Sync tables whose rows feed the state; pushes to them recompute owners
+TRACKED_SYNC_TABLES = {"daily_logs", "weekly_plans", "weekly_reports", "disciplinary_actions"}
+
+# Weekly plans/reports within this many days of as_of count as recent
+ROLLING_WINDOW_DAYS = 90
+
+# Enum labels as stored (member names)
+_LATE_STATUSES = "('LATE', 'MISSED')"
+
+_COLUMNS = (
+    "user_id", "as_of", "last_logged_date", "miss_streak", "late_plans_90d",
+    "late_reports_90d", "queries_month_start", "queries_month",
+)
+
+
+def _raw_state_sql(as_of: str) -> str:
+    """
+    SELECT of every state column computed from the raw tables as of the SQL
+    expression ``as_of``; the caller appends a WHERE on ``users``.
+    """
+    month_start = f"CAST(date_trunc('month', {as_of}) AS date)"
+    baseline = f"coalesce(logged.last_logged_date, CAST(users.created_at AS date) - 1, {as_of})"
+    return f"""
+    SELECT users.id AS user_id,
+           {as_of} AS as_of,
+           logged.last_logged_date,
+           {working_day_count_sql(baseline, as_of, "users.department")} AS miss_streak,
+           (SELECT count(*) FROM weekly_plans
+            WHERE weekly_plans.user_id = users.id AND weekly_plans.status IN {_LATE_STATUSES}
+              AND weekly_plans.week_start_date >= {as_of} - {ROLLING_WINDOW_DAYS}) AS late_plans_90d,
+           (SELECT count(*) FROM weekly_reports
+            WHERE weekly_reports.user_id = users.id AND weekly_reports.status IN {_LATE_STATUSES}
+              AND weekly_reports.week_start_date >= {as_of} - {ROLLING_WINDOW_DAYS}) AS late_reports_90d,
+           {month_start} AS queries_month_start,
+           (SELECT count(*) FROM disciplinary_records
+            WHERE disciplinary_records.user_id = users.id
+              AND disciplinary_records.created_at >= CAST({month_start} AS timestamp) AT TIME ZONE 'UTC'
+           ) AS queries_month
+    FROM users
+    LEFT JOIN LATERAL (
+        SELECT daily_logs.log_date AS last_logged_date FROM daily_logs
+        WHERE daily_logs.user_id = users.id AND {is_working_day_sql("daily_logs.log_date", "users.department")}
+        ORDER BY daily_logs.log_date DESC LIMIT 1
+    ) AS logged ON true
+"""
+
+
+def streak_at_sql(through: str) -> str:
+    """
+    SQL for a compliance_states row's miss streak as of ``through`` (joined
+    to ``users``) — its stored streak plus the working days since ``as_of``.
+    """
+    return (
+        "(CASE WHEN compliance_states.last_logged_date > compliance_states.as_of"
+        " THEN 0 ELSE compliance_states.miss_streak END + "
+        + working_day_count_sql(
+            "greatest(compliance_states.as_of, compliance_states.last_logged_date)", through, "users.department",
+        )
+        + ")"
+    )
+
+
+_TODAY = "CAST(:today AS date)"
+_INSERT = f"INSERT INTO compliance_states ({', '.join(_COLUMNS)}, updated_at) SELECT *, now() FROM ("
+_UPSERT_SET = ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:]) + ", updated_at = now()"
+
+_RECOMPUTE_SQL = text(
+    _INSERT + _raw_state_sql(_TODAY) + " WHERE users.id = ANY(:ids)) AS raw "
+    + "ON CONFLICT (user_id) DO UPDATE SET " + _UPSERT_SET
+).bindparams(bindparam("ids", type_=ARRAY(PG_UUID(as_uuid=True))))
+
+_RECOMPUTE_ALL_SQL = text(
+    _INSERT + _raw_state_sql(_TODAY) + ") AS raw "
+    + "ON CONFLICT (user_id) DO UPDATE SET " + _UPSERT_SET
+)
+
+_INSERT_MISSING_SQL = text(
+    _INSERT + _raw_state_sql(_TODAY)
+    + " WHERE NOT EXISTS (SELECT 1 FROM compliance_states WHERE compliance_states.user_id = users.id)) AS raw "
+    + "ON CONFLICT (user_id) DO NOTHING"
+)
+
+_ROLL_FORWARD_SQL = text(f"""
+    UPDATE compliance_states SET
+        miss_streak = {streak_at_sql(_TODAY)},
+        late_plans_90d = (SELECT count(*) FROM weekly_plans
+            WHERE weekly_plans.user_id = compliance_states.user_id AND weekly_plans.status IN {_LATE_STATUSES}
+              AND weekly_plans.week_start_date >= {_TODAY} - {ROLLING_WINDOW_DAYS}),
+        late_reports_90d = (SELECT count(*) FROM weekly_reports
+            WHERE weekly_reports.user_id = compliance_states.user_id AND weekly_reports.status IN {_LATE_STATUSES}
+              AND weekly_reports.week_start_date >= {_TODAY} - {ROLLING_WINDOW_DAYS}),
+        queries_month = CASE WHEN compliance_states.queries_month_start = CAST(:month_start AS date)
+                             THEN compliance_states.queries_month ELSE 0 END,
+        queries_month_start = CAST(:month_start AS date),
+        as_of = {_TODAY},
+        updated_at = now()
+    FROM users
+    WHERE users.id = compliance_states.user_id AND compliance_states.as_of < {_TODAY}
+""")
+
+# A log on a non-working day (or older than the last one) changes nothing
+_RECORD_DAILY_LOG_SQL = text(f"""
+    UPDATE compliance_states SET
+        miss_streak = CASE WHEN compliance_states.last_logged_date >= CAST(:log_date AS date)
+                                OR NOT {is_working_day_sql("CAST(:log_date AS date)", "users.department")}
+                           THEN compliance_states.miss_streak
+                           ELSE {working_day_count_sql("CAST(:log_date AS date)", "compliance_states.as_of", "users.department")}
+                      END,
+        last_logged_date = CASE WHEN {is_working_day_sql("CAST(:log_date AS date)", "users.department")}
+                                THEN greatest(compliance_states.last_logged_date, CAST(:log_date AS date))
+                                ELSE compliance_states.last_logged_date
+                           END,
+        updated_at = now()
+    FROM users
+    WHERE users.id = compliance_states.user_id AND compliance_states.user_id = :user_id
+    RETURNING compliance_states.user_id
+""")
+
+
+def _record_weekly_sql(column: str) -> Any:
+    return text(f"""
+        UPDATE compliance_states SET
+            {column} = {column} + CASE
+                WHEN CAST(:week_start AS date) >= as_of - {ROLLING_WINDOW_DAYS} THEN 1 ELSE 0 END,
+            updated_at = now()
+        WHERE user_id = :user_id
+        RETURNING user_id
+    """)
+
+
+_RECORD_WEEKLY_PLAN_SQL = _record_weekly_sql("late_plans_90d")
+_RECORD_WEEKLY_REPORT_SQL = _record_weekly_sql("late_reports_90d")
+
+_RECORD_QUERIES_SQL = text("""
+    UPDATE compliance_states SET
+        queries_month = CASE WHEN queries_month_start = CAST(:month_start AS date)
+                             THEN queries_month + :count ELSE :count END,
+        queries_month_start = CAST(:month_start AS date),
+        updated_at = now()
+    WHERE user_id = :user_id
+""")
+
+_VERIFY_SQL = text(f"""
+    WITH raw AS ({_raw_state_sql(_TODAY)})
+    SELECT raw.*, row_to_json(compliance_states) AS stored
+    FROM raw LEFT JOIN compliance_states ON compliance_states.user_id = raw.user_id
+    WHERE compliance_states.user_id IS NULL
+       OR compliance_states.as_of <> raw.as_of
+       OR compliance_states.last_logged_date IS DISTINCT FROM raw.last_logged_date
+       OR compliance_states.miss_streak <> raw.miss_streak
+       OR compliance_states.late_plans_90d <> raw.late_plans_90d
+       OR compliance_states.late_reports_90d <> raw.late_reports_90d
+       OR compliance_states.queries_month_start <> raw.queries_month_start
+       OR compliance_states.queries_month <> raw.queries_month
+    ORDER BY raw.user_id
+""")
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+# ─── Rebuild ─────────────────────────────────────────────────────────
+
+async def recompute(db: Executor, user_ids: Iterable[UUID], today: Optional[date] = None) -> None:
+    """Rebuild these users' rows from the raw tables, as of ``today``."""
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        await db.execute(_RECOMPUTE_SQL, {"ids": user_ids, "today": today or date.today()})
+
+
+async def rebuild(db: Executor, today: Optional[date] = None) -> int:
+    """Rebuild every user's row from the raw tables. Returns rows written."""
+    result = await db.execute(_RECOMPUTE_ALL_SQL, {"today": today or date.today()})
+    return result.rowcount
+
+
+async def verify(db: Executor, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Rows (as of ``today``) that differ from the raw tables, each with the
+    expected values and the ``stored`` row (None when missing). Roll the
+    table forward to ``today`` first.
+    """
+    result = await db.execute(_VERIFY_SQL, {"today": today or date.today()})
+    return [dict(row._mapping) for row in result]
+
+
+# ─── Roll-forward ────────────────────────────────────────────────────
+
+async def roll_forward(db: Executor, today: Optional[date] = None) -> Dict[str, int]:
+    """Advance every row to ``today`` and add rows for users without one."""
+    today = today or date.today()
+    advanced = await db.execute(_ROLL_FORWARD_SQL, {"today": today, "month_start": _month_start(today)})
+    return {"advanced": advanced.rowcount, "added": await add_missing(db, today)}
+
+
+async def add_missing(db: Executor, today: Optional[date] = None) -> int:
+    """
+    Add rows for users without one (e.g. created while startup roll-forward
+    was skipped on serverless). Returns rows added.
+    """
+    result = await db.execute(_INSERT_MISSING_SQL, {"today": today or date.today()})
+    return result.rowcount
+
+
+async def compliance_loop() -> None:
+    interval = settings.COMPLIANCE_ROLL_FORWARD_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await roll_forward(session)
+                await session.commit()
+            if result["advanced"] or result["added"]:
+                logger.info(
+                    f"Compliance state: {result['advanced']} rows rolled forward, {result['added']} added"
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Compliance state roll-forward failed: {e}")
+
+
+# ─── Submissions ─────────────────────────────────────────────────────
+
+async def record_daily_log(db: AsyncSession, user_id: UUID, log_date: date) -> None:
+    result = await db.execute(_RECORD_DAILY_LOG_SQL, {"user_id": user_id, "log_date": log_date})
+    if result.first() is None:
+        await recompute(db, [user_id])
+
+
+async def record_weekly_plan(db: AsyncSession, user_id: UUID, week_start: date, status: PlanStatus) -> None:
+    if status in (PlanStatus.LATE, PlanStatus.MISSED):
+        result = await db.execute(_RECORD_WEEKLY_PLAN_SQL, {"user_id": user_id, "week_start": week_start})
+        if result.first() is None:
+            await recompute(db, [user_id])
+
+
+async def record_weekly_report(db: AsyncSession, user_id: UUID, week_start: date, status: ReportStatus) -> None:
+    if status in (ReportStatus.LATE, ReportStatus.MISSED):
+        result = await db.execute(_RECORD_WEEKLY_REPORT_SQL, {"user_id": user_id, "week_start": week_start})
+        if result.first() is None:
+            await recompute(db, [user_id])
+
+
+@event.listens_for(Session, "after_flush")
+def _track_new_rows(session: Session, flush_context) -> None:
+    new_users = [obj.id for obj in session.new if isinstance(obj, User)]
+    queries = Counter(
+        obj.user_id for obj in session.new
+        if isinstance(obj, DisciplinaryRecord) and obj.user_id not in new_users
+    )
+    if not new_users and not queries:
+        return
+    today = date.today()
+    connection = session.connection()
+    if new_users:
+        connection.execute(_RECOMPUTE_SQL, {"ids": sorted(new_users), "today": today})
+    for user_id, count in sorted(queries.items()):
+        connection.execute(_RECORD_QUERIES_SQL, {
+            "user_id": user_id, "count": count, "month_start": _month_start(today),
+        })
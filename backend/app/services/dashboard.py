@@ -0,0 +1,97 @@
+"""
+Figures for /auth/dashboard-stats, cached for DASHBOARD_STATS_TTL_SECONDS.
+
+The user breakdown is one aggregate over users (a FILTER per role); any
+flush that creates or deletes a user, or changes one's role or active
+flag, sends ``pg_notify(dashboard_invalidate)`` so every worker drops the
+cached breakdown when it commits. The 7-day login count is left to expire.
+Like the principal cache, nothing is cached while the LISTEN connection
+is down, or on serverless.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.database import IS_SERVERLESS
+from app.core.notify import notification_hub
+from app.models.user import AuditLog, User, UserRole
+
+settings = get_settings()
+
+DASHBOARD_CHANNEL = "dashboard_invalidate"
+
+_cache: TTLCache[Any] = TTLCache(8, settings.DASHBOARD_STATS_TTL_SECONDS)
+# Bumped on every invalidation — a breakdown that raced one is not cached
+_epoch = 0
+
+
+def enabled() -> bool:
+    return not IS_SERVERLESS and settings.DASHBOARD_STATS_TTL_SECONDS > 0 and notification_hub.running
+
+
+def invalidate() -> None:
+    global _epoch
+    _epoch += 1
+    _cache.pop("users")
+
+
+notification_hub.on(DASHBOARD_CHANNEL, lambda payload: invalidate())
+
+
+async def start() -> None:
+    if not IS_SERVERLESS and settings.DASHBOARD_STATS_TTL_SECONDS > 0:
+        await notification_hub.start()
+
+
+async def user_breakdown(db: AsyncSession) -> Dict[str, Any]:
+    cached = _cache.get("users") if enabled() else None
+    if cached is not None:
+        return cached
+    epoch = _epoch
+    columns = [func.count().label("total"), func.count().filter(User.is_active == True).label("active")]
+    columns += [func.count().filter(User.role == role).label(role.value) for role in UserRole]
+    row = (await db.execute(select(*columns).select_from(User))).one()._mapping
+    breakdown = {
+        "total_users": row["total"],
+        "active_users": row["active"],
+        "inactive_users": row["total"] - row["active"],
+        "users_by_role": {role.value: row[role.value] for role in UserRole},
+    }
+    if enabled() and epoch == _epoch:
+        _cache.set("users", breakdown)
+    return breakdown
+
+
+async def recent_logins(db: AsyncSession, days: int = 7) -> int:
+    key = f"logins_{days}d"
+    cached = _cache.get(key) if enabled() else None
+    if cached is not None:
+        return cached
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    count = (await db.execute(
+        select(func.count()).select_from(AuditLog).where(
+            AuditLog.action == "LOGIN",
+            AuditLog.timestamp >= since,
+        )
+    )).scalar()
+    if enabled():
+        _cache.set(key, count)
+    return count
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_user_changes(session: Session, flush_context) -> None:
+    changed = False
+    for obj in list(session.new) + list(session.deleted):
+        changed = changed or isinstance(obj, User)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            changed = changed or attrs.role.history.has_changes() or attrs.is_active.history.has_changes()
+    if changed:
+        session.connection().execute(text("SELECT pg_notify(:channel, '')"), {"channel": DASHBOARD_CHANNEL})
@@ -0,0 +1,106 @@
+"""
+Device activity — coalesced writes of DeviceRegistration.last_sync_at.
+
+Sync requests record "device X synced at T" in memory; a background task
+writes every pending timestamp with one
+``UPDATE ... FROM unnest(:device_ids, :synced_at)`` every
+DEVICE_ACTIVITY_FLUSH_SECONDS, and once more on shutdown. A burst of
+syncs from one device costs a single row write instead of one per request.
+
+Serverless deployments have no background task, so there (or with the
+flush interval set to 0) each touch is written straight through with the
+request's own session. The buffer holds at most
+DEVICE_ACTIVITY_MAX_PENDING devices; reaching it forces a flush.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, IS_SERVERLESS
+from app.models.sync import DeviceRegistration
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+# Timestamps only move forward — a late flush never rewinds a newer write
+_FLUSH_SQL = text("""
+    UPDATE device_registrations AS d
+    SET last_sync_at = GREATEST(COALESCE(d.last_sync_at, v.synced_at), v.synced_at)
+    FROM unnest(CAST(:device_ids AS varchar[]), CAST(:synced_at AS timestamptz[]))
+         AS v(device_id, synced_at)
+    WHERE d.device_id = v.device_id
+""")
+
+
+class DeviceActivity:
+    def __init__(self, max_pending: int):
+        self._max_pending = max_pending
+        self._pending: Dict[str, datetime] = {}
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def coalescing(self) -> bool:
+        return not IS_SERVERLESS and settings.DEVICE_ACTIVITY_FLUSH_SECONDS > 0
+
+    def pending(self, device_id: str) -> Optional[datetime]:
+        """Last sync recorded for ``device_id`` but not yet written."""
+        return self._pending.get(device_id)
+
+    async def touch(self, db: AsyncSession, device_id: str) -> None:
+        """Record that ``device_id`` synced just now."""
+        now = datetime.now(timezone.utc)
+        if not self.coalescing:
+            await db.execute(
+                update(DeviceRegistration)
+                .where(DeviceRegistration.device_id == device_id)
+                .values(last_sync_at=now)
+            )
+            return
+        self._pending[device_id] = now
+        if len(self._pending) >= self._max_pending:
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write every pending timestamp in one statement. Returns devices written."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(_FLUSH_SQL, {
+                        "device_ids": list(batch),
+                        "synced_at": list(batch.values()),
+                    })
+                    await session.commit()
+            except Exception:
+                # Put the batch back (newer touches win), within the bound
+                for device_id, synced_at in batch.items():
+                    if len(self._pending) >= self._max_pending:
+                        break
+                    self._pending.setdefault(device_id, synced_at)
+                raise
+            return len(batch)
+
+    async def run(self) -> None:
+        """Background flusher; cancel to stop (pending writes are flushed first)."""
+        try:
+            while True:
+                await asyncio.sleep(settings.DEVICE_ACTIVITY_FLUSH_SECONDS)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.warning(f"Device activity flush failed: {e}")
+        finally:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Device activity final flush failed: {e}")
+
+
+device_activity = DeviceActivity(settings.DEVICE_ACTIVITY_MAX_PENDING)
@@ -0,0 +1,110 @@
+"""
+Idempotency keys — lets a device safely retry a write whose response it
+never received.
+
+The stored response is written in the same transaction as the work, so a
+key is only ever remembered for work that actually committed. Two
+concurrent requests with the same key collide on the unique constraint;
+the loser is rolled back and told to retry, and that retry gets the
+stored response back. A hash of the request body is stored with the
+response; reusing a key with a different body is rejected with 422.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.sync import IdempotencyRecord
+
+settings = get_settings()
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Expired rows removed per write — keeps cleanup cost bounded per request.
+PURGE_BATCH_SIZE = 100
+
+
+def fingerprint(body: Any) -> str:
+    """SHA-256 of the request body's canonical JSON."""
+    canonical = json.dumps(jsonable_encoder(body), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def replay(db: AsyncSession, user_id, scope: str, key: Optional[str], body: Any) -> Optional[JSONResponse]:
+    """
+    The stored response for this key, or None if the request is new.
+    Raises 422 if the key was used with a different body.
+    """
+    if not key:
+        return None
+    result = await db.execute(
+        select(IdempotencyRecord).where(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.expires_at > datetime.now(timezone.utc),
+        )
+    )
+    record = result.scalar_one_or_none()
+    if record is None:
+        return None
+    if record.request_hash is not None and record.request_hash != fingerprint(body):
+        raise HTTPException(
+            status_code=422,
+            detail="This Idempotency-Key was already used with a different request body",
+        )
+    return JSONResponse(
+        status_code=record.status_code,
+        content=record.response,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def remember(
+    db: AsyncSession, user_id, scope: str, key: Optional[str], body: Any, response: Any, status_code: int = 200,
+) -> None:
+    """Store the response (and the request body's hash) for this key alongside the request's own writes."""
+    if not key:
+        return
+    now = datetime.now(timezone.utc)
+    expired = (
+        select(IdempotencyRecord.id)
+        .where(IdempotencyRecord.expires_at <= now)
+        .limit(PURGE_BATCH_SIZE)
+        .scalar_subquery()
+    )
+    await db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id.in_(expired)))
+    # A key that expired but was not purged yet must not block reuse
+    await db.execute(
+        delete(IdempotencyRecord).where(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.expires_at <= now,
+        )
+    )
+
+    db.add(IdempotencyRecord(
+        key=key,
+        user_id=user_id,
+        scope=scope,
+        request_hash=fingerprint(body),
+        status_code=status_code,
+        response=jsonable_encoder(response),
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    ))
+    try:
+        await db.flush()
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is already in progress; retry shortly",
+        )
@@ -0,0 +1,231 @@
+"""
+Monthly partitions for the append-only log tables (audit_logs, sync_events).
+
+Each table is range-partitioned on its timestamp into ``<table>_pYYYY_MM``
+partitions, plus a ``<table>_default`` partition that catches anything
+outside the pre-created months. Maintenance:
+  - ``ensure_partitions`` creates the current month and the next
+    PARTITION_PREMAKE_MONTHS, so inserts never land in the default partition;
+  - ``archive_expired`` exports every partition older than the table's
+    retention to ARCHIVE_DIR — Parquet when pyarrow is installed, gzipped
+    CSV otherwise — and only then detaches and drops it.
+Time-bounded queries (``WHERE timestamp >= ...``) only touch the partitions
+that can match.
+"""
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.core.database import engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional — archives fall back to CSV
+    pa = None
+    pq = None
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+# Partitioned table -> (partition column, retention in months; 0 keeps forever)
+PARTITIONED_TABLES = {
+    "audit_logs": ("timestamp", lambda: settings.AUDIT_RETENTION_MONTHS),
+    "sync_events": ("started_at", lambda: settings.SYNC_EVENT_RETENTION_MONTHS),
+}
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month.year:04d}_{month.month:02d}"
+
+
+def _this_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return today.replace(day=1)
+
+
+async def list_partitions(conn: AsyncConnection, table_name: str) -> List[Tuple[str, date]]:
+    """Monthly partitions of ``table_name`` as (name, first day of month), oldest first."""
+    result = await conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table_name
+    """), {"table_name": table_name})
+    pattern = re.compile(rf"^{table_name}_p(\d{{4}})_(\d{{2}})$")
+    months = []
+    for (name,) in result:
+        match = pattern.match(name)
+        if match:
+            months.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(months, key=lambda item: item[1])
+
+
+async def ensure_partitions(conn: AsyncConnection, since: Optional[date] = None) -> List[str]:
+    """
+    Create the default partition and any missing monthly ones, from ``since``
+    (default: this month) through PARTITION_PREMAKE_MONTHS ahead.
+    Returns the names created.
+    """
+    created = []
+    first = min(since.replace(day=1), _this_month()) if since else _this_month()
+    last = _add_months(_this_month(), settings.PARTITION_PREMAKE_MONTHS)
+    months = []
+    while first <= last:
+        months.append(first)
+        first = _add_months(first, 1)
+    for table_name in PARTITIONED_TABLES:
+        await conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{table_name}_default" PARTITION OF "{table_name}" DEFAULT'
+        ))
+        existing = {name for name, _ in await list_partitions(conn, table_name)}
+        for month in months:
+            name = partition_name(table_name, month)
+            if name in existing:
+                continue
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text(
+                        f'CREATE TABLE "{name}" PARTITION OF "{table_name}" '
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                    ))
+                created.append(name)
+            except DBAPIError as e:
+                # Typically rows for that month already sit in the default partition
+                logger.warning(f"Could not create partition {name}: {e}")
+    return created
+
+
+def _archive_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+async def _export_partition(conn: AsyncConnection, name: str, order_column: str, target: Path) -> int:
+    """Write every row of partition ``name`` to ``target``. Returns rows written."""
+    result = await conn.stream(text(f'SELECT * FROM "{name}" ORDER BY "{order_column}"'))
+    tmp = target.with_name(target.name + ".tmp")
+    rows = 0
+    columns = list(result.keys())
+    writer = None
+    try:
+        if pq is not None:
+            async for partition in result.partitions(ARCHIVE_BATCH_SIZE):
+                batch = {column: [_archive_value(row[i]) for row in partition] for i, column in enumerate(columns)}
+                table = pa.table(batch)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(tmp), table.schema, compression="zstd")
+                writer.write_table(table.cast(writer.schema))
+                rows += len(partition)
+        else:
+            with gzip.open(tmp, "wt", newline="") as f:
+                out = csv.writer(f)
+                out.writerow(columns)
+                async for partition in result.partitions(ARCHIVE_BATCH_SIZE):
+                    out.writerows([[_archive_value(v) for v in row] for row in partition])
+                    rows += len(partition)
+    finally:
+        if writer is not None:
+            writer.close()
+        await result.close()
+    if rows:
+        os.replace(tmp, target)
+    elif tmp.exists():
+        tmp.unlink()
+    return rows
+
+
+async def archive_expired(now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Archive and drop partitions wholly older than each table's retention.
+    Each partition is exported, then detached, re-counted and dropped in one
+    short transaction; a failed export, a drop that cannot get its locks
+    within PARTITION_LOCK_TIMEOUT_MS, or rows that arrived after the export
+    leave the partition for next time.
+    """
+    first = (now or datetime.now(timezone.utc)).date().replace(day=1)
+    archived = []
+    for table_name, (column, retention) in PARTITIONED_TABLES.items():
+        months = retention()
+        if months <= 0:
+            continue
+        cutoff = _add_months(first, -months)
+        directory = Path(settings.ARCHIVE_DIR) / table_name
+        async with engine.connect() as conn:
+            expired = [(name, month) for name, month in await list_partitions(conn, table_name)
+                       if _add_months(month, 1) <= cutoff]
+        for name, month in expired:
+            directory.mkdir(parents=True, exist_ok=True)
+            target = directory / (f"{name}.parquet" if pq is not None else f"{name}.csv.gz")
+            async with engine.connect() as conn:
+                rows = await _export_partition(conn, name, column, target)
+            try:
+                async with engine.begin() as conn:
+                    # Detaching locks the parent (and users, via the foreign key)
+                    # exclusively — give up rather than queue writers behind us
+                    await conn.execute(text(f"SET LOCAL lock_timeout = '{settings.PARTITION_LOCK_TIMEOUT_MS}ms'"))
+                    await conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+                    remaining = (await conn.execute(text(f'SELECT count(*) FROM "{name}"'))).scalar_one()
+                    if remaining != rows:
+                        # A late backfill landed after the export — redo it next time
+                        await conn.rollback()
+                        continue
+                    await conn.execute(text(f'DROP TABLE "{name}"'))
+            except DBAPIError as e:
+                logger.warning(f"Partition {name} exported but not dropped, will retry: {e.orig}")
+                continue
+            archived.append({
+                "table_name": table_name,
+                "partition": name,
+                "month": month.isoformat(),
+                "rows": rows,
+                "file": str(target) if rows else None,
+            })
+    return archived
+
+
+async def maintain_partitions() -> Dict[str, Any]:
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn)
+    archived = await archive_expired()
+    return {"created": created, "archived": archived}
+
+
+async def partition_loop() -> None:
+    interval = settings.PARTITION_MAINTENANCE_INTERVAL_HOURS * 3600
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await maintain_partitions()
+            if result["created"] or result["archived"]:
+                logger.info(
+                    f"Partition maintenance: {len(result['created'])} created, "
+                    f"{len(result['archived'])} archived"
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Partition maintenance failed: {e}")
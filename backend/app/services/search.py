@@ -0,0 +1,212 @@
+"""
+Full-text search over ASAL content — daily logs, weekly plans and weekly
+reports.
+
+Each table has a stored ``search_vector`` tsvector generated from its text
+and JSON fields (JSON contributes its string values only), weighted A–C,
+with a GIN index. ``ensure_search_columns`` adds both — the first run
+rewrites each table, so it runs from ``add_search_columns.py`` rather
+than at startup, and searches answer 503 until it has. The column is
+left off the models on purpose, so ORM loads, sync pulls, snapshots and
+pushes never carry it.
+
+A search is one ``UNION ALL`` of the three tables — each ``search_vector @@
+websearch_to_tsquery(...)`` under the caller's row policy — ranked with
+``ts_rank`` and paged by keyset on (rank, day, id). Snippets are built
+with ``ts_headline`` for the returned page only. They are plain,
+unescaped user text with matched terms between ``HIGHLIGHT_START`` and
+``HIGHLIGHT_STOP`` — clients highlight them, never render them as HTML.
+"""
+import enum
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Float, and_, case, cast, func, literal, literal_column, select, text, tuple_, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core import pagination, policy
+from app.models.asal import DailyLog, WeeklyPlan, WeeklyReport
+from app.models.user import User
+
+# Text search configuration for both the stored vectors and the queries
+SEARCH_CONFIG = "english"
+
+MAX_PAGE_SIZE = 100
+
+# Snippet highlight markers (STX/ETX) — control characters rather than
+# tags, so no markup is ever mixed into user-entered text
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+# Set once every table is seen to have its column — columns are never dropped
+_columns_ready = False
+
+
+class SearchKind(str, enum.Enum):
+    DAILY_LOG = "daily_log"
+    WEEKLY_PLAN = "weekly_plan"
+    WEEKLY_REPORT = "weekly_report"
+
+
+@dataclass(frozen=True)
+class Searchable:
+    model: type
+    day: Any                                # log_date / week_start_date
+    text_fields: Tuple[Tuple[str, str], ...]  # (column, weight)
+    json_fields: Tuple[Tuple[str, str], ...]
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    def vector_sql(self) -> str:
+        """Generated-column expression for ``search_vector``."""
+        parts = [
+            f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+            f"coalesce({column}::jsonb, '[]'::jsonb), '[\"string\"]'), '{weight}')"
+            for column, weight in self.json_fields
+        ] + [
+            f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+            for column, weight in self.text_fields
+        ]
+        return " || ".join(parts)
+
+    def document_sql(self) -> str:
+        """The searched text as one string, for ``ts_headline``."""
+        parts = [
+            f"(SELECT string_agg(value #>> '{{}}', ' ') FROM jsonb_path_query("
+            f"coalesce({self.table}.{column}::jsonb, '[]'::jsonb), "
+            f"'strict $.** ? (@.type() == \"string\")') AS value)"
+            for column, _ in self.json_fields
+        ] + [f"{self.table}.{column}" for column, _ in self.text_fields]
+        return f"concat_ws(' ', {', '.join(parts)})"
+
+    @property
+    def vector(self):
+        return literal_column(f"{self.table}.search_vector", type_=TSVECTOR)
+
+
+SEARCHABLE: Dict[SearchKind, Searchable] = {
+    SearchKind.DAILY_LOG: Searchable(
+        DailyLog, DailyLog.log_date,
+        text_fields=(("key_achievements", "A"), ("challenges", "C"), ("tomorrow_plan", "C")),
+        json_fields=(("activities", "B"),),
+    ),
+    SearchKind.WEEKLY_PLAN: Searchable(
+        WeeklyPlan, WeeklyPlan.week_start_date,
+        text_fields=(),
+        json_fields=(("objectives", "A"), ("time_bound_actions", "B"), ("resource_requests", "C")),
+    ),
+    SearchKind.WEEKLY_REPORT: Searchable(
+        WeeklyReport, WeeklyReport.week_start_date,
+        text_fields=(("lessons_learned", "B"), ("deviation_explanation", "B"), ("next_week_adjustments", "C")),
+        json_fields=(("objectives_achieved", "A"),),
+    ),
+}
+
+
+async def ensure_search_columns(conn: AsyncConnection) -> None:
+    """Add each table's ``search_vector`` column and GIN index if missing (the first run rewrites the table)."""
+    for searchable in SEARCHABLE.values():
+        await conn.execute(text(
+            f"ALTER TABLE {searchable.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({searchable.vector_sql()}) STORED"
+        ))
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{searchable.table}_search_vector "
+            f"ON {searchable.table} USING gin (search_vector)"
+        ))
+
+
+async def _require_search_columns(db: AsyncSession) -> None:
+    global _columns_ready
+    if _columns_ready:
+        return
+    present = (await db.execute(
+        text(
+            "SELECT count(*) FROM information_schema.columns "
+            "WHERE table_schema = 'public' AND column_name = 'search_vector' AND table_name = ANY(:tables)"
+        ),
+        {"tables": [searchable.table for searchable in SEARCHABLE.values()]},
+    )).scalar()
+    if present < len(SEARCHABLE):
+        raise HTTPException(
+            status_code=503,
+            detail="Search is not set up on this database yet — run add_search_columns.py",
+        )
+    _columns_ready = True
+
+
+async def search(
+    db: AsyncSession,
+    user: User,
+    query: str,
+    kinds: Optional[Sequence[SearchKind]] = None,
+    user_id: Optional[UUID] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of matches the caller may see, best first, and the cursor for
+    the next page (None on the last). ``query`` takes web-search syntax:
+    quoted phrases, ``or``, ``-excluded``.
+    """
+    await _require_search_columns(db)
+    page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+    tsquery = func.websearch_to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), query)
+
+    branches = []
+    for kind in kinds or list(SearchKind):
+        searchable = SEARCHABLE[kind]
+        model = searchable.model
+        branch = select(
+            literal(kind.value).label("kind"),
+            model.id.label("id"),
+            model.user_id.label("user_id"),
+            searchable.day.label("day"),
+            func.ts_rank(searchable.vector, tsquery, type_=Float).label("rank"),
+        ).where(searchable.vector.op("@@")(tsquery))
+        if user_id and policy.visibility(model, user.role) is policy.Visibility.ALL:
+            branch = branch.where(model.user_id == user_id)
+        if start_date:
+            branch = branch.where(searchable.day >= start_date)
+        if end_date:
+            branch = branch.where(searchable.day <= end_date)
+        branches.append(policy.scoped(branch, model, user))
+
+    matches = union_all(*branches).subquery("matches")
+    keys = (matches.c.rank, matches.c.day, matches.c.id)
+    page_query = select(matches)
+    if cursor:
+        page_query = page_query.where(tuple_(*keys) < tuple_(*pagination.decode_cursor(cursor, keys)))
+    page = page_query.order_by(*(key.desc() for key in keys)).limit(page_size + 1).subquery("page")
+
+    # Snippets for the page only — join each row back to its table
+    snippet_query = select(page)
+    documents = []
+    for kind, searchable in SEARCHABLE.items():
+        table = searchable.model.__table__
+        snippet_query = snippet_query.outerjoin(table, and_(page.c.kind == kind.value, table.c.id == page.c.id))
+        documents.append((page.c.kind == kind.value, literal_column(searchable.document_sql())))
+    snippet = func.ts_headline(
+        cast(literal(SEARCH_CONFIG), REGCONFIG), case(*documents), tsquery,
+        f"MaxFragments=2, MaxWords=20, MinWords=5, "
+        f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}"',
+    )
+    snippet_query = snippet_query.add_columns(snippet.label("snippet")).order_by(
+        page.c.rank.desc(), page.c.day.desc(), page.c.id.desc(),
+    )
+
+    rows = [dict(row._mapping) for row in await db.execute(snippet_query)]
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = pagination.encode_cursor([last["rank"], last["day"], last["id"]])
+    return rows, next_cursor
@@ -0,0 +1,306 @@
+"""
+Sync change log — records every write to a syncable table and serves
+cursor-based delta pulls from it.
+
+Cursors are transaction ids. A pull only returns changes written by
+transactions older than the oldest one still in flight, so a device that
+stores ``next_cursor`` can never skip a change that commits late.
+Deletions and deactivations are logged as tombstones and served in the
+same window, so devices never need a full re-list to prune rows.
+"""
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, exists, func, insert, literal_column, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
+
+from app.core import policy
+from app.core.database import AsyncSessionLocal
+from app.models.asal import DailyLog, WeeklyPlan, WeeklyReport
+from app.models.inventory import FinishedGood, InventoryTransfer
+from app.models.sales import Order
+from app.models.disciplinary import DisciplinaryRecord, PayrollRecord
+from app.models.sync import SyncChange, SyncCompaction, SyncEvent, SyncTombstone
+from app.models.user import User
+
+# Sync table name (as used by devices) → Model
+SYNC_MODELS = {
+    "daily_logs": DailyLog,
+    "weekly_plans": WeeklyPlan,
+    "weekly_reports": WeeklyReport,
+    "inventory": FinishedGood,
+    "transfers": InventoryTransfer,
+    "orders": Order,
+    "payroll": PayrollRecord,
+    "disciplinary_actions": DisciplinaryRecord,
+}
+_TABLE_BY_MODEL = {model: name for name, model in SYNC_MODELS.items()}
+
+# NOTIFY channel carrying {"table_name", "cursor"} hints to the change feed
+SYNC_CHANGES_CHANNEL = "sync_changes"
+
+# Rows fetched per server-side cursor round-trip when streaming a pull.
+STREAM_BATCH_SIZE = 1000
+
+# Every transaction id below this has either committed or rolled back.
+TXID_HORIZON = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def _notify_statement(table_names: Iterable[str]):
+    """One NOTIFY per changed table, delivered by Postgres only if the transaction commits."""
+    return text(
+        "SELECT pg_notify(:channel, json_build_object("
+        "'table_name', t, 'cursor', pg_current_xact_id()::text::bigint)::text) "
+        "FROM unnest(CAST(:tables AS text[])) AS t"
+    ).bindparams(channel=SYNC_CHANGES_CHANNEL, tables=sorted(set(table_names)))
+
+
+async def record_changes(db: AsyncSession, table_name: str, rows: Iterable[Tuple[Any, int]]) -> None:
+    """Log (record_id, version) pairs written outside the ORM unit of work (bulk statements)."""
+    values = [
+        {"table_name": table_name, "record_id": record_id, "version": version or 1}
+        for record_id, version in rows
+    ]
+    if values:
+        await db.execute(insert(SyncChange), values)
+        await db.execute(_notify_statement([table_name]))
+
+
+async def record_deletions(
+    db: AsyncSession, table_name: str, rows: Iterable[Tuple[Any, Any]], reason: str = "deleted",
+) -> None:
+    """
+    Tombstone (record_id, owner user_id or None) pairs removed outside the
+    ORM unit of work (bulk statements).
+    """
+    values = [
+        {"table_name": table_name, "record_id": record_id, "user_id": owner, "reason": reason}
+        for record_id, owner in rows
+    ]
+    if values:
+        await db.execute(insert(SyncTombstone), values)
+        await db.execute(_notify_statement([table_name]))
+
+
+def _owner(obj) -> Any:
+    column = policy.owner_column(type(obj))
+    return getattr(obj, column.key) if column is not None else None
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session: Session, flush_context) -> None:
+    """
+    Append a change row for every syncable object inserted or modified in
+    this flush, and a tombstone for every one deleted.
+    """
+    touched = list(session.new) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]
+    values = []
+    tombstones = []
+    for obj in touched:
+        table_name = _TABLE_BY_MODEL.get(type(obj))
+        if table_name is not None:
+            values.append({"table_name": table_name, "record_id": obj.id, "version": obj.version or 1})
+    for obj in session.deleted:
+        table_name = _TABLE_BY_MODEL.get(type(obj))
+        if table_name is not None:
+            tombstones.append({
+                "table_name": table_name, "record_id": obj.id, "user_id": _owner(obj), "reason": "deleted",
+            })
+    if values or tombstones:
+        connection = session.connection()
+        if values:
+            connection.execute(insert(SyncChange.__table__), values)
+        if tombstones:
+            connection.execute(insert(SyncTombstone.__table__), tombstones)
+        connection.execute(_notify_statement(v["table_name"] for v in values + tombstones))
+
+
+async def requires_reset(db: AsyncSession, table_name: str, cursor: int) -> bool:
+    """
+    True if tombstones newer than ``cursor`` have been purged — the device
+    may hold rows deleted since, and must re-bootstrap from cursor 0.
+    """
+    if cursor == 0:
+        return False
+    purged = (await db.execute(
+        select(SyncCompaction.purged_through_txid).where(SyncCompaction.table_name == table_name)
+    )).scalar_one_or_none()
+    return purged is not None and cursor < purged
+
+
+async def change_window(
+    db: AsyncSession, table_name: str, cursor: int, limit: Optional[int] = None,
+) -> Tuple[int, bool]:
+    """
+    Resolve the upper txid bound for a pull starting after ``cursor``.
+    Returns (upper, has_more). Whole transactions are always kept together,
+    so a page may run slightly over ``limit``.
+    """
+    if limit is None:
+        horizon = (await db.execute(select(TXID_HORIZON))).scalar_one()
+        return max(cursor, horizon - 1), False
+
+    logged = union_all(*(
+        select(log.txid).where(
+            log.table_name == table_name,
+            log.txid > cursor,
+            log.txid < TXID_HORIZON,
+        )
+        for log in (SyncChange, SyncTombstone)
+    )).subquery()
+    cutoff = (
+        select(logged.c.txid)
+        .order_by(logged.c.txid)
+        .offset(limit - 1).limit(1)
+        .scalar_subquery()
+    )
+    horizon, cutoff_txid = (await db.execute(select(TXID_HORIZON, cutoff))).one()
+    if cutoff_txid is None:
+        return max(cursor, horizon - 1), False
+    return cutoff_txid, True
+
+
+def changed_rows_query(table_name: str, cursor: int, upper: int, user: Optional[User] = None) -> Select:
+    """
+    Current state of every row changed in (cursor, upper], oldest change
+    first — minus rows deleted at or after their latest change, and
+    rows ``user`` may not see.
+    """
+    model = SYNC_MODELS[table_name]
+    table = model.__table__
+    changed = (
+        select(SyncChange.record_id, func.max(SyncChange.txid).label("txid"))
+        .where(
+            SyncChange.table_name == table_name,
+            SyncChange.txid > cursor,
+            SyncChange.txid <= upper,
+        )
+        .group_by(SyncChange.record_id)
+        .subquery()
+    )
+    tombstoned = exists().where(
+        SyncTombstone.table_name == table_name,
+        SyncTombstone.record_id == changed.c.record_id,
+        SyncTombstone.txid >= changed.c.txid,
+        SyncTombstone.txid <= upper,
+    )
+    stmt = (
+        select(table)
+        .join(changed, table.c.id == changed.c.record_id)
+        .where(~tombstoned)
+        .order_by(changed.c.txid, table.c.id)
+    )
+    return policy.scoped(stmt, model, user) if user is not None else stmt
+
+
+def _may_see_any(table_name: str, user: Optional[User]) -> bool:
+    return user is None or policy.visibility(SYNC_MODELS[table_name], user.role) is not policy.Visibility.NONE
+
+
+def deleted_ids_query(table_name: str, cursor: int, upper: int, user: Optional[User] = None) -> Select:
+    """
+    Ids tombstoned in (cursor, upper] and not written again since — for a
+    ``user`` who sees only their own rows, only their own records' ids.
+    """
+    later = aliased(SyncChange)
+    rewritten = exists().where(
+        later.table_name == table_name,
+        later.record_id == SyncTombstone.record_id,
+        later.txid > SyncTombstone.txid,
+        later.txid <= upper,
+    )
+    stmt = (
+        select(SyncTombstone.record_id)
+        .where(
+            SyncTombstone.table_name == table_name,
+            SyncTombstone.txid > cursor,
+            SyncTombstone.txid <= upper,
+            ~rewritten,
+        )
+        .group_by(SyncTombstone.record_id)
+        .order_by(func.max(SyncTombstone.txid))
+    )
+    if user is not None and policy.visibility(SYNC_MODELS[table_name], user.role) is policy.Visibility.OWN:
+        stmt = stmt.where(SyncTombstone.user_id == user.id)
+    return stmt
+
+
+async def fetch_changes(
+    db: AsyncSession, table_name: str, cursor: int, limit: int, user: Optional[User] = None,
+) -> Tuple[List[Dict[str, Any]], List[Any], int, bool]:
+    """One page of a delta pull, limited to rows ``user`` may see: (records, deleted_ids, next_cursor, has_more)."""
+    upper, has_more = await change_window(db, table_name, cursor, limit)
+    if upper <= cursor:
+        return [], [], cursor, False
+    result = await db.execute(changed_rows_query(table_name, cursor, upper, user))
+    records = [dict(row._mapping) for row in result]
+    deleted: List[Any] = []
+    # A device pulling from scratch holds nothing to delete
+    if cursor > 0 and _may_see_any(table_name, user):
+        deleted = list((await db.execute(deleted_ids_query(table_name, cursor, upper, user))).scalars())
+    return records, deleted, upper, has_more
+
+
+async def stream_changes(
+    table_name: str, cursor: int, upper: int, sync_event_id, sync_event_started_at: datetime,
+    compress: bool = False, user: Optional[User] = None,
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON stream of every row changed in (cursor, upper].
+    Rows come off a server-side cursor ``STREAM_BATCH_SIZE`` at a time and
+    are written out (and optionally gzipped) as they arrive, so memory stays
+    flat whatever the result size. Lines are:
+      {"type": "begin", "table_name": ..., "cursor": ...}
+      {"type": "record", "data": {...}}            (one per row)
+      {"type": "delete", "id": ...}                (one per deleted record)
+      {"type": "end", "next_cursor": ..., "records": ..., "deleted": ...}
+    A device should only advance its cursor once it has read the end line.
+    The sync event is addressed by its full key, (id, started_at), so the
+    closing update only touches that event's monthly partition.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(lines: List[Dict[str, Any]]) -> bytes:
+        data = "".join(json.dumps(jsonable_encoder(line)) + "\n" for line in lines).encode("utf-8")
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield encode([{"type": "begin", "table_name": table_name, "cursor": cursor}])
+
+    count = 0
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            changed_rows_query(table_name, cursor, upper, user)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            count += len(partition)
+            yield encode([{"type": "record", "data": dict(row._mapping)} for row in partition])
+
+        deleted = 0
+        if cursor > 0 and _may_see_any(table_name, user):
+            result = await session.stream(
+                deleted_ids_query(table_name, cursor, upper, user)
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                deleted += len(partition)
+                yield encode([{"type": "delete", "id": row.record_id} for row in partition])
+
+        await session.execute(
+            update(SyncEvent)
+            .where(SyncEvent.id == sync_event_id, SyncEvent.started_at == sync_event_started_at)
+            .values(records_synced=count, completed_at=datetime.now(timezone.utc), success=True)
+        )
+        await session.commit()
+
+    tail = encode([{"type": "end", "next_cursor": upper, "records": count, "deleted": deleted}])
+    yield tail + (compressor.flush() if compressor is not None else b"")
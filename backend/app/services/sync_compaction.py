@@ -0,0 +1,126 @@
+"""
+Sync change-log compaction.
+
+Keeps sync_changes and sync_tombstones from growing without bound:
+  - change rows superseded by a newer change to the same record are dropped
+    (a pull only ever serves the newest one);
+  - change rows for records since deleted are dropped (the tombstone says it all);
+  - tombstones older than TOMBSTONE_RETENTION_DAYS are purged, and the
+    newest purged txid is recorded in sync_compactions so that a device
+    whose cursor predates it is told to re-bootstrap.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.sync import SyncChange, SyncCompaction, SyncTombstone
+from app.services.sync_changes import SYNC_MODELS, TXID_HORIZON
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+# Advisory lock class — one worker compacts a given table at a time
+_COMPACTION_LOCK_KEY = 0x53594E43  # "SYNC"
+
+
+async def compact_table(session, table_name: str, purge_before: datetime) -> Optional[Dict[str, Any]]:
+    """Compact one table in the session's current transaction; None if another worker holds it."""
+    locked = (await session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key, hashtext(:table_name))"),
+        {"key": _COMPACTION_LOCK_KEY, "table_name": table_name},
+    )).scalar_one()
+    if not locked:
+        return None
+    horizon = (await session.execute(select(TXID_HORIZON))).scalar_one()
+
+    newer = aliased(SyncChange)
+    superseded = await session.execute(
+        delete(SyncChange).where(
+            SyncChange.table_name == table_name,
+            select(newer.seq).where(
+                newer.table_name == table_name,
+                newer.record_id == SyncChange.record_id,
+                newer.txid > SyncChange.txid,
+                newer.txid < horizon,
+            ).exists(),
+        ).execution_options(synchronize_session=False)
+    )
+    buried = await session.execute(
+        delete(SyncChange).where(
+            SyncChange.table_name == table_name,
+            select(SyncTombstone.seq).where(
+                SyncTombstone.table_name == table_name,
+                SyncTombstone.record_id == SyncChange.record_id,
+                SyncTombstone.txid >= SyncChange.txid,
+                SyncTombstone.txid < horizon,
+            ).exists(),
+        ).execution_options(synchronize_session=False)
+    )
+    purged = await session.execute(
+        delete(SyncTombstone)
+        .where(
+            SyncTombstone.table_name == table_name,
+            SyncTombstone.deleted_at < purge_before,
+            SyncTombstone.txid < horizon,
+        )
+        .returning(SyncTombstone.txid)
+        .execution_options(synchronize_session=False)
+    )
+    purged_txids = list(purged.scalars())
+    if purged_txids:
+        stmt = pg_insert(SyncCompaction).values(
+            table_name=table_name,
+            purged_through_txid=max(purged_txids),
+            compacted_at=datetime.now(timezone.utc),
+        )
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[SyncCompaction.table_name],
+            set_={
+                "purged_through_txid": func.greatest(
+                    SyncCompaction.purged_through_txid, stmt.excluded.purged_through_txid
+                ),
+                "compacted_at": stmt.excluded.compacted_at,
+            },
+        ))
+    return {
+        "table_name": table_name,
+        "superseded_changes": superseded.rowcount,
+        "deleted_record_changes": buried.rowcount,
+        "tombstones_purged": len(purged_txids),
+    }
+
+
+async def compact_change_log() -> List[Dict[str, Any]]:
+    """Compact every syncable table, each in its own short transaction."""
+    purge_before = datetime.now(timezone.utc) - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+    results = []
+    async with AsyncSessionLocal() as session:
+        for table_name in SYNC_MODELS:
+            result = await compact_table(session, table_name, purge_before)
+            await session.commit()
+            if result is not None:
+                results.append(result)
+    return results
+
+
+async def compaction_loop() -> None:
+    interval = settings.SYNC_COMPACTION_INTERVAL_HOURS * 3600
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            results = await compact_change_log()
+            if results:
+                removed = sum(r["superseded_changes"] + r["deleted_record_changes"] for r in results)
+                purged = sum(r["tombstones_purged"] for r in results)
+                logger.info(f"Sync compaction: {removed} change rows removed, {purged} tombstones purged")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Sync compaction failed: {e}")
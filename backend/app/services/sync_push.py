@@ -0,0 +1,387 @@
+"""
+Sync push — applies a device batch to its table with set-based statements.
+
+Each chunk is written with one multi-row
+``INSERT ... ON CONFLICT (id) DO UPDATE ... WHERE version < excluded.version``,
+so a 500-record push costs a handful of round-trips instead of 500.
+Records sent as ``{"id": ..., "_deleted": true}`` are removed with one
+``DELETE ... WHERE id = ANY(:ids)`` per chunk and tombstoned.
+
+What a device may push is app.core.policy's ``push_rule``: the pusher's
+role must be allowed the table, only the rule's columns are written, and
+rows with an owner column must belong to the pusher.
+"""
+import enum
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import JSON, any_, bindparam, delete, insert, null, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import policy
+from app.models.inventory import SyncStatus
+from app.models.sync import SyncConflict, ConflictResolution
+from app.models.user import User
+from app.services import compliance_state
+from app.services.sync_changes import SYNC_MODELS, record_changes, record_deletions
+
+PUSH_CHUNK_SIZE = 500
+
+# Financial & inventory data is never overwritten blindly — divergent
+# versions go to manual review.
+FINANCIAL_TABLES = {"orders", "transfers", "payroll", "inventory"}
+
+# Push marker for a record the device deleted.
+DELETED_FLAG = "_deleted"
+
+# Columns the server owns; device values for these are ignored.
+_SERVER_COLUMNS = {"sync_status", "last_modified"}
+
+# Bookkeeping columns left out when deciding whether two copies diverge.
+_UNCOMPARED_COLUMNS = {"id", "version", "created_at", "device_id"}
+
+
+def coerce_record(model, data: Dict[str, Any], writable: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Convert a device JSON record into column values, dropping unknown keys
+    (and, given ``writable``, every key outside it).
+    """
+    columns = model.__table__.columns
+    values = {}
+    for key, value in data.items():
+        if key not in columns or key in _SERVER_COLUMNS or (writable is not None and key not in writable):
+            continue
+        values[key] = _coerce_value(columns[key], value)
+    return values
+
+
+def _coerce_value(column, value):
+    if value is None or isinstance(column.type, JSON):
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    if python_type is uuid.UUID:
+        return uuid.UUID(str(value))
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if issubclass(python_type, enum.Enum):
+        return python_type(value)
+    return python_type(value)
+
+
+def _upsert_statement(table, keys):
+    stmt = pg_insert(table)
+    updates = {key: stmt.excluded[key] for key in keys if key not in ("id", "created_at")}
+    updates["sync_status"] = SyncStatus.SYNCED
+    updates["last_modified"] = datetime.now(timezone.utc)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_=updates,
+        where=table.c.version < stmt.excluded.version,
+    ).returning(table.c.id, table.c.version)
+
+
+async def _upsert_chunk(db: AsyncSession, table, chunk: List[Dict[str, Any]]) -> Dict[uuid.UUID, int]:
+    # executemany needs a uniform parameter set — devices normally send
+    # full rows, so this is almost always a single group.
+    groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+    for row in chunk:
+        groups.setdefault(frozenset(row), []).append({**row, "sync_status": SyncStatus.SYNCED})
+    applied: Dict[uuid.UUID, int] = {}
+    async with db.begin_nested():
+        for keys, group in groups.items():
+            result = await db.execute(_upsert_statement(table, keys), group)
+            applied.update({row_id: version for row_id, version in result.all()})
+    return applied
+
+
+async def upsert_records(
+    db: AsyncSession, table_name: str, rows: List[Dict[str, Any]],
+) -> Tuple[Dict[uuid.UUID, int], Dict[uuid.UUID, str]]:
+    """
+    Write coerced rows in chunks. Returns ({id: new_version}, {id: error}):
+    the first holds every row inserted or newer than the server copy; rows
+    in neither map were left untouched by the version check.
+    A chunk that fails is retried row by row so one bad record cannot sink
+    the rest of the batch.
+    """
+    table = SYNC_MODELS[table_name].__table__
+    applied: Dict[uuid.UUID, int] = {}
+    failed: Dict[uuid.UUID, str] = {}
+    for start in range(0, len(rows), PUSH_CHUNK_SIZE):
+        chunk = rows[start:start + PUSH_CHUNK_SIZE]
+        try:
+            applied.update(await _upsert_chunk(db, table, chunk))
+        except DBAPIError:
+            for row in chunk:
+                try:
+                    applied.update(await _upsert_chunk(db, table, [row]))
+                except DBAPIError as e:
+                    failed[row["id"]] = str(e.orig) if e.orig is not None else str(e)
+    await record_changes(db, table_name, applied.items())
+    return applied, failed
+
+
+def _id_array(ids: List[uuid.UUID]):
+    return bindparam("ids", ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+
+
+async def delete_records(
+    db: AsyncSession, table_name: str, ids: List[uuid.UUID],
+) -> Tuple[List[uuid.UUID], Dict[uuid.UUID, str]]:
+    """
+    Delete rows by id in chunks and tombstone them. Returns (deleted ids,
+    {id: error}); ids in neither were already gone. A chunk that fails
+    (e.g. a row still referenced elsewhere) is retried row by row.
+    """
+    model = SYNC_MODELS[table_name]
+    table = model.__table__
+    owner = policy.owner_column(model)
+    returned = [table.c.id, table.c[owner.key] if owner is not None else null()]
+    deleted: List[Tuple[uuid.UUID, Optional[uuid.UUID]]] = []
+    failed: Dict[uuid.UUID, str] = {}
+
+    async def delete_chunk(chunk: List[uuid.UUID]) -> List[Tuple[uuid.UUID, Optional[uuid.UUID]]]:
+        async with db.begin_nested():
+            result = await db.execute(
+                delete(table).where(table.c.id == any_(_id_array(chunk))).returning(*returned)
+            )
+            return [tuple(row) for row in result]
+
+    for start in range(0, len(ids), PUSH_CHUNK_SIZE):
+        chunk = ids[start:start + PUSH_CHUNK_SIZE]
+        try:
+            deleted.extend(await delete_chunk(chunk))
+        except DBAPIError:
+            for row_id in chunk:
+                try:
+                    deleted.extend(await delete_chunk([row_id]))
+                except DBAPIError as e:
+                    failed[row_id] = str(e.orig) if e.orig is not None else str(e)
+    await record_deletions(db, table_name, deleted)
+    return [row_id for row_id, _ in deleted], failed
+
+
+async def fetch_server_rows(db: AsyncSession, table_name: str, ids: List[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, Any]]:
+    """
+    Current rows for all pushed ids in one ``WHERE id = ANY(:ids)`` query,
+    locked until commit. Locks are taken in id order so concurrent pushes
+    touching the same rows queue up instead of deadlocking.
+    """
+    if not ids:
+        return {}
+    table = SYNC_MODELS[table_name].__table__
+    result = await db.execute(
+        select(table)
+        .where(table.c.id == any_(_id_array(ids)))
+        .order_by(table.c.id)
+        .with_for_update()
+    )
+    return {row.id: dict(row._mapping) for row in result}
+
+
+async def fetch_owners(
+    db: AsyncSession, table_name: str, ids: List[uuid.UUID], column: str,
+) -> Dict[uuid.UUID, uuid.UUID]:
+    """``{id: owner}`` for those of the given rows that exist."""
+    if not ids:
+        return {}
+    table = SYNC_MODELS[table_name].__table__
+    result = await db.execute(
+        select(table.c.id, table.c[column]).where(table.c.id == any_(_id_array(ids)))
+    )
+    return dict(result.all())
+
+
+def _foreign_owner(rule: policy.PushRule, user: User, row: Dict[str, Any], server_row) -> bool:
+    """Whether the pushed or the stored row belongs to someone other than ``user``."""
+    if rule.owner is None or user.role in rule.owner_exempt:
+        return False
+    owners = {row.get(rule.owner, user.id)}
+    if server_row is not None:
+        owners.add(server_row[rule.owner])
+    return owners != {user.id}
+
+
+def _diverges(row: Dict[str, Any], server_row: Dict[str, Any]) -> bool:
+    return any(
+        server_row.get(key) != value
+        for key, value in row.items()
+        if key not in _UNCOMPARED_COLUMNS
+    )
+
+
+async def apply_push(
+    db: AsyncSession, table_name: str, records: List[Dict[str, Any]], sync_event_id, user: User,
+) -> Dict[str, Any]:
+    """
+    Apply a pushed batch. Returns one outcome per record, in push order,
+    plus totals:
+      applied  — written (inserted, or newer than the server copy)
+      stale    — server already holds this version or a newer one, same data
+      conflict — server moved on since the device's copy and the data differs
+      deleted  — removed (records sent with ``"_deleted": true``)
+      error    — rejected; see ``error``
+    A financial/inventory write must carry exactly the server's version + 1;
+    anything else that differs from the server copy is a conflict held for
+    manual review. On other tables a conflict is an older or equal version,
+    the device write wins and the conflict is logged resolved.
+    Only tables whose push rule allows it accept deletes — never
+    financial/inventory or disciplinary records — and, like writes, only
+    on rows the user owns. Of several copies of one record only the newest
+    is applied; the rest are stale.
+    Raises 403 if the user's role may not push the table at all.
+    """
+    model = SYNC_MODELS[table_name]
+    rule = policy.push_rule(model, user.role)
+    if rule is None:
+        raise HTTPException(status_code=403, detail=f"Role '{user.role.value}' not authorized to push {table_name}")
+    is_financial = table_name in FINANCIAL_TABLES
+    # One outcome per pushed record, in push order
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    newest: Dict[uuid.UUID, Tuple[int, Dict[str, Any], Dict[str, Any]]] = {}
+    deletions: Dict[uuid.UUID, List[int]] = {}
+    for index, record_data in enumerate(records):
+        record_id = record_data.get("id")
+        try:
+            if record_id is None:
+                raise ValueError("Missing id")
+            if record_data.get(DELETED_FLAG):
+                if is_financial:
+                    raise ValueError("Financial and inventory records cannot be deleted; cancel or void them")
+                if not rule.deletable:
+                    raise ValueError(f"{table_name} records cannot be deleted from a device")
+                deletions.setdefault(uuid.UUID(str(record_id)), []).append(index)
+                continue
+            row = coerce_record(model, record_data, rule.columns)
+        except (TypeError, ValueError) as e:
+            outcomes[index] = {"record_id": record_id, "status": "error", "error": str(e)}
+            continue
+        # One upsert cannot touch a row twice — of a record edited several
+        # times while offline, only the newest copy is applied.
+        previous = newest.get(row["id"])
+        if previous is not None:
+            if (previous[2].get("version") or 1) > (row.get("version") or 1):
+                outcomes[index] = {"record_id": str(row["id"]), "status": "stale"}
+                continue
+            outcomes[previous[0]] = {"record_id": str(row["id"]), "status": "stale"}
+        newest[row["id"]] = (index, record_data, row)
+    # Locked and written in id order (see fetch_server_rows)
+    candidates = [newest[row_id] for row_id in sorted(newest)]
+
+    server_rows = await fetch_server_rows(db, table_name, [row["id"] for _, _, row in candidates])
+    now = datetime.now(timezone.utc)
+    rows: List[Dict[str, Any]] = []
+    conflict_rows: List[Dict[str, Any]] = []
+
+    for index, record_data, row in candidates:
+        record_id = row["id"]
+        client_version = row.get("version") or 1
+        server_row = server_rows.get(record_id)
+
+        if _foreign_owner(rule, user, row, server_row):
+            outcomes[index] = {"record_id": str(record_id), "status": "error", "error": "Not your record"}
+            continue
+        if server_row is None and rule.owner:
+            row.setdefault(rule.owner, user.id)
+        for column, source in rule.derived:
+            row[column] = row.get(source) if server_row is None else server_row[column]
+
+        # A pushed version never lets a financial write past the server's:
+        # it must be the direct successor of the stored copy
+        if server_row is not None and (
+            client_version != server_row["version"] + 1 if is_financial
+            else client_version <= server_row["version"]
+        ):
+            if not _diverges(row, server_row):
+                outcomes[index] = {"record_id": str(record_id), "status": "stale"}
+                continue
+            conflict = {
+                "sync_event_id": sync_event_id,
+                "table_name": table_name,
+                "record_id": str(record_id),
+                "client_version": client_version,
+                "server_version": server_row["version"],
+                "client_data": record_data,
+                "server_data": jsonable_encoder(server_row),
+                "is_financial": is_financial,
+            }
+            if is_financial:
+                conflict["resolution"] = ConflictResolution.MANUAL_REVIEW
+                conflict_rows.append(conflict)
+                outcomes[index] = {"record_id": str(record_id), "status": "conflict"}
+                continue
+            # Last write wins — land on top of the server's version
+            row = {**row, "version": server_row["version"] + 1}
+            conflict.update(
+                resolution=ConflictResolution.LAST_WRITE_WINS,
+                resolved_data=record_data,
+                resolved_at=now,
+            )
+            conflict_rows.append(conflict)
+
+        rows.append(row)
+        outcomes[index] = {"record_id": str(record_id), "status": "pending"}
+
+    if conflict_rows:
+        await db.execute(insert(SyncConflict), conflict_rows)
+
+    # Deletes are held to the same ownership as writes
+    deletion_owners: Dict[uuid.UUID, uuid.UUID] = {}
+    if deletions and rule.owner:
+        deletion_owners = await fetch_owners(db, table_name, list(deletions), rule.owner)
+        for row_id, owner in deletion_owners.items():
+            if _foreign_owner(rule, user, {}, {rule.owner: owner}):
+                for index in deletions.pop(row_id):
+                    outcomes[index] = {"record_id": str(row_id), "status": "error", "error": "Not your record"}
+
+    # Compliance state of every user whose rows this push may touch
+    owners = set()
+    if table_name in compliance_state.TRACKED_SYNC_TABLES:
+        owners = {row["user_id"] for row in rows if row.get("user_id")}
+        owners |= {server_row["user_id"] for server_row in server_rows.values()}
+        owners |= {owner for row_id, owner in deletion_owners.items() if row_id in deletions}
+
+    applied, failed = await upsert_records(db, table_name, rows) if rows else ({}, {})
+
+    deleted: List[uuid.UUID] = []
+    if deletions:
+        deleted, delete_failed = await delete_records(db, table_name, sorted(deletions))
+        for row_id, indexes in deletions.items():
+            for index in indexes:
+                if row_id in delete_failed:
+                    outcomes[index] = {"record_id": str(row_id), "status": "error", "error": delete_failed[row_id]}
+                else:
+                    # Already-absent rows count as deleted — the device's intent holds
+                    outcomes[index] = {"record_id": str(row_id), "status": "deleted"}
+
+    await compliance_state.recompute(db, owners)
+
+    for outcome in outcomes:
+        if outcome["status"] == "pending":
+            row_id = uuid.UUID(outcome["record_id"])
+            if row_id in failed:
+                outcome.update(status="error", error=failed[row_id])
+            elif row_id in applied:
+                outcome.update(status="applied", version=applied[row_id])
+            else:
+                outcome["status"] = "stale"
+
+    return {
+        "outcomes": outcomes,
+        "records_synced": len(applied) + len(deleted),
+        "conflicts": len(conflict_rows),
+        "errors": [o for o in outcomes if o["status"] == "error"],
+    }
@@ -0,0 +1,162 @@
+"""
+Bootstrap snapshots — a pre-built, gzipped copy of every syncable table per
+role, so a newly enrolled device downloads one file and then catches up
+with a small delta pull instead of paging through every table.
+
+File layout (NDJSON, one JSON object per line):
+  {"type": "snapshot", "role": ..., "cursor": ..., "created_at": ..., "tables": [...]}
+  {"type": "begin", "table_name": ...}
+  {"type": "record", "table_name": ..., "data": {...}}   (one per row)
+  {"type": "end", "table_name": ..., "records": ...}
+All rows are read from one REPEATABLE READ snapshot, and ``cursor`` is a
+valid /sync/pull cursor for it: pulling from there re-sends anything the
+file may already hold, never less. Tables not listed in ``tables`` are
+pulled from cursor 0.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import policy
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import UserRole
+from app.services.sync_changes import SYNC_MODELS, STREAM_BATCH_SIZE, TXID_HORIZON
+
+settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+
+def snapshot_dir() -> Path:
+    return Path(settings.SNAPSHOT_DIR)
+
+
+def snapshot_path(role: UserRole) -> Path:
+    return snapshot_dir() / f"{role.value}.ndjson.gz"
+
+
+def _meta_path(role: UserRole) -> Path:
+    return snapshot_dir() / f"{role.value}.json"
+
+
+def snapshot_tables(role: UserRole) -> List[str]:
+    """
+    Tables the role sees in full. Per-user tables (own logs, payroll …) are
+    left out — a device pulls those from cursor 0, and they are small.
+    """
+    return [
+        table_name for table_name, model in SYNC_MODELS.items()
+        if policy.visibility(model, role) is policy.Visibility.ALL
+    ]
+
+
+def read_snapshot_meta(role: UserRole) -> Optional[Dict[str, Any]]:
+    """The header of a role's current snapshot, or None if none has been built."""
+    try:
+        with open(_meta_path(role)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _encode(lines: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(jsonable_encoder(line)) + "\n" for line in lines).encode("utf-8")
+
+
+async def _write_role(session: AsyncSession, role: UserRole, cursor: int, created_at: datetime) -> Dict[str, Any]:
+    tables = snapshot_tables(role)
+    meta = {
+        "type": "snapshot",
+        "role": role.value,
+        "cursor": cursor,
+        "created_at": created_at.isoformat(),
+        "tables": tables,
+        "records": 0,
+    }
+    final = snapshot_path(role)
+    # Written beside the target and renamed into place, so a download never sees half a file
+    tmp = final.with_name(f"{final.name}.{os.getpid()}.tmp")
+    fh = await asyncio.to_thread(gzip.open, tmp, "wb")
+    try:
+        await asyncio.to_thread(fh.write, _encode([meta]))
+        for table_name in tables:
+            table = SYNC_MODELS[table_name].__table__
+            count = 0
+            await asyncio.to_thread(fh.write, _encode([{"type": "begin", "table_name": table_name}]))
+            result = await session.stream(
+                select(table).order_by(table.c.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                count += len(partition)
+                lines = [
+                    {"type": "record", "table_name": table_name, "data": dict(row._mapping)}
+                    for row in partition
+                ]
+                await asyncio.to_thread(fh.write, _encode(lines))
+            await asyncio.to_thread(
+                fh.write, _encode([{"type": "end", "table_name": table_name, "records": count}])
+            )
+            meta["records"] += count
+        await asyncio.to_thread(fh.close)
+        os.replace(tmp, final)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        tmp.unlink(missing_ok=True)
+        raise
+
+    meta["size_bytes"] = final.stat().st_size
+    meta_tmp = _meta_path(role).with_name(f"{role.value}.json.{os.getpid()}.tmp")
+    meta_tmp.write_text(json.dumps(meta))
+    os.replace(meta_tmp, _meta_path(role))
+    return meta
+
+
+async def build_snapshots() -> List[Dict[str, Any]]:
+    """Rebuild every role's snapshot from one consistent read of the database."""
+    snapshot_dir().mkdir(parents=True, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    built = []
+    async with AsyncSessionLocal() as session:
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        )
+        # First statement fixes the transaction snapshot; every txid below
+        # its xmin is reflected in the rows read after it.
+        horizon = (await session.execute(select(TXID_HORIZON))).scalar_one()
+        for role in UserRole:
+            built.append(await _write_role(session, role, horizon - 1, created_at))
+        await session.rollback()
+    return built
+
+
+def _snapshot_age() -> Optional[float]:
+    try:
+        return time.time() - snapshot_path(UserRole.ADMIN).stat().st_mtime
+    except OSError:
+        return None
+
+
+async def snapshot_loop() -> None:
+    """Background builder. Skips a round when another worker built recently."""
+    interval = settings.SNAPSHOT_INTERVAL_MINUTES * 60
+    while True:
+        try:
+            age = _snapshot_age()
+            if age is None or age >= interval * 0.9:
+                built = await build_snapshots()
+                logger.info(f"Bootstrap snapshots built: {sum(m['records'] for m in built)} rows")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Bootstrap snapshot build failed: {e}")
+        await asyncio.sleep(interval)
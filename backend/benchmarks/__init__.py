@@ -0,0 +1,4 @@
+"""
+Load benchmarks. Run from backend/ as modules, e.g.
+    python -m benchmarks.sync_bench --help
+"""
@@ -0,0 +1,167 @@
+"""
+Login-storm benchmark — a burst of concurrent logins (shift start) against
+app.main.app in-process, while a prober keeps issuing an ordinary
+authenticated request (GET /auth/users). Reports the prober's latency
+before and during the storm, login latency, and the password pool's
+queue-wait figures.
+
+Point DATABASE_URL at a scratch database; the run seeds its own users there.
+
+    cd backend
+    python -m benchmarks.login_storm --logins 100
+    python -m benchmarks.login_storm --logins 100 --inline   # bcrypt on the event loop, for comparison
+
+Exits 1 when the prober's p95 during the storm exceeds its quiet p95 by
+more than ``--max-ratio`` (plus ``--slack-ms`` for timer noise).
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import httpx
+
+from app.main import app, lifespan
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token, hash_password, password_pool
+from app.models.user import User, UserRole
+from benchmarks.sync_bench import _percentile, reset_schema
+
+PASSWORD = "storm-pass-123"
+
+
+# ─── Seeding ─────────────────────────────────────────────────────────
+
+async def seed(args, run_id: str) -> Dict[str, Any]:
+    # One real hash shared by every account — same cost to verify, seeded in one call
+    hashed = hash_password(PASSWORD)
+    async with AsyncSessionLocal() as session:
+        admin = User(
+            employee_id=f"STORM-{run_id}-ADMIN",
+            email=f"storm-{run_id}-admin@bench.local",
+            full_name="Storm Prober",
+            hashed_password=hashed,
+            role=UserRole.ADMIN,
+        )
+        staff = [
+            User(
+                employee_id=f"STORM-{run_id}-{i:04d}",
+                email=f"storm-{run_id}-{i:04d}@bench.local",
+                full_name=f"Storm User {i}",
+                hashed_password=hashed,
+                role=UserRole.MARKETER,
+            )
+            for i in range(args.logins)
+        ]
+        session.add(admin)
+        session.add_all(staff)
+        await session.commit()
+    token = create_access_token({"sub": str(admin.id), "role": admin.role.value, "device_id": "storm-prober"})
+    return {"probe_headers": {"Authorization": f"Bearer {token}"}, "emails": [u.email for u in staff]}
+
+
+# ─── Load ────────────────────────────────────────────────────────────
+
+async def probe(client: httpx.AsyncClient, headers, interval: float, stop: asyncio.Event, samples: List[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/auth/users", headers=headers, params={"page_size": 20})
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"probe failed: {response.status_code} {response.text}")
+        await asyncio.sleep(interval)
+
+
+async def login(client: httpx.AsyncClient, email: str, latencies: List[float], statuses: Dict[int, int]):
+    started = time.perf_counter()
+    response = await client.post("/auth/login", json={
+        "email": email, "password": PASSWORD, "device_id": f"storm-{email}",
+    })
+    latencies.append((time.perf_counter() - started) * 1000)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "p50_ms": _percentile(ordered, 50),
+        "p95_ms": _percentile(ordered, 95),
+        "p99_ms": _percentile(ordered, 99),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+        "mean_ms": round(statistics.fmean(ordered), 2) if ordered else 0.0,
+    }
+
+
+# ─── Entry point ─────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100, help="concurrent logins in the storm")
+    parser.add_argument("--quiet-seconds", type=float, default=3.0, help="probe time before the storm")
+    parser.add_argument("--probe-interval-ms", type=int, default=50)
+    parser.add_argument("--inline", action="store_true", help="run bcrypt on the event loop (the old behaviour)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the schema first")
+    parser.add_argument("--max-ratio", type=float, default=3.0, help="allowed storm/quiet probe p95 ratio")
+    parser.add_argument("--slack-ms", type=float, default=25.0)
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    run_id = uuid.uuid4().hex[:6]
+    if args.inline:
+        async def run_inline(fn, *fn_args):
+            return fn(*fn_args)
+        password_pool.run = run_inline
+
+    if args.reset:
+        await reset_schema()
+    async with lifespan(app):
+        seeded = await seed(args, run_id)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench/api/v1", timeout=None) as client:
+            interval = args.probe_interval_ms / 1000
+            quiet: List[float] = []
+            stop = asyncio.Event()
+            prober = asyncio.create_task(probe(client, seeded["probe_headers"], interval, stop, quiet))
+            await asyncio.sleep(args.quiet_seconds)
+            stop.set()
+            await prober
+
+            storm: List[float] = []
+            stop = asyncio.Event()
+            prober = asyncio.create_task(probe(client, seeded["probe_headers"], interval, stop, storm))
+            login_latencies: List[float] = []
+            statuses: Dict[int, int] = {}
+            started = time.perf_counter()
+            await asyncio.gather(*(login(client, email, login_latencies, statuses) for email in seeded["emails"]))
+            wall = time.perf_counter() - started
+            stop.set()
+            await prober
+        pool = password_pool.stats()
+
+    quiet_stats, storm_stats, login_stats = summarize(quiet), summarize(storm), summarize(login_latencies)
+    mode = "inline" if args.inline else f"pool ({pool['workers']} workers)"
+    print(f"\nLogins: {args.logins}  mode: {mode}  "
+          f"storm wall: {round(wall, 2)}s  statuses: {statuses}")
+    print(f"\n{'':<16}{'reqs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in (("probe (quiet)", quiet_stats), ("probe (storm)", storm_stats), ("login", login_stats)):
+        print(f"{name:<16}{row['requests']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+    if not args.inline:
+        print(f"\nPassword pool: {pool['completed']} calls, {pool['rejected']} rejected, queue wait "
+              f"p50 {pool['wait_p50_ms']} ms  p95 {pool['wait_p95_ms']} ms  max {pool['wait_max_ms']} ms")
+
+    allowed = quiet_stats["p95_ms"] * args.max_ratio + args.slack_ms
+    if storm_stats["p95_ms"] > allowed:
+        print(f"\nFAIL: probe p95 during the storm {storm_stats['p95_ms']} ms > allowed {round(allowed, 2)} ms")
+        return 1
+    print(f"\nOK: probe p95 during the storm {storm_stats['p95_ms']} ms ≤ allowed {round(allowed, 2)} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
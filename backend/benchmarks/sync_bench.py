@@ -0,0 +1,403 @@
+"""
+Sync load benchmark — N simulated devices doing push/pull cycles against
+app.main.app in-process, reporting latency percentiles, throughput, DB
+round-trips per request and conflict rate.
+
+Point DATABASE_URL at a scratch database; the run seeds its own users and
+rows there. ``--reset`` drops and recreates the schema first — use it for
+runs you compare, since devices pull everything earlier runs left behind.
+
+    cd backend
+    python -m benchmarks.sync_bench --reset --devices 20 --cycles 10
+    python -m benchmarks.sync_bench --reset --save-baseline sync_baseline.json
+    python -m benchmarks.sync_bench --reset --baseline sync_baseline.json   # exit 1 on regression
+
+Every cycle each device pushes a batch of inventory rows (a share of them
+edits to rows all devices hold, which is where conflicts come from) plus
+its daily log, then pulls both tables from its cursor until caught up.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import event, insert, text
+
+from app.main import app, lifespan
+from app.core.database import engine, AsyncSessionLocal
+from app.core.security import create_access_token
+from app.models.inventory import FinishedGood
+from app.models.user import User, UserRole
+
+# ─── DB round-trip counting ──────────────────────────────────────────
+# Each simulated request sets its own counter; statements issued while
+# serving it (including in tasks it spawns) land on that counter.
+
+_round_trips: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("round_trips", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_round_trip(conn, cursor, statement, parameters, context, executemany):
+    counter = _round_trips.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+# ─── Metrics ─────────────────────────────────────────────────────────
+
+class Metrics:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.round_trips: Dict[str, List[int]] = {}
+        self.failures: Dict[str, int] = {}
+        self.records_pushed = 0
+        self.records_applied = 0
+        self.records_pulled = 0
+        self.conflicts = 0
+
+    async def timed(self, name: str, call):
+        counter = [0]
+        token = _round_trips.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await call
+        finally:
+            _round_trips.reset(token)
+        self.latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        self.round_trips.setdefault(name, []).append(counter[0])
+        if response.status_code >= 400:
+            self.failures[name] = self.failures.get(name, 0) + 1
+        return response
+
+    def report(self, wall_seconds: float, config: Dict[str, Any]) -> Dict[str, Any]:
+        ops = {}
+        for name, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            ops[name] = {
+                "requests": len(samples),
+                "failures": self.failures.get(name, 0),
+                "p50_ms": _percentile(ordered, 50),
+                "p95_ms": _percentile(ordered, 95),
+                "p99_ms": _percentile(ordered, 99),
+                "mean_ms": round(statistics.fmean(ordered), 2),
+                "round_trips": round(statistics.fmean(self.round_trips[name]), 2),
+            }
+        moved = self.records_applied + self.records_pulled
+        return {
+            "config": config,
+            "wall_seconds": round(wall_seconds, 3),
+            "records_pushed": self.records_pushed,
+            "records_applied": self.records_applied,
+            "records_pulled": self.records_pulled,
+            "records_per_sec": round(moved / wall_seconds, 1) if wall_seconds else 0,
+            "conflict_rate": round(self.conflicts / self.records_pushed, 4) if self.records_pushed else 0,
+            "ops": ops,
+        }
+
+
+def _percentile(ordered: List[float], pct: int) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+# ─── Simulated device ────────────────────────────────────────────────
+
+class Device:
+    def __init__(self, user: User, shared_ids: List[uuid.UUID], rng: random.Random):
+        self.user = user
+        self.device_id = f"bench-{user.employee_id}"
+        token = create_access_token({"sub": str(user.id), "role": user.role.value, "device_id": self.device_id})
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = rng
+        self.cursors = {"inventory": 0, "daily_logs": 0}
+        self.known_versions: Dict[str, int] = {str(row_id): 1 for row_id in shared_ids}
+        self.own: Dict[str, Dict[str, Any]] = {}
+
+    def inventory_batch(self, size: int, overlap: float) -> List[Dict[str, Any]]:
+        records = []
+        for _ in range(size):
+            if self.rng.random() < overlap:
+                row_id = self.rng.choice(list(self.known_versions))
+                records.append({
+                    "id": row_id,
+                    "product_id": f"SHARED-{row_id[:8]}",
+                    "name": "Shared product",
+                    "batch_number": "SHARED",
+                    "quantity": self.rng.randint(1, 500),
+                    "available_balance": self.rng.randint(1, 500),
+                    "version": self.known_versions[row_id] + 1,
+                })
+            elif self.own and self.rng.random() < 0.5:
+                row = self.rng.choice(list(self.own.values()))
+                # Edits since the last pull collapse onto the server's version + 1
+                records.append({**row, "quantity": self.rng.randint(1, 500), "version": row["version"] + 1})
+            else:
+                row_id = str(uuid.uuid4())
+                row = {
+                    "id": row_id,
+                    "product_id": f"P-{row_id[:12]}",
+                    "name": "Bench product",
+                    "batch_number": f"B-{self.device_id}",
+                    "quantity": self.rng.randint(1, 500),
+                    "available_balance": self.rng.randint(1, 500),
+                    "unit_price": 1500.0,
+                    "version": 1,
+                }
+                self.own[row_id] = row
+                records.append(dict(row))
+        return records
+
+    def daily_log(self, log_date: date) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "user_id": str(self.user.id),
+            "log_date": log_date.isoformat(),
+            "role_at_time": self.user.role.value,
+            "activities": [{"activity": "Customer visits", "count": self.rng.randint(1, 12)}],
+            "key_achievements": "Benchmark day",
+            "hours_worked": 8,
+            "status": "submitted",
+            "version": 1,
+        }
+
+    def confirm(self, outcomes: List[Dict[str, Any]]) -> None:
+        """Take the server's version for every inventory row the push applied."""
+        for outcome in outcomes:
+            if outcome["status"] != "applied":
+                continue
+            if outcome["record_id"] in self.known_versions:
+                self.known_versions[outcome["record_id"]] = outcome["version"]
+            elif outcome["record_id"] in self.own:
+                self.own[outcome["record_id"]]["version"] = outcome["version"]
+
+    def absorb(self, table_name: str, records: List[Dict[str, Any]]) -> None:
+        if table_name != "inventory":
+            return
+        for record in records:
+            if record["id"] in self.known_versions:
+                self.known_versions[record["id"]] = record["version"]
+            elif record["id"] in self.own:
+                self.own[record["id"]]["version"] = record["version"]
+
+
+async def run_device(client: httpx.AsyncClient, device: Device, args, metrics: Metrics, start_date: date):
+    for cycle in range(args.cycles):
+        inventory = device.inventory_batch(args.batch, args.overlap)
+        daily_logs = [device.daily_log(start_date + timedelta(days=cycle))]
+        metrics.records_pushed += len(inventory) + len(daily_logs)
+
+        behind = {"inventory": True, "daily_logs": True}
+        if args.mode == "session":
+            body = {
+                "device_id": device.device_id,
+                "tables": {
+                    "inventory": {"cursor": device.cursors["inventory"], "limit": args.page, "records": inventory},
+                    "daily_logs": {"cursor": device.cursors["daily_logs"], "limit": args.page, "records": daily_logs},
+                },
+            }
+            response = await metrics.timed("session", client.post("/sync/session", headers=device.headers, json=body))
+            if response.status_code == 200:
+                for table_name, result in response.json()["tables"].items():
+                    push = result.get("push") or {}
+                    metrics.records_applied += push.get("records_synced", 0)
+                    metrics.conflicts += push.get("conflicts", 0)
+                    if table_name == "inventory":
+                        device.confirm(push.get("results", []))
+                    metrics.records_pulled += len(result["records"])
+                    device.absorb(table_name, result["records"])
+                    device.cursors[table_name] = result["next_cursor"]
+                    behind[table_name] = result["has_more"]
+        else:
+            for table_name, records in (("inventory", inventory), ("daily_logs", daily_logs)):
+                body = {"device_id": device.device_id, "table_name": table_name, "records": records}
+                response = await metrics.timed("push", client.post("/sync/push", headers=device.headers, json=body))
+                if response.status_code == 200:
+                    result = response.json()
+                    metrics.records_applied += result["records_synced"]
+                    metrics.conflicts += result["conflicts"]
+                    if table_name == "inventory":
+                        device.confirm(result["results"])
+
+        # Catch up (in session mode, only tables the session left unfinished)
+        for table_name in ("inventory", "daily_logs"):
+            while behind[table_name]:
+                params = {
+                    "table_name": table_name,
+                    "cursor": device.cursors[table_name],
+                    "limit": args.page,
+                    "device_id": device.device_id,
+                }
+                response = await metrics.timed("pull", client.get("/sync/pull", headers=device.headers, params=params))
+                if response.status_code != 200:
+                    break
+                result = response.json()
+                metrics.records_pulled += len(result["records"])
+                device.absorb(table_name, result["records"])
+                device.cursors[table_name] = result["next_cursor"]
+                behind[table_name] = result["has_more"]
+
+        if args.think_ms:
+            await asyncio.sleep(device.rng.uniform(0, args.think_ms) / 1000)
+
+
+# ─── Seeding ─────────────────────────────────────────────────────────
+
+async def reset_schema() -> None:
+    """Drop everything; the app lifespan recreates the tables."""
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+
+
+async def seed(args, run_id: str) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as session:
+        users = [
+            User(
+                employee_id=f"BENCH-{run_id}-{i:04d}",
+                email=f"bench-{run_id}-{i:04d}@bench.local",
+                full_name=f"Bench Device {i}",
+                # Never logged into — devices get minted tokens
+                hashed_password="!",
+                role=UserRole.FACTORY_SUPERVISOR,
+            )
+            for i in range(args.devices)
+        ]
+        session.add_all(users)
+        shared_ids = [uuid.uuid4() for _ in range(args.shared)]
+        if shared_ids:
+            await session.execute(insert(FinishedGood), [
+                {
+                    "id": row_id,
+                    "product_id": f"SHARED-{str(row_id)[:8]}",
+                    "name": "Shared product",
+                    "batch_number": "SHARED",
+                    "quantity": 100,
+                    "available_balance": 100,
+                    "version": 1,
+                }
+                for row_id in shared_ids
+            ])
+        await session.commit()
+    return {"users": users, "shared_ids": shared_ids}
+
+
+# ─── Baseline comparison ─────────────────────────────────────────────
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond ``tolerance`` (fractional) against a saved baseline."""
+    problems = []
+    base_rate, rate = baseline.get("records_per_sec", 0), report["records_per_sec"]
+    print(f"\n{'metric':<28}{'baseline':>12}{'current':>12}{'change':>10}")
+    print(f"{'records/sec':<28}{base_rate:>12}{rate:>12}{_change(base_rate, rate):>10}")
+    if base_rate and rate < base_rate * (1 - tolerance):
+        problems.append(f"records/sec fell {_change(base_rate, rate)}")
+    for name, op in report["ops"].items():
+        base = baseline.get("ops", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms", "round_trips"):
+            print(f"{name + ' ' + key:<28}{base[key]:>12}{op[key]:>12}{_change(base[key], op[key]):>10}")
+        if base["p95_ms"] and op["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name} p95 rose {_change(base['p95_ms'], op['p95_ms'])}")
+        # Round-trips are deterministic per request shape; any growth is a real change
+        if op["round_trips"] > base["round_trips"] + 0.5:
+            problems.append(f"{name} round-trips {base['round_trips']} → {op['round_trips']}")
+    return problems
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before:+.1%}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nDevices: {report['config']['devices']}  cycles: {report['config']['cycles']}  "
+          f"mode: {report['config']['mode']}  wall: {report['wall_seconds']}s")
+    print(f"Records pushed {report['records_pushed']}  applied {report['records_applied']}  "
+          f"pulled {report['records_pulled']}  → {report['records_per_sec']} records/sec")
+    print(f"Conflict rate: {report['conflict_rate']:.2%}")
+    print(f"\n{'op':<10}{'reqs':>7}{'fail':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db trips':>10}")
+    for name, op in report["ops"].items():
+        print(f"{name:<10}{op['requests']:>7}{op['failures']:>6}{op['p50_ms']:>10}"
+              f"{op['p95_ms']:>10}{op['p99_ms']:>10}{op['round_trips']:>10}")
+
+
+# ─── Entry point ─────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=50, help="inventory records pushed per cycle")
+    parser.add_argument("--shared", type=int, default=50, help="inventory rows every device edits")
+    parser.add_argument("--overlap", type=float, default=0.1, help="share of pushed records hitting shared rows")
+    parser.add_argument("--page", type=int, default=500, help="pull page size")
+    parser.add_argument("--mode", choices=("split", "session"), default="split",
+                        help="split: /push + /pull per table; session: one /sync/session per cycle")
+    parser.add_argument("--think-ms", type=int, default=0, help="max random pause between cycles")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the schema first")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional regression")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    run_id = uuid.uuid4().hex[:6]
+    config = {key: getattr(args, key) for key in ("devices", "cycles", "batch", "shared", "overlap", "page", "mode")}
+
+    if args.reset:
+        await reset_schema()
+    async with lifespan(app):
+        seeded = await seed(args, run_id)
+        rng = random.Random(args.seed)
+        devices = [
+            Device(user, seeded["shared_ids"], random.Random(rng.random()))
+            for user in seeded["users"]
+        ]
+        metrics = Metrics()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench/api/v1", timeout=None) as client:
+            start_date = date.today() - timedelta(days=args.cycles)
+            started = time.perf_counter()
+            await asyncio.gather(*(run_device(client, device, args, metrics, start_date) for device in devices))
+            wall = time.perf_counter() - started
+
+    report = metrics.report(wall, config)
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline.get("config") != config:
+            print("\nWarning: baseline was recorded with a different configuration")
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for problem in problems:
+                print(f"  - {problem}")
+            return 1
+        print("\nNo regressions beyond tolerance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,74 @@
+"""
+One-off: convert an existing database's audit_logs and sync_events into
+monthly-partitioned tables, keeping their rows.
+Run:  cd backend && python partition_log_tables.py
+Safe to re-run — tables that are already partitioned are skipped.
+"""
+import asyncio
+from sqlalchemy import text
+from app.core.database import engine, Base
+from app.services.partitions import PARTITIONED_TABLES, ensure_partitions
+
+# Import ALL models so Base.metadata knows every table
+import app.models.user          # noqa: F401
+import app.models.asal          # noqa: F401
+import app.models.inventory     # noqa: F401
+import app.models.sales         # noqa: F401
+import app.models.marketing     # noqa: F401
+import app.models.disciplinary  # noqa: F401
+import app.models.kpi           # noqa: F401
+import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
+
+
+async def partition_log_tables():
+    async with engine.begin() as conn:
+        legacy = []
+        for table_name, (column, _) in PARTITIONED_TABLES.items():
+            kind = (await conn.execute(
+                text("SELECT relkind::text FROM pg_class WHERE relname = :name AND relnamespace = 'public'::regnamespace"),
+                {"name": table_name},
+            )).scalar()
+            if kind != "r":
+                print(f"⏭  {table_name}: already partitioned or missing")
+                continue
+            print(f"🔁 {table_name}: moving aside …")
+            # sync_conflicts can no longer reference sync_events by id alone
+            await conn.execute(text(
+                "ALTER TABLE sync_conflicts DROP CONSTRAINT IF EXISTS sync_conflicts_sync_event_id_fkey"
+            ))
+            await conn.execute(text(f'ALTER TABLE "{table_name}" RENAME TO "{table_name}_legacy"'))
+            await conn.execute(text(
+                f'ALTER TABLE "{table_name}_legacy" RENAME CONSTRAINT "{table_name}_pkey" TO "{table_name}_legacy_pkey"'
+            ))
+            # Free the index names for the partitioned table
+            indexes = (await conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE tablename = :name AND indexname LIKE 'ix_%'"
+            ), {"name": f"{table_name}_legacy"})).scalars().all()
+            for index in indexes:
+                await conn.execute(text(f'DROP INDEX "{index}"'))
+            legacy.append((table_name, column))
+
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_sync_conflicts_sync_event_id ON sync_conflicts (sync_event_id)"
+        ))
+
+        for table_name, column in legacy:
+            oldest = (await conn.execute(text(f'SELECT min("{column}") FROM "{table_name}_legacy"'))).scalar()
+            await ensure_partitions(conn, since=oldest.date() if oldest else None)
+            columns = ", ".join(f'"{c.name}"' for c in Base.metadata.tables[table_name].columns)
+            copied = await conn.execute(text(
+                f'INSERT INTO "{table_name}" ({columns}) '
+                f'SELECT {columns} FROM "{table_name}_legacy" WHERE "{column}" IS NOT NULL'
+            ))
+            await conn.execute(text(f'DROP TABLE "{table_name}_legacy"'))
+            print(f"✅ {table_name}: {copied.rowcount} rows copied into monthly partitions")
+        await ensure_partitions(conn)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(partition_log_tables())
@@ -0,0 +1,56 @@
+"""
+Rebuild compliance_states from the raw logs, plans, reports and
+disciplinary records — or, with --verify, roll it forward to today and
+report every row that differs from them (exit status 1 if any).
+Run:  cd backend && python rebuild_compliance_state.py [--verify]
+Safe to re-run.
+"""
+import argparse
+import asyncio
+import sys
+from app.core.database import engine, Base
+from app.services import compliance_state
+
+# Import ALL models so Base.metadata knows every table
+import app.models.user          # noqa: F401
+import app.models.asal          # noqa: F401
+import app.models.inventory     # noqa: F401
+import app.models.sales         # noqa: F401
+import app.models.marketing     # noqa: F401
+import app.models.disciplinary  # noqa: F401
+import app.models.kpi           # noqa: F401
+import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
+
+
+async def rebuild_compliance_state(verify: bool) -> int:
+    mismatches = []
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if verify:
+            result = await compliance_state.roll_forward(conn)
+            print(f"🔁 compliance_states: {result['advanced']} rows rolled forward, {result['added']} added")
+            mismatches = await compliance_state.verify(conn)
+        else:
+            written = await compliance_state.rebuild(conn)
+            print(f"✅ compliance_states: {written} rows rebuilt")
+    await engine.dispose()
+    if not verify:
+        return 0
+
+    for row in mismatches:
+        stored = row.pop("stored")
+        print(f"❌ {row['user_id']}: stored {stored or 'nothing'}, expected {row}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} rows differ — run without --verify to rebuild")
+        return 1
+    print("✅ compliance_states matches the raw data")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--verify", action="store_true", help="compare against the raw data instead of rebuilding")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(rebuild_compliance_state(args.verify)))
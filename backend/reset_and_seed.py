@@ -7,6 +7,9 @@ from sqlalchemy import text, select
 from app.core.database import engine, AsyncSessionLocal, Base
 from app.core.security import hash_password
 from app.models.user import User, UserRole
+from app.services.partitions import ensure_partitions
+from app.services.business_calendar import ensure_calendar
+from app.services.search import ensure_search_columns
 
 # Import ALL models so Base.metadata knows every table
 import app.models.asal          # noqa: F401
@@ -16,6 +19,8 @@ import app.models.marketing     # noqa: F401
 import app.models.disciplinary  # noqa: F401
 import app.models.kpi           # noqa: F401
 import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
 
 
 ADMIN_EMAIL = "emmanuelnnadi@astrobsm.edu.org"
@@ -38,6 +43,9 @@ async def reset_and_seed():
     print("📦 Creating tables …")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_partitions(conn)
+        await ensure_calendar(conn)
+        await ensure_search_columns(conn)
     print("✅ All tables created")
 
     # ── Step 3: Seed admin user ──────────────────────────────────────
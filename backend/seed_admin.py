@@ -16,6 +16,8 @@ import app.models.marketing     # noqa: F401
 import app.models.disciplinary  # noqa: F401
 import app.models.kpi           # noqa: F401
 import app.models.sync          # noqa: F401
+import app.models.calendar      # noqa: F401
+import app.models.compliance    # noqa: F401
 
 
 ADMIN_EMAIL = "emmanuelnnadi@astrobsm.edu.org"
@@ -0,0 +1,91 @@
+"""
+Shared fixtures. The suite runs against a real PostgreSQL database named
+by ``TEST_DATABASE_URL``; its ``public`` schema is dropped before every
+test, so never point it at a database you want to keep. Without the
+variable every test is skipped.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    # No background loops while a test runs
+    for interval in (
+        "SNAPSHOT_INTERVAL_MINUTES", "SYNC_COMPACTION_INTERVAL_HOURS",
+        "PARTITION_MAINTENANCE_INTERVAL_HOURS", "COMPLIANCE_ROLL_FORWARD_INTERVAL_MINUTES",
+    ):
+        os.environ[interval] = "0"
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL is not set")
+    for item in items:
+        item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    """Run a coroutine against a fresh schema with the app started."""
+    from sqlalchemy import text
+    from app.core.database import engine
+    from app.main import app, lifespan
+
+    async def reset():
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA public CASCADE"))
+            await conn.execute(text("CREATE SCHEMA public"))
+
+    def runner(test):
+        async def started():
+            await reset()
+            async with lifespan(app):
+                return await test()
+        return loop.run_until_complete(started())
+
+    return runner
+
+
+@pytest.fixture
+def client():
+    """An httpx client for the API, mounted at /api/v1."""
+    import httpx
+    from app.main import app
+
+    return lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api/v1")
+
+
+@pytest.fixture
+def make_user():
+    """Create a user; returns it and its Authorization headers."""
+    from app.core.database import AsyncSessionLocal
+    from app.core.security import create_access_token, hash_password
+    from app.models.user import User, UserRole
+
+    async def make(role=UserRole.ADMIN, department=None, created_at=None):
+        async with AsyncSessionLocal() as db:
+            user = User(
+                employee_id=uuid.uuid4().hex[:10], email=f"{uuid.uuid4().hex[:8]}@example.org",
+                full_name=f"Test {role.value}", hashed_password=hash_password("password1"),
+                role=role, department=department,
+            )
+            if created_at is not None:
+                user.created_at = created_at
+            db.add(user)
+            await db.commit()
+        token = create_access_token({"sub": str(user.id), "role": role.value, "device_id": "test-device"})
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return make
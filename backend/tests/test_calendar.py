@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta, timezone
+
+from app.models.user import UserRole
+
+
+def _last_weekday_before(day: date) -> date:
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def test_holiday_changes_compliance_state_in_same_request(run, client, make_user):
+    async def test():
+        admin, admin_headers = await make_user()
+        staff, _ = await make_user(
+            UserRole.MARKETER, created_at=datetime.now(timezone.utc) - timedelta(days=30),
+        )
+        holiday = _last_weekday_before(date.today())
+
+        async def miss_streak(c):
+            response = await c.get("/asal/compliance", headers=admin_headers)
+            assert response.status_code == 200
+            return next(row["miss_streak"] for row in response.json() if row["user_id"] == str(staff.id))
+
+        async with client() as c:
+            before = await miss_streak(c)
+            response = await c.put(f"/calendar/holidays/{holiday}", headers=admin_headers, json={"name": "Test Day"})
+            assert response.status_code == 200
+            assert await miss_streak(c) == before - 1
+
+            response = await c.delete(f"/calendar/holidays/{holiday}", headers=admin_headers)
+            assert response.status_code == 200
+            assert await miss_streak(c) == before
+
+    run(test)
@@ -0,0 +1,54 @@
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.sync import SyncTombstone
+from app.models.user import UserRole
+
+
+def _daily_log(user, day):
+    return {
+        "id": str(uuid.uuid4()), "user_id": str(user.id), "log_date": day,
+        "role_at_time": user.role.value, "activities": [], "version": 1,
+    }
+
+
+def test_deleted_record_tombstone_reaches_only_its_owner(run, client, make_user):
+    async def test():
+        owner, owner_headers = await make_user(UserRole.MARKETER)
+        other, other_headers = await make_user(UserRole.MARKETER)
+        admin, admin_headers = await make_user()
+        log = _daily_log(owner, "2026-01-05")
+
+        async with client() as c:
+            cursors = {}
+            response = await c.post("/sync/push", headers=owner_headers, json={
+                "device_id": "test-device", "table_name": "daily_logs", "records": [log],
+            })
+            assert response.status_code == 200
+            for name, headers in (("owner", owner_headers), ("other", other_headers), ("admin", admin_headers)):
+                response = await c.get("/sync/pull", headers=headers, params={"table_name": "daily_logs", "cursor": 0})
+                cursors[name] = response.json()["next_cursor"]
+
+            response = await c.post("/sync/push", headers=owner_headers, json={
+                "device_id": "test-device", "table_name": "daily_logs",
+                "records": [{"id": log["id"], "_deleted": True}],
+            })
+            assert [o["status"] for o in response.json()["results"]] == ["deleted"]
+
+            async def deleted(name, headers):
+                response = await c.get("/sync/pull", headers=headers, params={
+                    "table_name": "daily_logs", "cursor": cursors[name],
+                })
+                return response.json()["deleted"]
+
+            assert await deleted("owner", owner_headers) == [log["id"]]
+            assert await deleted("admin", admin_headers) == [log["id"]]
+            assert await deleted("other", other_headers) == []
+
+        async with AsyncSessionLocal() as db:
+            tombstone = (await db.execute(select(SyncTombstone))).scalar_one()
+        assert (tombstone.reason, tombstone.user_id) == ("deleted", owner.id)
+
+    run(test)